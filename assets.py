@@ -0,0 +1,172 @@
+"""Cached loading of the game's images and rendered text.
+
+Every image is decoded from disk once, converted to the display's pixel format
+and kept together with its scaled and rotated variants, keyed by
+(asset, size, angle). The cache is bounded by the memory its surfaces use and
+evicts the least recently used entries first. Rendered text is cached the
+same way, so static strings and unchanged HUD values are rasterized once.
+
+Files can be decoded, and scaled, ahead of time on a loader.Loader thread
+with prefetch(); the conversion to the display format still happens on first
+use. A scaled image is made straight from the decoded file: the full-size
+original is neither kept in the cache nor held by a pending decode.
+"""
+
+import os
+from collections import OrderedDict
+
+import pygame
+
+from loader import Loader
+
+ASSETS_DIR = "Assets"
+# Default memory budget for cached surfaces, in bytes
+MAX_CACHE_BYTES = 96 * 1024 * 1024
+# Default number of rendered strings to keep
+MAX_TEXT_ENTRIES = 256
+
+
+# Memory used by a surface's pixels
+def surface_bytes(surface: pygame.Surface) -> int:
+    return surface.get_pitch() * surface.get_height()
+
+
+class AssetCache:
+    """Least-recently-used cache of display-format surfaces.
+
+    Surfaces are converted with convert()/convert_alpha(), so the display
+    mode must be set before the first image is requested.
+    """
+
+    def __init__(self, directory: str = ASSETS_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.surfaces = OrderedDict()  # (name, size, angle) -> Surface
+        self.bytes = 0
+        self.loads = 0  # Number of files decoded from disk
+        self.pending = {}  # (name, size) -> Future of a prefetched decode
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    # Get an image, loading and transforming it on first use
+    def image(self, name: str, size: tuple = None, angle: int = 0) -> pygame.Surface:
+        """Returns the named image in display format, scaled to size and then
+        rotated by angle. The returned surface is shared: do not draw on it.
+
+        Args:
+            name (str): file name inside the assets directory
+            size (tuple, optional): size to scale to. Defaults to the file's size.
+            angle (int, optional): rotation in degrees. Defaults to 0.
+
+        Returns:
+            pygame.Surface: the cached surface
+        """
+        key = (name, size and tuple(size), angle)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        if angle == 0:
+            surface = self.load(name, key[1])
+        else:
+            surface = pygame.transform.rotate(self.image(name, size), angle)
+        self.store(key, surface)
+        return surface
+
+    # Decode files on a loader thread before they are first needed
+    def prefetch(self, names: list, loader: Loader, size: tuple = None):
+        """Queues the decoding of each file on loader. image() with the same
+        size picks the result up, or decodes the file itself if the loader has
+        not got to it yet. Images already cached or queued are skipped.
+
+        Args:
+            names (list): file names inside the assets directory
+            loader (Loader): loader to decode on
+            size (tuple, optional): size to scale to. Defaults to the file's size.
+        """
+        size = size and tuple(size)
+        for name in names:
+            key = (name, size)
+            if key not in self.pending and (name, size, 0) not in self.surfaces:
+                self.pending[key] = loader.submit(self.decode, name, size)
+
+    # Decode a file and convert it to the display format
+    def load(self, name: str, size: tuple = None) -> pygame.Surface:
+        future = self.pending.pop((name, size), None)
+        # Waiting for a decode that has not started would take longer
+        if future is not None and not future.cancel():
+            surface = future.result()
+        else:
+            surface = self.decode(name, size)
+        if name.lower().endswith(".png"):
+            return surface.convert_alpha()
+        return surface.convert()
+
+    # Read a file into an unconverted surface, scaled to size; safe on any thread
+    def decode(self, name: str, size: tuple = None) -> pygame.Surface:
+        self.loads += 1
+        surface = pygame.image.load(os.path.join(self.directory, name))
+        if size is not None:
+            surface = pygame.transform.scale(surface, size)
+        return surface
+
+    # Add a surface and evict old ones past the memory budget
+    def store(self, key: tuple, surface: pygame.Surface):
+        self.surfaces[key] = surface
+        self.bytes += surface_bytes(surface)
+        while self.bytes > self.max_bytes and len(self.surfaces) > 1:
+            _, evicted = self.surfaces.popitem(last=False)
+            self.bytes -= surface_bytes(evicted)
+
+    # Drop every cached surface
+    def clear(self):
+        self.surfaces.clear()
+        self.bytes = 0
+
+
+class TextCache:
+    """Least-recently-used cache of rendered text surfaces, keyed by
+    (font, text, antialias, color). Text is only rasterized again when one of
+    those changes, e.g. when a ship's health drops.
+    """
+
+    def __init__(self, max_entries: int = MAX_TEXT_ENTRIES):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()  # (font, text, antialias, color) -> Surface
+        self.renders = 0  # Number of times text was actually rasterized
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    # Render text, reusing the surface from an earlier identical call
+    def render(self, font, text: str, antialias, color) -> pygame.Surface:
+        """Drop-in replacement for font.render(text, antialias, color). The
+        returned surface is shared: do not draw on it.
+
+        Args:
+            font (pygame.font.Font): font to render with
+            text (str): text to render
+            antialias: whether to antialias the text
+            color: color of the text
+
+        Returns:
+            pygame.Surface: the rendered text
+        """
+        key = (font, text, bool(antialias), tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.renders += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    # Drop every cached surface
+    def clear(self):
+        self.surfaces.clear()
@@ -0,0 +1,203 @@
+"""Sprite atlas: every ship, explosion and bullet sprite in one image.
+
+The build step bakes each spaceship_*.png and Explosion.png at every scale in
+SCALES, in both facings (ANGLES), plus a solid bullet per ship color, and
+packs them into Assets/atlas.png with a JSON index of where each sprite is.
+At runtime SpriteAtlas loads that one image and cuts every sprite out of it
+as a subsurface, so nothing is scaled or rotated while playing and a frame's
+sprites can all be drawn with a single Surface.blits() call.
+
+If the atlas files are missing or were baked with other settings, the same
+atlas is baked in memory on first use. Rebuild the files after changing the
+sprites or the settings below:
+    python atlas.py
+"""
+
+import argparse
+import glob
+import json
+import os
+
+import pygame
+
+from assets import ASSETS_DIR, AssetCache
+from simulation import BULLET_SIZE, SPACESHIP_SIZE
+
+ATLAS_IMAGE = "atlas.png"
+ATLAS_INDEX = "atlas.json"
+VERSION = 1
+SCALES = (1.0, 0.5)  # 1 for duels, 0.5 for the arena in the default window
+ANGLES = (90, 270)  # Facing right (player 1) and left (player 2)
+ATLAS_WIDTH = 512  # Sprites are packed into rows this wide
+PADDING = 1  # Transparent pixels between sprites
+
+
+# Index key of a sprite
+def sprite_key(name: str, scale: float, angle: int) -> str:
+    return f"{name}@{scale:g}@{angle}"
+
+
+# Size of a sprite at a scale
+def scaled(size: tuple, scale: float) -> tuple:
+    return tuple(max(1, round(side * scale)) for side in size)
+
+
+# Solid bullet sprite of a ship color
+def bullet_sprite(color: str, scale: float) -> pygame.Surface:
+    surface = pygame.Surface(scaled(BULLET_SIZE, scale), pygame.SRCALPHA)
+    surface.fill(pygame.Color(color))
+    return surface
+
+
+# Settings an atlas was baked with, checked before using one from disk
+def settings() -> dict:
+    return {
+        "version": VERSION,
+        "ship_size": list(SPACESHIP_SIZE),
+        "bullet_size": list(BULLET_SIZE),
+        "scales": list(SCALES),
+        "angles": list(ANGLES),
+    }
+
+
+# Bake the atlas
+def bake(directory: str = ASSETS_DIR) -> tuple:
+    """Renders every sprite and packs them into one image, row by row from
+    the tallest down.
+
+    Args:
+        directory (str, optional): assets directory. Defaults to ASSETS_DIR.
+
+    Returns:
+        tuple: the atlas Surface (per-pixel alpha, not converted) and its
+            index, settings() plus "sprites": key -> [x, y, width, height]
+    """
+    ships = sorted(
+        os.path.basename(path)
+        for path in glob.glob(os.path.join(directory, "spaceship_*.png"))
+    )
+    colors = [name[len("spaceship_") : -len(".png")] for name in ships]
+    sprites = []  # (key, Surface)
+    for scale in SCALES:
+        for name in ships + ["Explosion.png"]:
+            image = pygame.transform.scale(
+                pygame.image.load(os.path.join(directory, name)),
+                scaled(SPACESHIP_SIZE, scale),
+            )
+            for angle in ANGLES:
+                sprites.append(
+                    (
+                        sprite_key(name, scale, angle),
+                        pygame.transform.rotate(image, angle),
+                    )
+                )
+        for color in colors:
+            sprites.append(
+                (sprite_key(f"bullet_{color}", scale, 0), bullet_sprite(color, scale))
+            )
+
+    # Shelf packing: fill a row left to right, then start the next one below
+    sprites.sort(key=lambda item: -item[1].get_height())
+    places = {}
+    x = y = row_height = 0
+    for key, surface in sprites:
+        width, height = surface.get_size()
+        if x + width > ATLAS_WIDTH:
+            x, y = 0, y + row_height + PADDING
+            row_height = 0
+        places[key] = [x, y, width, height]
+        x += width + PADDING
+        row_height = max(row_height, height)
+
+    atlas = pygame.Surface((ATLAS_WIDTH, y + row_height), pygame.SRCALPHA)
+    for key, surface in sprites:
+        atlas.blit(surface, places[key][:2])
+    return atlas, {**settings(), "sprites": places}
+
+
+# Write the atlas files
+def build(directory: str = ASSETS_DIR) -> dict:
+    """Bakes the atlas and saves it as ATLAS_IMAGE and ATLAS_INDEX
+
+    Args:
+        directory (str, optional): assets directory. Defaults to ASSETS_DIR.
+
+    Returns:
+        dict: the index
+    """
+    atlas, index = bake(directory)
+    pygame.image.save(atlas, os.path.join(directory, ATLAS_IMAGE))
+    with open(os.path.join(directory, ATLAS_INDEX), "w") as file:
+        json.dump(index, file, separators=(",", ":"))
+    return index
+
+
+class SpriteAtlas:
+    """Ship, explosion and bullet sprites cut out of the atlas, loaded on the
+    first request. The display mode must be set by then.
+    """
+
+    def __init__(self, assets: AssetCache):
+        self.assets = assets  # Loads the atlas image, and sprites it lacks
+        self.sprites = None  # key -> subsurface of the atlas
+
+    # Load the atlas, or bake it if the files are missing or stale
+    def load(self):
+        path = os.path.join(self.assets.directory, ATLAS_INDEX)
+        index = None
+        if os.path.exists(path):
+            with open(path) as file:
+                index = json.load(file)
+        if index is not None and all(
+            index.get(name) == value for name, value in settings().items()
+        ):
+            atlas = self.assets.image(ATLAS_IMAGE)
+        else:
+            atlas, index = bake(self.assets.directory)
+            atlas = atlas.convert_alpha()
+        self.sprites = {}
+        for key, place in index["sprites"].items():
+            sprite = atlas.subsurface(place)
+            # Bullets are solid: opaque copies blit about twice as fast
+            if key.startswith("bullet_"):
+                sprite = sprite.convert()
+            self.sprites[key] = sprite
+
+    # Get a sprite
+    def sprite(self, name: str, scale: float = 1.0, angle: int = 0) -> pygame.Surface:
+        """Returns a sprite from the atlas, making and keeping one on the spot
+        if it was not baked at that scale and angle. The returned surface is
+        shared: do not draw on it.
+
+        Args:
+            name (str): image file name, or "bullet_<color>" for a bullet
+            scale (float, optional): size relative to the game's sprite size. Defaults to 1.0.
+            angle (int, optional): rotation in degrees. Defaults to 0.
+
+        Returns:
+            pygame.Surface: the sprite
+        """
+        if self.sprites is None:
+            self.load()
+        key = sprite_key(name, scale, angle)
+        surface = self.sprites.get(key)
+        if surface is None:
+            if name.startswith("bullet_"):
+                surface = bullet_sprite(name[len("bullet_") :], scale).convert()
+            else:
+                surface = self.assets.image(name, scaled(SPACESHIP_SIZE, scale), angle)
+            self.sprites[key] = surface
+        return surface
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assets", default=ASSETS_DIR, help="assets directory")
+    args = parser.parse_args()
+    index = build(args.assets)
+    path = os.path.join(args.assets, ATLAS_IMAGE)
+    print(f"{len(index['sprites'])} sprites packed into {path}")
+
+
+if __name__ == "__main__":
+    main_cli()
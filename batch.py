@@ -0,0 +1,188 @@
+"""Batched headless environment: many independent matches in lockstep.
+
+For bot development and tuning of INTENSITIES, BatchEnv holds N two-player
+matches in one Fleet of 2N ships and one BulletPool, and advances all of them
+with a single vectorized step(). Firing, movement, bullet motion, the swept
+hit test and damage are the simulation's own functions, so every match plays
+out exactly like a World given the same inputs. Collision needs no broad
+phase: in a duel a bullet can only ever hit the opponent of the ship that
+fired it.
+"""
+
+import numpy as np
+
+from bullets import BulletPool
+from simulation import (
+    BULLET_HEIGHT,
+    BULLET_WIDTH,
+    INPUT_FIRE,
+    INPUT_FIRE_HELD,
+    WIDTH,
+    Fleet,
+    bullet_hit,
+    bullets_per_ship,
+    duel_fleet,
+    fire_ships,
+    move_ships,
+)
+
+# Per player: own x, y, health and live bullets, then the opponent's
+OBSERVATION_SIZE = 8
+WIN_REWARD = 1.0  # Added for the winner and taken from the loser of a match
+DEFAULT_MAX_TICKS = 36000  # Matches still running after this are cut short
+
+
+class BatchEnv:
+    """N two-player matches at one intensity, advanced together.
+
+    Match m is played by ships 2m (player 1) and 2m + 1 (player 2) of the
+    fleet; a bullet's match is its owner // 2. Finished matches are reset at
+    the end of the step that finished them, so every step() advances all N.
+    """
+
+    def __init__(
+        self, matches: int, intensity: dict, max_ticks: int = DEFAULT_MAX_TICKS
+    ):
+        self.matches = matches
+        self.intensity = intensity
+        self.vel = intensity["vel"]
+        self.bullet_vel = intensity["bullet_vel"]
+        self.max_bullets = intensity["max_bullets"]
+        self.laser_mode = intensity["laser"]
+        self.max_ticks = max_ticks
+        # Starting state of one match, copied into every match on reset
+        self.start = duel_fleet(intensity, ["blue", "red"])
+        start = self.start
+        self.fleet = Fleet(
+            x=np.tile(start.x, matches),
+            y=np.tile(start.y, matches),
+            width=np.tile(start.width, matches),
+            height=np.tile(start.height, matches),
+            colors=start.colors * matches,
+            health=np.tile(start.health, matches),
+            direction=np.tile(start.direction, matches),
+            min_x=np.tile(start.min_x, matches),
+            max_x=np.tile(start.max_x, matches),
+            max_y=np.tile(start.max_y, matches),
+        )
+        # Enough slots that no match ever runs out
+        self.bullets = BulletPool(
+            BULLET_WIDTH, BULLET_HEIGHT, 2 * matches * bullets_per_ship(intensity)
+        )
+        self.ticks = np.zeros(matches, dtype=np.int64)  # Ticks of each match
+        # Outcome of the matches finished by the last step: winning player
+        # (0 or 1, -1 if still running or cut short) and length in ticks
+        self.winners = np.full(matches, -1, dtype=np.int64)
+        self.lengths = np.zeros(matches, dtype=np.int64)
+
+    # Start every match over
+    def reset(self) -> np.ndarray:
+        """Puts every match back at its starting state
+
+        Returns:
+            np.ndarray: observations, shape (matches, 2, OBSERVATION_SIZE)
+        """
+        self.reset_matches(np.ones(self.matches, dtype=bool))
+        return self.observe()
+
+    # Start some matches over
+    def reset_matches(self, done: np.ndarray):
+        """Restores the ships of the given matches and removes their bullets
+
+        Args:
+            done (np.ndarray): which matches to reset, shape (matches,)
+        """
+        fleet, start = self.fleet, self.start
+        for name in ("x", "y", "prev_x", "prev_y", "health"):
+            getattr(fleet, name).reshape(-1, 2)[done] = getattr(start, name)
+        bullets = self.bullets
+        n = bullets.size
+        bullets.kill(np.flatnonzero(bullets.alive[:n] & done[bullets.owner[:n] // 2]))
+        self.ticks[done] = 0
+
+    # What each player sees
+    def observe(self) -> np.ndarray:
+        """Builds every player's observation: its own x, y, health and live
+        bullets, followed by the same for its opponent
+
+        Returns:
+            np.ndarray: observations, shape (matches, 2, OBSERVATION_SIZE)
+        """
+        fleet = self.fleet
+        own = np.stack(
+            (
+                fleet.x,
+                fleet.y,
+                fleet.health,
+                self.bullets.owner_counts(len(fleet)),
+            ),
+            axis=1,
+        ).reshape(self.matches, 2, OBSERVATION_SIZE // 2)
+        return np.concatenate((own, own[:, ::-1]), axis=2).astype(np.float32)
+
+    # Advance every match by one tick
+    def step(self, actions) -> tuple:
+        """Runs one tick of every match, with World.step's rules and order
+        1. Fires bullets for fresh fire presses, or lasers while fire is held
+        2. Moves ships and bullets
+        3. Removes bullets that hit the opponent and applies the damage
+        4. Ends and resets matches with a destroyed ship or out of time
+
+        Args:
+            actions: INPUT_* flags, shape (matches, 2)
+
+        Returns:
+            tuple: observations (matches, 2, OBSERVATION_SIZE) after any reset,
+                rewards (matches, 2): damage dealt minus damage taken, plus
+                WIN_REWARD for a win and minus it for a loss, and dones
+                (matches,): which matches ended this tick
+        """
+        fleet, bullets = self.fleet, self.bullets
+        flags = np.asarray(actions).reshape(-1)
+        alive = fleet.health > 0
+
+        # Check bullets fire
+        if not self.laser_mode:
+            firing = alive & (flags & INPUT_FIRE > 0)
+            firing &= bullets.owner_counts(len(fleet)) < self.max_bullets
+        # Lasers fire every tick while held
+        else:
+            firing = alive & (flags & INPUT_FIRE_HELD > 0)
+        fire_ships(bullets, fleet, firing, self.bullet_vel)
+        move_ships(fleet, flags, self.vel, alive)
+
+        # Each bullet can only hit the opponent of the ship that fired it
+        bullets.advance()
+        slots = np.flatnonzero(bullets.alive[: bullets.size])
+        target = bullets.owner[slots] ^ 1
+        _, hit = bullets.sweep(
+            slots,
+            fleet.x[target],
+            fleet.y[target],
+            fleet.width[target],
+            fleet.height[target],
+            fleet.prev_x[target],
+            fleet.prev_y[target],
+        )
+        bullets.kill(slots[hit])
+        bullets.kill(bullets.off_screen(WIDTH))
+        hits = np.bincount(target[hit], minlength=len(fleet))
+        fleet.health[:] = bullet_hit(fleet.health, hits)
+
+        # Damage dealt is the opponent's damage taken
+        hits = hits.reshape(-1, 2)
+        rewards = (hits[:, ::-1] - hits).astype(np.float32)
+        self.ticks += 1
+        dead = fleet.health.reshape(-1, 2) <= 0
+        over = dead.any(axis=1)
+        # Player 1 wins unless destroyed, as in World.winner()
+        winners = np.where(over, dead[:, 0].astype(np.int64), -1)
+        rewards[over, winners[over]] += WIN_REWARD
+        rewards[over, 1 - winners[over]] -= WIN_REWARD
+        dones = over | (self.ticks >= self.max_ticks)
+
+        self.winners[:] = winners
+        self.lengths[:] = np.where(dones, self.ticks, 0)
+        if dones.any():
+            self.reset_matches(dones)
+        return self.observe(), rewards, dones
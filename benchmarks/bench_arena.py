@@ -0,0 +1,161 @@
+"""Headless frame-time benchmark of the N-ship arena.
+
+Plays arena matches between --ships scripted ships (swarm_controller) through
+main.ArenaScene with SDL's dummy video and audio drivers, two scenarios per
+intensity level: the bots as they play, and heavy fire, with every ship
+holding fire on every tick. Every frame runs one tick of the simulation and a
+full redraw, and is timed as a whole and split into update (simulation, bots
+and sounds) and draw. A new match starts whenever one ends.
+
+    python benchmarks/bench_arena.py
+    python benchmarks/bench_arena.py --ships 128 --levels 4 --output arena.json
+
+The run fails (exit status 1) when a scenario's p95 or p99 frame time exceeds
+the --budget-ms frame budget (60 FPS by default).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # Assets are loaded relative to the repository root
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import main
+from simulation import INTENSITIES, INPUT_FIRE, INPUT_FIRE_HELD, TICK_RATE
+
+DEFAULT_SHIPS = 64
+DEFAULT_FRAMES = 1800
+DEFAULT_LEVELS = "0,1,2,3,4"
+DEFAULT_BUDGET_MS = 1000 / 60
+
+
+# Percentile of a sorted list
+def percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# Wrap a controller so every ship also holds fire
+def holding_fire(controller):
+    def held(world):
+        return controller(world) | INPUT_FIRE | INPUT_FIRE_HELD
+
+    return held
+
+
+# Run one scenario
+def run_scenario(intensity: dict, ships: int, frames: int, hold_fire: bool) -> dict:
+    """Plays frames of arena matches at one tick per frame.
+
+    Args:
+        intensity (dict): entry of INTENSITIES to play at
+        ships (int): ships per match
+        frames (int): number of frames to measure
+        hold_fire (bool): every ship fires on every tick it can
+
+    Returns:
+        dict: the scenario's measurements
+    """
+    frame_samples, update_samples, draw_samples = [], [], []
+    matches, peak_bullets = 0, 0
+    scene = None
+    for _ in range(frames):
+        if scene is None or scene.world.over:
+            main.new_round()
+            scene = main.ArenaScene(intensity, ships)
+            if hold_fire:
+                scene.bots = holding_fire(scene.bots)
+            scene.enter()
+            matches += 1
+        start = time.perf_counter()
+        scene.update([], 1 / TICK_RATE)
+        drawn = time.perf_counter()
+        scene.draw()
+        end = time.perf_counter()
+        update_samples.append(drawn - start)
+        draw_samples.append(end - drawn)
+        frame_samples.append(end - start)
+        peak_bullets = max(peak_bullets, len(scene.world.bullets))
+
+    frame_samples.sort()
+    return {
+        "ships": ships,
+        "frames": frames,
+        "matches": matches,
+        "p50_ms": 1000 * percentile(frame_samples, 0.50),
+        "p95_ms": 1000 * percentile(frame_samples, 0.95),
+        "p99_ms": 1000 * percentile(frame_samples, 0.99),
+        "update_ms": 1000 * sum(update_samples) / frames,
+        "draw_ms": 1000 * sum(draw_samples) / frames,
+        "peak_bullets": peak_bullets,
+    }
+
+
+# Print results as a table
+def report(results: dict):
+    print(
+        f"{'scenario':<25}{'ships':>6}{'matches':>9}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'update ms':>11}{'draw ms':>9}{'peak':>7}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:<25}{r['ships']:>6}{r['matches']:>9}{r['p50_ms']:>9.3f}"
+            f"{r['p95_ms']:>9.3f}{r['p99_ms']:>9.3f}{r['update_ms']:>11.3f}"
+            f"{r['draw_ms']:>9.3f}{r['peak_bullets']:>7}"
+        )
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ships", type=int, default=DEFAULT_SHIPS)
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument(
+        "--levels",
+        default=DEFAULT_LEVELS,
+        help="comma-separated intensity levels to benchmark",
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help="fail if a scenario's p95 or p99 frame time exceeds this",
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+    # Everything loaded up front, so the loader thread stays out of the timings
+    main.new_round()
+    main.LOADER.wait()
+
+    results = {}
+    for level in args.levels.split(","):
+        intensity = INTENSITIES[int(level)]
+        results[f"intensity_{level}"] = run_scenario(
+            intensity, args.ships, args.frames, False
+        )
+        results[f"intensity_{level}_heavy_fire"] = run_scenario(
+            intensity, args.ships, args.frames, True
+        )
+    report(results)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    over = [
+        f"{name}: {key[:3]} {r[key]:.2f} ms"
+        for name, r in results.items()
+        for key in ("p95_ms", "p99_ms")
+        if r[key] > args.budget_ms
+    ]
+    for failure in over:
+        print(f"OVER BUDGET {failure}")
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
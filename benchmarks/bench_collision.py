@@ -0,0 +1,191 @@
+"""Scaling benchmark of the collision broad phase.
+
+Runs simulation.find_hits on arenas from 2 ships and 64 bullets up to
+hundreds of ships and tens of thousands of bullets, with the arena growing so
+the density of objects stays the same. Every tick moves the bullets and ships
+first, so the spatial hash is rebuilt from moving objects as in a match.
+Reports milliseconds per tick through the spatial hash and per object (which
+stays roughly flat when scaling is linear), and the cost of testing every
+bullet against every ship where that still fits in memory.
+
+Fails (exit status 1) when a scenario reports more hits per tick than its
+density of ships and bullets allows, which means the workload is broken.
+
+    python benchmarks/bench_collision.py
+    python benchmarks/bench_collision.py --ticks 50 --output collision.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+import simulation
+from bullets import BulletPool
+from simulation import BULLET_WIDTH, BULLET_HEIGHT, SPACESHIP_SIZE, find_hits
+from spatial import SpatialHash
+
+# (ships, bullets) per scenario
+SCENARIOS = [(2, 64), (16, 1000), (64, 5000), (128, 10000), (256, 20000), (512, 40000)]
+AREA_PER_BULLET = 4000  # Square pixels of arena per bullet
+MAX_BRUTE_FORCE_PAIRS = 2_000_000  # Larger brute force runs take too much memory
+DEFAULT_TICKS = 30
+MAX_BULLET_SPEED = 35  # Fastest bullet, in pixels per tick
+SHIP_STEP = 10  # Farthest a ship moves per tick along each axis
+
+
+# Random arena of moving ships and bullets
+def make_arena(ships: int, bullets: int, rng: np.random.Generator) -> dict:
+    side = int((bullets * AREA_PER_BULLET) ** 0.5)
+    pool = BulletPool(BULLET_WIDTH, BULLET_HEIGHT, bullets)
+    xs = rng.uniform(0, side, bullets)
+    ys = rng.uniform(0, side, bullets)
+    vxs = rng.choice([-1, 1], bullets) * rng.uniform(7.5, 35, bullets)
+    owners = rng.integers(0, ships, bullets)
+    for x, y, vx, owner in zip(xs, ys, vxs, owners.tolist()):
+        pool.spawn(x, y, vx, owner)
+    return {
+        "side": side,
+        "bullets": pool,
+        "x": rng.uniform(0, side, ships),
+        "y": rng.uniform(0, side, ships),
+        "width": np.full(ships, float(SPACESHIP_SIZE[0])),
+        "height": np.full(ships, float(SPACESHIP_SIZE[1])),
+    }
+
+
+# Advance the arena by one tick
+def move(arena: dict, rng: np.random.Generator) -> tuple:
+    """Moves bullets and ships, wrapping bullets around the arena so the
+    count stays constant. A wrapped bullet's previous x moves with it, so its
+    swept box stays one tick long instead of spanning the arena.
+
+    Returns:
+        tuple: the ships' previous x and y
+    """
+    side = arena["side"]
+    pool = arena["bullets"]
+    n = pool.size
+    pool.advance()
+    wrap = np.floor_divide(pool.x[:n], side) * side
+    pool.x[:n] -= wrap
+    pool.prev_x[:n] -= wrap
+    prev_x, prev_y = arena["x"], arena["y"]
+    steps = rng.integers(-1, 2, (2, len(prev_x))) * SHIP_STEP
+    arena["x"] = np.clip(prev_x + steps[0], 0, side)
+    arena["y"] = np.clip(prev_y + steps[1], 0, side)
+    return prev_x, prev_y
+
+
+# Most hits per tick an arena of uniformly spread objects should produce
+def max_hits(ships: int, bullets: int, side: int) -> float:
+    """Expected hits per tick if every bullet and ship moved at full speed: a
+    bullet hits a ship when its corner starts within the ship grown by the
+    bullet's size and the distance both travel in a tick.
+    """
+    width = SPACESHIP_SIZE[0] + BULLET_WIDTH + MAX_BULLET_SPEED + SHIP_STEP
+    height = SPACESHIP_SIZE[1] + BULLET_HEIGHT + SHIP_STEP
+    return ships * bullets * width * height / side**2
+
+
+# Time find_hits on one arena
+def run_scenario(ships: int, bullets: int, ticks: int, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    arena = make_arena(ships, bullets, rng)
+    grid = SpatialHash(arena["side"], arena["side"])
+    brute_force = ships * bullets <= MAX_BRUTE_FORCE_PAIRS
+    grid_times, brute_times, hits = [], [], 0
+    threshold = simulation.BRUTE_FORCE_PAIRS
+    try:
+        for _ in range(ticks):
+            prev_x, prev_y = move(arena, rng)
+            args = (
+                arena["bullets"],
+                arena["x"],
+                arena["y"],
+                arena["width"],
+                arena["height"],
+                prev_x,
+                prev_y,
+                grid,
+            )
+            simulation.BRUTE_FORCE_PAIRS = 0
+            start = time.perf_counter()
+            ship, slot, _ = find_hits(*args)
+            grid_times.append(time.perf_counter() - start)
+            hits += len(slot)
+            if brute_force:
+                simulation.BRUTE_FORCE_PAIRS = ships * bullets
+                start = time.perf_counter()
+                find_hits(*args)
+                brute_times.append(time.perf_counter() - start)
+    finally:
+        simulation.BRUTE_FORCE_PAIRS = threshold
+
+    grid_ms = 1000 * sorted(grid_times)[len(grid_times) // 2]
+    return {
+        "ships": ships,
+        "bullets": bullets,
+        "arena": arena["side"],
+        "grid_ms": grid_ms,
+        "ns_per_object": 1e6 * grid_ms / (ships + bullets),
+        "brute_force_ms": (
+            1000 * sorted(brute_times)[len(brute_times) // 2] if brute_force else None
+        ),
+        "hits_per_tick": hits / ticks,
+        "max_hits_per_tick": max_hits(ships, bullets, arena["side"]),
+        "resorts": grid.sorts,
+    }
+
+
+# Print results as a table
+def report(results: list):
+    print(
+        f"{'ships':>6}{'bullets':>9}{'arena':>7}{'grid ms':>10}{'ns/obj':>8}"
+        f"{'brute ms':>10}{'hits':>7}{'sorts':>7}"
+    )
+    for r in results:
+        brute = f"{r['brute_force_ms']:.3f}" if r["brute_force_ms"] is not None else "-"
+        print(
+            f"{r['ships']:>6}{r['bullets']:>9}{r['arena']:>7}{r['grid_ms']:>10.3f}"
+            f"{r['ns_per_object']:>8.0f}{brute:>10}{r['hits_per_tick']:>7.1f}"
+            f"{r['resorts']:>7}"
+        )
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = [
+        run_scenario(ships, bullets, args.ticks, args.seed)
+        for ships, bullets in SCENARIOS
+    ]
+    report(results)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    failures = [
+        f"{r['ships']} ships: {r['hits_per_tick']:.1f} hits per tick "
+        f"(at most {r['max_hits_per_tick']:.1f} expected)"
+        for r in results
+        if r["hits_per_tick"] > r["max_hits_per_tick"]
+    ]
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
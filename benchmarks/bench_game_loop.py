@@ -0,0 +1,276 @@
+"""Headless benchmark of the game loop at every intensity level.
+
+Runs scripted matches through main.main_game_loop with SDL's dummy video and
+audio drivers, one scenario per entry in INTENSITIES plus the worst case:
+intensity 4 with both players holding fire and spamming lasers. Reports
+frames per second, p50/p95/p99 frame time, the time spent in handle_bullets
+and draw_window, the peak number of live bullets, and the sound effects
+started, coalesced and the most mixer channels busy at once.
+
+    python benchmarks/bench_game_loop.py --output results.json
+    python benchmarks/bench_game_loop.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_game_loop.py --baseline benchmarks/baseline.json
+
+The run fails (exit status 1) when a scenario never has a live bullet, and,
+with --baseline, when a scenario's throughput drops or its p95 frame time
+grows by more than --tolerance percent.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # Assets are loaded relative to the repository root
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import main
+import simulation
+from simulation import (
+    INTENSITIES,
+    INPUT_LEFT,
+    INPUT_RIGHT,
+    INPUT_UP,
+    INPUT_DOWN,
+    INPUT_FIRE,
+    INPUT_FIRE_HELD,
+    World,
+)
+
+DEFAULT_FRAMES = 1200
+DEFAULT_TOLERANCE = 20  # Percent
+HOLD_TICKS = 3  # Ticks the fire key stays down after each press
+
+
+# Scripted player: wanders around and fires every few ticks
+def wandering_player(rng: random.Random, fire_every: int, hold_fire: bool):
+    """Builds a scripted controller returning INPUT_* flags for each tick.
+    Each press keeps the fire key down for HOLD_TICKS ticks, so the laser
+    intensity fires too.
+
+    Args:
+        rng (random.Random): source of the scripted movement
+        fire_every (int): ticks between fire presses
+        hold_fire (bool): keep the fire key held down all the time (laser spam)
+
+    Returns:
+        callable: controller(tick) -> flags
+    """
+    moves = [INPUT_LEFT, INPUT_RIGHT, INPUT_UP, INPUT_DOWN]
+    state = {"move": 0, "until": 0}
+
+    def controller(tick: int) -> int:
+        if tick >= state["until"]:
+            state["move"] = rng.choice(moves) | rng.choice(moves)
+            state["until"] = tick + rng.randint(10, 40)
+        flags = state["move"]
+        if tick % fire_every == 0:
+            flags |= INPUT_FIRE
+        if hold_fire or tick % fire_every < HOLD_TICKS:
+            flags |= INPUT_FIRE_HELD
+        return flags
+
+    return controller
+
+
+# Time every call of a module-level function
+def timed(module, name: str, samples: list):
+    """Replaces module.name with a wrapper that appends each call's duration
+    to samples. Returns the original function so it can be restored.
+    """
+    original = getattr(module, name)
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = original(*args, **kwargs)
+        samples.append(time.perf_counter() - start)
+        return result
+
+    setattr(module, name, wrapper)
+    return original
+
+
+# Percentile of a sorted list
+def percentile(ordered: list, fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# Run one scenario
+def run_scenario(intensity: dict, frames: int, hold_fire: bool, seed: int) -> dict:
+    """Plays scripted frames through main_game_loop, starting a new match
+    whenever one ends, and measures every frame.
+
+    Args:
+        intensity (dict): entry of INTENSITIES to play at
+        frames (int): number of frames to measure
+        hold_fire (bool): both players hold fire every tick
+        seed (int): seed of the scripted players
+
+    Returns:
+        dict: the scenario's measurements
+    """
+    rng = random.Random(seed)
+    players = [
+        wandering_player(rng, 7, hold_fire),
+        wandering_player(rng, 11, hold_fire),
+    ]
+    bullet_samples, draw_samples, frame_samples = [], [], []
+    handle_bullets = timed(simulation, "handle_bullets", bullet_samples)
+    draw_window = timed(main, "draw_window", draw_samples)
+    peak_bullets = peak_voices = 0
+    sounds = main.SOUNDS
+    played, coalesced = sounds.played, sounds.coalesced
+    channels = [pygame.mixer.Channel(i) for i in range(pygame.mixer.get_num_channels())]
+    try:
+        world = None
+        main.draw_window()
+        start = time.perf_counter()
+        for frame in range(frames):
+            if world is None or world.over:
+                world = World(intensity, ["blue", "red"])
+                ship_1, ship_2 = main.Ship(world.ships[0]), main.Ship(world.ships[1])
+            inputs = [players[0](world.tick), players[1](world.tick)]
+            frame_start = time.perf_counter()
+            main.main_game_loop(world, ship_1, ship_2, inputs=inputs)
+            frame_samples.append(time.perf_counter() - frame_start)
+            peak_bullets = max(peak_bullets, len(world.bullets))
+            peak_voices = max(peak_voices, sum(c.get_busy() for c in channels))
+        elapsed = time.perf_counter() - start
+    finally:
+        simulation.handle_bullets = handle_bullets
+        main.draw_window = draw_window
+
+    frame_samples.sort()
+    return {
+        "frames": frames,
+        "ticks_per_s": frames / elapsed,
+        "p50_ms": percentile(frame_samples, 0.50) * 1000,
+        "p95_ms": percentile(frame_samples, 0.95) * 1000,
+        "p99_ms": percentile(frame_samples, 0.99) * 1000,
+        "handle_bullets_ms": 1000 * sum(bullet_samples) / max(len(bullet_samples), 1),
+        "draw_window_ms": 1000 * sum(draw_samples) / max(len(draw_samples), 1),
+        "peak_bullets": peak_bullets,
+        "sounds_played": sounds.played - played,
+        "sounds_coalesced": sounds.coalesced - coalesced,
+        "peak_voices": peak_voices,
+    }
+
+
+# Run every scenario
+def run_all(frames: int, seed: int) -> dict:
+    # Everything loaded up front, so the loader thread stays out of the timings
+    main.new_round()
+    main.LOADER.wait()
+    scenarios = {}
+    for level, intensity in enumerate(INTENSITIES):
+        scenarios[f"intensity_{level}"] = run_scenario(intensity, frames, False, seed)
+    scenarios["intensity_4_laser_spam"] = run_scenario(
+        INTENSITIES[4], frames, True, seed
+    )
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "render_mode": main.RENDER_MODE,
+        "scenarios": scenarios,
+    }
+
+
+# Compare results with a stored baseline
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Lists every scenario that got slower than the baseline allows
+
+    Args:
+        results (dict): output of run_all()
+        baseline (dict): earlier output of run_all()
+        tolerance (float): allowed slowdown in percent
+
+    Returns:
+        list: human readable regression descriptions
+    """
+    regressions = []
+    limit = 1 + tolerance / 100
+    for name, result in results["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        if result["ticks_per_s"] * limit < before["ticks_per_s"]:
+            regressions.append(
+                f"{name}: {result['ticks_per_s']:.0f} ticks/s "
+                f"(baseline {before['ticks_per_s']:.0f})"
+            )
+        if result["p95_ms"] > before["p95_ms"] * limit:
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']:.2f} ms "
+                f"(baseline {before['p95_ms']:.2f} ms)"
+            )
+    return regressions
+
+
+# Print results as a table
+def report(results: dict):
+    print(
+        f"{'scenario':<24}{'ticks/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'bullets ms':>12}{'draw ms':>9}{'peak':>7}{'sounds':>8}{'merged':>8}"
+        f"{'voices':>8}"
+    )
+    for name, r in results["scenarios"].items():
+        print(
+            f"{name:<24}{r['ticks_per_s']:>10.0f}{r['p50_ms']:>9.3f}"
+            f"{r['p95_ms']:>9.3f}{r['p99_ms']:>9.3f}{r['handle_bullets_ms']:>12.3f}"
+            f"{r['draw_window_ms']:>9.3f}{r['peak_bullets']:>7}"
+            f"{r['sounds_played']:>8}{r['sounds_coalesced']:>8}{r['peak_voices']:>8}"
+        )
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="fail if slower than this results file")
+    parser.add_argument("--save-baseline", help="write the results as a new baseline")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="allowed slowdown against the baseline, in percent",
+    )
+    args = parser.parse_args()
+
+    results = run_all(args.frames, args.seed)
+    report(results)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as file:
+                json.dump(results, file, indent=2)
+
+    failures = [
+        f"{name}: no bullets fired"
+        for name, r in results["scenarios"].items()
+        if r["peak_bullets"] == 0
+    ]
+    for failure in failures:
+        print(f"FAIL {failure}")
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+    if failures or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,167 @@
+"""Loopback test of networked play under simulated loss and delay.
+
+Starts a net.Server and two net.Clients on 127.0.0.1 in one event loop, with
+every datagram going through NetConditions (--loss, --delay, --jitter). Two
+scripted players wander and hold fire at the chosen intensity; the default,
+intensity 4, is laser spam, the worst case for snapshot size. While the match
+runs, each client's latest decoded snapshot is compared with the server's
+state at the same tick.
+
+Reports per-client bandwidth in both directions, round-trip time, missed
+snapshots and mismatches, and fails (exit status 1) on any mismatch or when a
+client's download exceeds --budget-kib KiB/s.
+
+    python benchmarks/bench_net.py
+    python benchmarks/bench_net.py --loss 0.2 --delay 0.08 --jitter 0.03
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import net
+from simulation import (
+    INPUT_DOWN,
+    INPUT_FIRE,
+    INPUT_FIRE_HELD,
+    INPUT_LEFT,
+    INPUT_RIGHT,
+    INPUT_UP,
+    TICK_RATE,
+)
+
+DEFAULT_SECONDS = 10.0
+DEFAULT_LEVEL = 4
+DEFAULT_LOSS = 0.1
+DEFAULT_DELAY = 0.05  # Seconds, one way
+DEFAULT_JITTER = 0.02
+DEFAULT_BUDGET_KIB = 8.0  # Per-client download, KiB/s including UDP/IP headers
+
+
+# Run one loopback match
+async def run(level: int, seconds: float, conditions: dict, seed: int) -> dict:
+    """Plays scripted clients against a server for up to seconds.
+
+    Args:
+        level (int): intensity level of the match
+        seconds (float): how long to play, unless the match ends first
+        conditions (dict): NetConditions arguments applied to every endpoint
+        seed (int): seed of the simulated network and the scripted players
+
+    Returns:
+        dict: per-client traffic and the snapshot checks
+    """
+    loop = asyncio.get_running_loop()
+    server_transport, server = await loop.create_datagram_endpoint(
+        lambda: net.Server(level, net.NetConditions(**conditions, seed=seed)),
+        local_addr=("127.0.0.1", 0),
+    )
+    port = server_transport.get_extra_info("sockname")[1]
+    clients = [
+        await net.connect(
+            "127.0.0.1", port, net.NetConditions(**conditions, seed=seed + i + 1)
+        )
+        for i in range(2)
+    ]
+    rng = random.Random(seed)
+    moves = [0, INPUT_LEFT, INPUT_RIGHT, INPUT_UP, INPUT_DOWN]
+    held = [0, 0]
+    match = asyncio.create_task(server.run(linger=0.2))
+    checks = mismatches = 0
+    start = loop.time()
+    try:
+        while not match.done() and loop.time() - start < seconds:
+            for i, (_, client) in enumerate(clients):
+                if rng.random() < 0.05:
+                    held[i] = rng.choice(moves) | rng.choice(moves)
+                client.send_input(held[i] | INPUT_FIRE | INPUT_FIRE_HELD)
+                snapshot = client.latest
+                if snapshot is not None and snapshot.tick in server.history:
+                    checks += 1
+                    mismatches += not snapshot.same(server.history[snapshot.tick])
+            await asyncio.sleep(1 / TICK_RATE)
+    finally:
+        match.cancel()
+        for transport, _ in clients:
+            transport.close()
+        server_transport.close()
+
+    results = {"ticks": server.world.tick, "checks": checks, "mismatches": mismatches}
+    for player in sorted(server.players.values(), key=lambda player: player.index):
+        client = next(c for _, c in clients if c.player == player.index)
+        down = player.counters.summary()
+        up = client.counters.summary()
+        results[f"player_{player.index + 1}"] = {
+            "down_kib_per_s": down["sent_bytes_per_s"] / 1024,
+            "up_kib_per_s": up["sent_bytes_per_s"] / 1024,
+            "snapshots_sent": down["packets_sent"],
+            "snapshots_dropped": down["dropped"],
+            "snapshots_missed": up["missed"],
+            "undecodable": up["undecodable"],
+            "rtt_ms": up["rtt_ms"],
+        }
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS)
+    parser.add_argument("--intensity", type=int, default=DEFAULT_LEVEL)
+    parser.add_argument("--loss", type=float, default=DEFAULT_LOSS)
+    parser.add_argument("--delay", type=float, default=DEFAULT_DELAY)
+    parser.add_argument("--jitter", type=float, default=DEFAULT_JITTER)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--budget-kib",
+        type=float,
+        default=DEFAULT_BUDGET_KIB,
+        help="fail if a client downloads more than this many KiB/s",
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    conditions = {"loss": args.loss, "delay": args.delay, "jitter": args.jitter}
+    results = asyncio.run(run(args.intensity, args.seconds, conditions, args.seed))
+    print(
+        f"{results['ticks']} ticks, {results['checks']} snapshot checks, "
+        f"{results['mismatches']} mismatches"
+    )
+    print(
+        f"{'player':<10}{'down KiB/s':>12}{'up KiB/s':>10}{'RTT ms':>8}"
+        f"{'dropped':>9}{'missed':>8}{'undecodable':>13}"
+    )
+    players = [name for name in results if name.startswith("player_")]
+    for name in players:
+        r = results[name]
+        rtt = f"{r['rtt_ms']:.0f}" if r["rtt_ms"] is not None else "-"
+        print(
+            f"{name:<10}{r['down_kib_per_s']:>12.2f}{r['up_kib_per_s']:>10.2f}"
+            f"{rtt:>8}{r['snapshots_dropped']:>9}{r['snapshots_missed']:>8}"
+            f"{r['undecodable']:>13}"
+        )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    failures = []
+    if results["mismatches"]:
+        failures.append(f"{results['mismatches']} snapshots differ from the server")
+    for name in players:
+        if results[name]["down_kib_per_s"] > args.budget_kib:
+            failures.append(
+                f"{name} downloads {results[name]['down_kib_per_s']:.2f} KiB/s"
+            )
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,148 @@
+"""Frame cost of the particle effects (particles.py).
+
+Runs a ParticleSystem for --frames frames at 60 FPS on a window-sized surface
+with SDL's dummy video driver, emitting like a match would:
+- trails: two ships' engine trails every frame
+- duel: trails, sparks from a hit every 10 frames and an explosion every 2
+  seconds
+- saturated: an explosion at a random spot every frame, far past the
+  particle budget, so the oldest particles are stolen all the time
+Each frame's update() and draw() are timed separately.
+
+    python benchmarks/bench_particles.py
+    python benchmarks/bench_particles.py --frames 3000 --output particles.json
+
+Fails (exit status 1) when a scenario's p99 update + draw time exceeds
+--budget-ms, or when more than MAX_PARTICLES particles are ever alive.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from particles import EXPLOSION, MAX_PARTICLES, SPARKS, TRAIL, ParticleSystem
+
+DEFAULT_FRAMES = 1200
+DEFAULT_BUDGET_MS = 4.0  # A quarter of a 60 FPS frame
+WIDTH, HEIGHT = 1200, 600
+FRAME = 1 / 60
+
+
+# Emit one frame's effects of a scenario
+def emit(particles: ParticleSystem, scenario: str, frame: int, rng):
+    if scenario == "saturated":
+        particles.emit(rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT), **EXPLOSION)
+        return
+    particles.emit([150, 1050], [300, 300], angle=[np.pi, 0.0], **TRAIL)
+    if scenario == "duel":
+        if frame % 10 == 0:
+            particles.emit(1000, rng.uniform(200, 400), **SPARKS)
+        if frame % 120 == 0:
+            particles.emit(1050, 300, **EXPLOSION)
+
+
+# Percentile of a sorted list
+def percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# Run one scenario
+def run_scenario(surface: pygame.Surface, scenario: str, frames: int) -> dict:
+    """Emits, updates and draws particles for frames frames
+
+    Returns:
+        dict: the scenario's measurements
+    """
+    particles = ParticleSystem(seed=0)
+    rng = np.random.default_rng(0)
+    updates, draws, totals = [], [], []
+    peak = 0
+    for frame in range(frames):
+        emit(particles, scenario, frame, rng)
+        peak = max(peak, len(particles))
+        surface.fill((0, 0, 0))
+        start = time.perf_counter()
+        particles.update(FRAME)
+        updated = time.perf_counter()
+        particles.draw(surface)
+        drawn = time.perf_counter()
+        updates.append(updated - start)
+        draws.append(drawn - updated)
+        totals.append(drawn - start)
+
+    updates.sort()
+    draws.sort()
+    totals.sort()
+    return {
+        "frames": frames,
+        "peak_particles": peak,
+        "emitted": particles.emitted,
+        "stolen": particles.stolen,
+        "update_p50_ms": 1000 * percentile(updates, 0.50),
+        "draw_p50_ms": 1000 * percentile(draws, 0.50),
+        "frame_p50_ms": 1000 * percentile(totals, 0.50),
+        "frame_p99_ms": 1000 * percentile(totals, 0.99),
+    }
+
+
+# Print results as a table
+def report(results: dict):
+    print(
+        f"{'scenario':<11}{'peak':>6}{'emitted':>9}{'stolen':>8}{'update p50':>12}"
+        f"{'draw p50':>10}{'p50 ms':>8}{'p99 ms':>8}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:<11}{r['peak_particles']:>6}{r['emitted']:>9}{r['stolen']:>8}"
+            f"{r['update_p50_ms']:>12.3f}{r['draw_p50_ms']:>10.3f}"
+            f"{r['frame_p50_ms']:>8.3f}{r['frame_p99_ms']:>8.3f}"
+        )
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help="fail if a scenario's p99 update + draw time exceeds this",
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    surface = pygame.display.set_mode((WIDTH, HEIGHT))
+    results = {
+        scenario: run_scenario(surface, scenario, args.frames)
+        for scenario in ("trails", "duel", "saturated")
+    }
+    report(results)
+    pygame.quit()
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    failures = []
+    for name, r in results.items():
+        if r["peak_particles"] > MAX_PARTICLES:
+            failures.append(f"{name}: {r['peak_particles']} particles alive")
+        if r["frame_p99_ms"] > args.budget_ms:
+            failures.append(f"{name}: p99 frame {r['frame_p99_ms']:.3f} ms")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,173 @@
+"""Cost of taking and restoring match snapshots (snapshots.py).
+
+Plays a headless match per intensity level between scripted ships
+(chase_controller, or swarm_controller with --ships above 2), pushing a
+snapshot into a RewindBuffer after every tick as MatchScene does. Each push
+is timed, and every --restore-every ticks the latest snapshot is restored
+into a second World, timed, and checked to continue exactly like the match:
+both are stepped with the same inputs and their states compared.
+
+    python benchmarks/bench_snapshot.py
+    python benchmarks/bench_snapshot.py --ships 64 --levels 4
+
+Fails (exit status 1) on any mismatch, or when a scenario's p99 push time
+exceeds --budget-us.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import snapshots
+from simulation import (
+    ARENA_HEIGHT,
+    ARENA_WIDTH,
+    INTENSITIES,
+    World,
+    arena_fleet,
+    chase_controller,
+    swarm_controller,
+)
+
+DEFAULT_TICKS = 3000
+DEFAULT_LEVELS = "0,1,2,3,4"
+DEFAULT_RESTORE_EVERY = 50
+DEFAULT_BUDGET_US = 100.0
+COLORS = ["blue", "red"]
+
+
+# A new match and its scripted players
+def new_match(intensity: dict, ships: int, seed: int) -> tuple:
+    """Returns a World and a function giving every ship's inputs for a tick"""
+    if ships == 2:
+        world = World(intensity, COLORS)
+        controllers = [chase_controller(random.Random(f"{seed}/{i}")) for i in range(2)]
+        return world, lambda world: [c(world, i) for i, c in enumerate(controllers)]
+    fleet = arena_fleet(intensity, ships, COLORS)
+    world = World(intensity, fleet.colors, fleet, (ARENA_WIDTH, ARENA_HEIGHT))
+    return world, swarm_controller(np.random.default_rng(seed))
+
+
+# Percentile of a sorted list
+def percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# Run one scenario
+def run_scenario(intensity: dict, ships: int, ticks: int, restore_every: int) -> dict:
+    """Plays ticks ticks, starting a new match whenever one ends, snapshotting
+    every tick and checking a restore every restore_every ticks.
+
+    Returns:
+        dict: the scenario's measurements
+    """
+    pushes, restores = [], []
+    mismatches = peak_bullets = 0
+    world = None
+    for tick in range(ticks):
+        if world is None or world.over:
+            world, bots = new_match(intensity, ships, tick)
+            copy, _ = new_match(intensity, ships, tick)
+            rewind = snapshots.RewindBuffer(world)
+        world.step(bots(world))
+        start = time.perf_counter()
+        rewind.push()
+        pushes.append(time.perf_counter() - start)
+        peak_bullets = max(peak_bullets, len(world.bullets))
+
+        if tick % restore_every == 0 and not world.over:
+            start = time.perf_counter()
+            rewind.rewind(0, copy)
+            restores.append(time.perf_counter() - start)
+            inputs = bots(world)
+            world.step(inputs)
+            copy.step(inputs)
+            rewind.push()
+            mismatches += world.get_state() != copy.get_state()
+
+    pushes.sort()
+    restores.sort()
+    return {
+        "ships": ships,
+        "ticks": ticks,
+        "snapshot_bytes": rewind.records.itemsize,
+        "buffer_kib": rewind.records.nbytes / 1024,
+        "peak_bullets": peak_bullets,
+        "push_p50_us": 1e6 * percentile(pushes, 0.50),
+        "push_p99_us": 1e6 * percentile(pushes, 0.99),
+        "restore_p50_us": 1e6 * percentile(restores, 0.50),
+        "restore_p99_us": 1e6 * percentile(restores, 0.99),
+        "restores": len(restores),
+        "mismatches": mismatches,
+    }
+
+
+# Print results as a table
+def report(results: dict):
+    print(
+        f"{'scenario':<14}{'ships':>6}{'bytes':>8}{'buffer KiB':>12}{'peak':>6}"
+        f"{'push p50':>10}{'push p99':>10}{'restore p50':>13}{'restore p99':>13}"
+        f"{'mismatches':>12}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:<14}{r['ships']:>6}{r['snapshot_bytes']:>8}"
+            f"{r['buffer_kib']:>12.1f}{r['peak_bullets']:>6}"
+            f"{r['push_p50_us']:>10.1f}{r['push_p99_us']:>10.1f}"
+            f"{r['restore_p50_us']:>13.1f}{r['restore_p99_us']:>13.1f}"
+            f"{r['mismatches']:>12}"
+        )
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ships", type=int, default=2)
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS)
+    parser.add_argument(
+        "--levels",
+        default=DEFAULT_LEVELS,
+        help="comma-separated intensity levels to benchmark",
+    )
+    parser.add_argument("--restore-every", type=int, default=DEFAULT_RESTORE_EVERY)
+    parser.add_argument(
+        "--budget-us",
+        type=float,
+        default=DEFAULT_BUDGET_US,
+        help="fail if a scenario's p99 snapshot time exceeds this",
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {
+        f"intensity_{level}": run_scenario(
+            INTENSITIES[int(level)], args.ships, args.ticks, args.restore_every
+        )
+        for level in args.levels.split(",")
+    }
+    report(results)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    failures = []
+    for name, r in results.items():
+        if r["mismatches"]:
+            failures.append(f"{name}: {r['mismatches']} restores diverged")
+        if r["push_p99_us"] > args.budget_us:
+            failures.append(f"{name}: p99 snapshot {r['push_p99_us']:.1f} us")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,131 @@
+"""Time to first frame: how long the game takes to put the intro on screen.
+
+Starts the game in a fresh Python process --runs times, with SDL's dummy
+video and audio drivers unless SDL_VIDEODRIVER / SDL_AUDIODRIVER say
+otherwise. Each run goes through main()'s startup path up to the first frame
+of the intro, then lets the background loader finish. Reports per run:
+- first_frame_ms: process launch to the first frame, interpreter start-up
+  and imports included
+- import_ms: importing main.py
+- ready_ms: first frame to every sound, the music and every image loaded
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 --output startup.json
+
+Fails (exit status 1) when the median time to first frame exceeds --budget-ms.
+"""
+
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_RUNS = 5
+DEFAULT_BUDGET_MS = 1000.0
+
+
+class FirstFrame(Exception):
+    """Raised by the scene manager's started hook to stop after one frame"""
+
+
+# Start up like main() and time it; runs in the child process
+def child():
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)  # Assets are loaded relative to the repository root
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+
+    import main
+
+    imported = time.perf_counter()
+
+    def started():
+        raise FirstFrame
+
+    pygame.display.set_caption(main.TITLE)
+    main.new_round()
+    try:
+        main.SCENES.run(main.IntroScene(), started=started)
+    except FirstFrame:
+        pass
+    first_frame = time.perf_counter()
+    wall = time.time()
+    main.LOADER.wait()
+    ready = time.perf_counter()
+    print(
+        json.dumps(
+            {
+                "wall": wall,
+                "import_ms": 1000 * (imported - STARTED),
+                "ready_ms": 1000 * (ready - first_frame),
+            }
+        )
+    )
+    main.LOADER.close()
+    pygame.quit()
+
+
+# Launch one child and collect its timings
+def run_once() -> dict:
+    launched = time.time()
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", os.path.abspath(__file__), "--child"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["first_frame_ms"] = 1000 * (result.pop("wall") - launched)
+    return result
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help="fail if the median time to first frame exceeds this",
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    runs = [run_once() for _ in range(args.runs)]
+    print(f"{'run':<5}{'first frame ms':>16}{'import ms':>11}{'ready ms':>10}")
+    for i, r in enumerate(runs):
+        print(
+            f"{i:<5}{r['first_frame_ms']:>16.1f}{r['import_ms']:>11.1f}"
+            f"{r['ready_ms']:>10.1f}"
+        )
+    results = {
+        name: statistics.median(r[name] for r in runs)
+        for name in ("first_frame_ms", "import_ms", "ready_ms")
+    }
+    print(
+        f"{'median':<5}{results['first_frame_ms']:>16.1f}"
+        f"{results['import_ms']:>11.1f}{results['ready_ms']:>10.1f}"
+    )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"median": results, "runs": runs}, file, indent=2)
+    if results["first_frame_ms"] > args.budget_ms:
+        print(f"OVER BUDGET: median first frame {results['first_frame_ms']:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,165 @@
+"""Cost of logging match telemetry (telemetry.py), and of reading it back.
+
+Plays --matches headless matches between scripted ships (chase_controller),
+cycling through the intensity levels, into a fresh telemetry log. Every
+MatchTelemetry.tick() call is timed: that is all the game loop pays, the
+file is written by the writer thread. Then the log is opened with
+TelemetryLog, every column of both tables is loaded and the totals are
+checked against what was played.
+
+    python benchmarks/bench_telemetry.py
+    python benchmarks/bench_telemetry.py --matches 2000 --output telemetry.json
+
+Fails (exit status 1) when the log does not match the matches played, or
+when the p99 time of a tick() call exceeds --budget-us.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from simulation import INTENSITIES, World, chase_controller
+from telemetry import SCHEMAS, TABLES, TelemetryLog, TelemetryWriter
+
+DEFAULT_MATCHES = 200
+DEFAULT_BUDGET_US = 50.0
+MAX_TICKS = 36000  # Ticks before a match is abandoned
+COLORS = ["blue", "red"]
+
+
+# Percentile of a sorted list
+def percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# Play matches into a log
+def write_log(path: str, matches: int) -> dict:
+    """Plays matches, logging them to path
+
+    Returns:
+        dict: the time of every tick() call, and the ticks and shots played
+    """
+    writer = TelemetryWriter(path)
+    calls = []
+    ticks = shots = 0
+    for match in range(matches):
+        world = World(INTENSITIES[match % len(INTENSITIES)], COLORS)
+        controllers = [
+            chase_controller(random.Random(f"{match}/{i}")) for i in range(2)
+        ]
+        telemetry = writer.match(world, demo=True)
+        while not world.over and world.tick < MAX_TICKS:
+            events = world.step([c(world, i) for i, c in enumerate(controllers)])
+            start = time.perf_counter()
+            telemetry.tick(events)
+            calls.append(time.perf_counter() - start)
+        telemetry.close()
+        ticks += world.tick
+        shots += sum(telemetry.shots)
+    start = time.perf_counter()
+    writer.close()
+    return {
+        "calls": calls,
+        "ticks": ticks,
+        "shots": shots,
+        "close_ms": 1000 * (time.perf_counter() - start),
+    }
+
+
+# Load a whole log back and check it
+def read_log(path: str, matches: int, ticks: int, shots: int) -> dict:
+    start = time.perf_counter()
+    log = TelemetryLog(path)
+    tables = {table: log.columns(table) for table in TABLES}
+    elapsed = time.perf_counter() - start
+    chunks = len(log.chunks)
+    log.close()
+    loaded = sum(
+        len(tables[table]["match"]) * schema.itemsize
+        for table, schema in zip(TABLES, SCHEMAS)
+    )
+    errors = []
+    if len(tables["matches"]["match"]) != matches:
+        errors.append(f"{len(tables['matches']['match'])} match rows")
+    if len(tables["ticks"]["match"]) != 2 * ticks:
+        errors.append(f"{len(tables['ticks']['match'])} tick rows")
+    if int(tables["ticks"]["shots"].sum()) != shots:
+        errors.append("tick shots do not add up")
+    summary = tables["matches"]
+    if int(summary["shots_1"].sum() + summary["shots_2"].sum()) != shots:
+        errors.append("match shots do not add up")
+    if not np.array_equal(summary["match"], np.arange(matches)):
+        errors.append("match numbers out of order")
+    return {
+        "chunks": chunks,
+        "read_ms": 1000 * elapsed,
+        "read_mib_s": loaded / 2**20 / max(elapsed, 1e-9),
+        "errors": errors,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, default=DEFAULT_MATCHES)
+    parser.add_argument(
+        "--budget-us",
+        type=float,
+        default=DEFAULT_BUDGET_US,
+        help="fail if the p99 time of a tick() call exceeds this",
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "telemetry.swt")
+        written = write_log(path, args.matches)
+        size = os.path.getsize(path)
+        read = read_log(path, args.matches, written["ticks"], written["shots"])
+    calls = sorted(written.pop("calls"))
+    results = {
+        "matches": args.matches,
+        "ticks": written["ticks"],
+        "file_kib": size / 1024,
+        "bytes_per_tick": size / max(written["ticks"], 1),
+        "tick_p50_us": 1e6 * percentile(calls, 0.50),
+        "tick_p99_us": 1e6 * percentile(calls, 0.99),
+        "close_ms": written["close_ms"],
+        **read,
+    }
+    print(
+        f"{results['matches']} matches, {results['ticks']} ticks, "
+        f"{results['file_kib']:.1f} KiB ({results['bytes_per_tick']:.1f} bytes/tick) "
+        f"in {results['chunks']} chunks"
+    )
+    print(
+        f"tick() p50 {results['tick_p50_us']:.1f} us, "
+        f"p99 {results['tick_p99_us']:.1f} us; close {results['close_ms']:.1f} ms"
+    )
+    print(
+        f"read every column in {results['read_ms']:.1f} ms "
+        f"({results['read_mib_s']:.0f} MiB/s)"
+    )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    failures = list(results["errors"])
+    if results["tick_p99_us"] > args.budget_us:
+        failures.append(f"p99 tick() {results['tick_p99_us']:.1f} us")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,212 @@
+"""Soak test of kiosk mode: hundreds of unattended rounds in constant memory.
+
+Runs main.py's scenes in kiosk mode headless on a virtual clock: the intro
+times out into a demo match between scripted ships, the results screen times
+out back to the intro, and so on. Static screens skip straight to their next
+scheduled change and matches run several ticks per frame, so a round takes a
+fraction of a second instead of a minute. Demo matches are limited to the
+--levels intensities; the low ones end quickly, which is what a soak test of
+round turnover needs.
+
+After --warmup rounds (caches filled, every background seen) the harness
+samples tracemalloc's traced memory and the process RSS every --sample-every
+rounds, and fails (exit status 1) if either grew by more than its limit.
+The default run takes a few minutes; raise --rounds for a longer soak.
+
+    python benchmarks/soak.py
+    python benchmarks/soak.py --rounds 5000 --output soak.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # Assets are loaded relative to the repository root
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import main
+
+DEFAULT_ROUNDS = 300
+DEFAULT_WARMUP = 50
+DEFAULT_SAMPLE_EVERY = 25
+DEFAULT_LEVELS = "0,1,2"
+DEFAULT_MAX_TRACED_KB = 512
+DEFAULT_MAX_RSS_KB = 16384
+TICKS_PER_FRAME = 30  # Simulated ticks per drawn frame during matches
+
+
+# Milliseconds of the virtual clock, read by the scenes through get_ticks()
+class VirtualClock:
+    def __init__(self):
+        self.now = 0
+
+    def get_ticks(self) -> int:
+        return self.now
+
+
+# Resident set size of this process
+def rss_kb() -> int:
+    """Reads the current RSS from /proc, or the peak RSS where /proc is
+    missing (the peak still shows steady growth).
+
+    Returns:
+        int: resident memory in KiB
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+
+# Play rounds until enough have finished
+def soak(rounds: int, warmup: int, sample_every: int, levels: list) -> dict:
+    """Runs kiosk mode for warmup + rounds rounds and samples memory.
+
+    Args:
+        rounds (int): rounds to play after the warmup
+        warmup (int): rounds played before the first sample
+        sample_every (int): rounds between samples
+        levels (list): intensity levels demo matches are played at
+
+    Returns:
+        dict: the samples and summary figures
+    """
+    clock = VirtualClock()
+    get_ticks = pygame.time.get_ticks
+    pygame.time.get_ticks = clock.get_ticks
+    max_steps = main.TIMESTEP.max_steps
+    main.TIMESTEP.max_steps = TICKS_PER_FRAME
+    main.KIOSK = True
+    main.DEMO_INTENSITIES = [main.INTENSITIES[level] for level in levels]
+    manager = main.SCENES
+    frame_ms = 1000 * TICKS_PER_FRAME // main.TICK_RATE
+    samples = []
+    finished = 0
+    ticks = 0
+    start = time.perf_counter()
+    try:
+        main.new_round()
+        main.LOADER.wait()
+        manager.running = True
+        manager.switch(main.IntroScene())
+        while manager.running and finished < warmup + rounds:
+            # Tracing starts one interval early so the first sample already
+            # covers a full interval of allocations
+            if not tracemalloc.is_tracing() and finished >= warmup - sample_every:
+                tracemalloc.start()
+            scene = manager.scene
+            if scene.animating or scene.needs_draw:
+                clock.now += frame_ms
+                elapsed = frame_ms / 1000
+            else:
+                # Nothing happens until the scene's next scheduled change
+                wake_at = scene.wake_at()
+                if wake_at is None:
+                    raise RuntimeError(f"{type(scene).__name__} waits for input")
+                elapsed = max(0, wake_at - clock.now) / 1000
+                clock.now = max(clock.now, wake_at)
+            manager.step(pygame.event.get(), elapsed)
+
+            if manager.scene is not scene and isinstance(
+                manager.scene, main.ResultsScene
+            ):
+                finished += 1
+                ticks += manager.scene.world.tick
+                if finished >= warmup and (finished - warmup) % sample_every == 0:
+                    traced, peak = tracemalloc.get_traced_memory()
+                    samples.append(
+                        {
+                            "round": finished,
+                            "traced_kb": traced // 1024,
+                            "traced_peak_kb": peak // 1024,
+                            "rss_kb": rss_kb(),
+                        }
+                    )
+    finally:
+        tracemalloc.stop()
+        pygame.time.get_ticks = get_ticks
+        main.TIMESTEP.max_steps = max_steps
+
+    elapsed = time.perf_counter() - start
+    first, last = samples[0], samples[-1]
+    return {
+        "rounds": finished,
+        "ticks": ticks,
+        "seconds": elapsed,
+        "rounds_per_s": finished / elapsed,
+        "traced_growth_kb": last["traced_kb"] - first["traced_kb"],
+        "rss_growth_kb": last["rss_kb"] - first["rss_kb"],
+        "samples": samples,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--sample-every", type=int, default=DEFAULT_SAMPLE_EVERY)
+    parser.add_argument(
+        "--levels",
+        default=DEFAULT_LEVELS,
+        help="comma-separated intensity levels of the demo matches",
+    )
+    parser.add_argument(
+        "--max-traced-kb",
+        type=int,
+        default=DEFAULT_MAX_TRACED_KB,
+        help="allowed growth of Python allocations after the warmup",
+    )
+    parser.add_argument(
+        "--max-rss-kb",
+        type=int,
+        default=DEFAULT_MAX_RSS_KB,
+        help="allowed growth of the resident set after the warmup",
+    )
+    parser.add_argument("--output", help="write the samples as JSON to this file")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(",")]
+    results = soak(args.rounds, args.warmup, args.sample_every, levels)
+    print(f"{'round':>8}{'traced KiB':>12}{'peak KiB':>10}{'RSS KiB':>10}")
+    for sample in results["samples"]:
+        print(
+            f"{sample['round']:>8}{sample['traced_kb']:>12}"
+            f"{sample['traced_peak_kb']:>10}{sample['rss_kb']:>10}"
+        )
+    print(
+        f"{results['rounds']} rounds, {results['ticks']} ticks in "
+        f"{results['seconds']:.1f} s ({results['rounds_per_s']:.1f} rounds/s)"
+    )
+    print(
+        f"growth after warmup: traced {results['traced_growth_kb']} KiB, "
+        f"RSS {results['rss_growth_kb']} KiB"
+    )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    failures = []
+    if results["traced_growth_kb"] > args.max_traced_kb:
+        failures.append(f"traced memory grew {results['traced_growth_kb']} KiB")
+    if results["rss_growth_kb"] > args.max_rss_kb:
+        failures.append(f"RSS grew {results['rss_growth_kb']} KiB")
+    for failure in failures:
+        print(f"LEAK {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
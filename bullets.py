@@ -0,0 +1,263 @@
+"""Fixed-capacity bullet pool for the simulation.
+
+Bullets are stored as a struct of NumPy arrays (x, y, vx, owner, alive) so
+moving, culling and hit-testing every live bullet is a handful of vectorized
+operations instead of a Python loop over pygame.Rect objects. Free slots are
+kept on a stack, so firing and removing bullets never shifts other bullets.
+"""
+
+import numpy as np
+
+DEFAULT_CAPACITY = 4096
+
+
+# Vectorized version of simulation.to_pixel
+def to_pixels(values: np.ndarray) -> np.ndarray:
+    """Rounds half away from zero, matching pygame.Rect attribute assignment.
+
+    Args:
+        values (np.ndarray): coordinates to round
+
+    Returns:
+        np.ndarray: the rounded coordinates (still float64)
+    """
+    return np.trunc(values + np.copysign(0.5, values))
+
+
+class BulletPool:
+    """Every live bullet of a match, stored column by column.
+
+    Only the slots below the high-water mark `size` are ever touched by the
+    vectorized passes, so the cost of a tick follows the number of live
+    bullets rather than the capacity.
+    """
+
+    def __init__(self, width: int, height: int, capacity: int = DEFAULT_CAPACITY):
+        self.width = width  # Bullet hitbox width
+        self.height = height  # Bullet hitbox height
+        self.capacity = capacity
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.prev_x = np.zeros(capacity, dtype=np.float64)  # x before the last advance
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.vx = np.zeros(capacity, dtype=np.float64)
+        self.owner = np.zeros(capacity, dtype=np.int16)
+        self.alive = np.zeros(capacity, dtype=bool)
+        # Free slots, lowest index on top so live bullets stay packed
+        self.free = np.arange(capacity - 1, -1, -1, dtype=np.int32)
+        self.free_top = capacity
+        self.size = 0  # One past the highest slot that may be alive
+        self.counts = np.zeros(2, dtype=np.int32)  # Live bullets per owner
+
+    def __len__(self):
+        return self.capacity - self.free_top
+
+    # Live bullets of every owner below owners
+    def owner_counts(self, owners: int) -> np.ndarray:
+        self.track(owners)
+        return self.counts[:owners]
+
+    # Make room in counts for owner indices below owners
+    def track(self, owners: int):
+        if owners > len(self.counts):
+            grown = np.zeros(max(owners, 2 * len(self.counts)), dtype=np.int32)
+            grown[: len(self.counts)] = self.counts
+            self.counts = grown
+
+    # Add a bullet to the pool
+    def spawn(self, x: int, y: int, vx: float, owner: int) -> bool:
+        """Takes a free slot for a new bullet.
+
+        Args:
+            x (int): left edge of the bullet
+            y (int): top edge of the bullet
+            vx (float): horizontal distance travelled per tick
+            owner (int): index of the ship that fired it
+
+        Returns:
+            bool: False if the pool is full and the bullet was dropped
+        """
+        if self.free_top == 0:
+            return False
+        self.free_top -= 1
+        slot = self.free[self.free_top]
+        self.x[slot] = x
+        self.prev_x[slot] = x
+        self.y[slot] = y
+        self.vx[slot] = vx
+        self.owner[slot] = owner
+        self.alive[slot] = True
+        self.track(owner + 1)
+        self.counts[owner] += 1
+        if slot >= self.size:
+            self.size = slot + 1
+        return True
+
+    # Add several bullets at once
+    def spawn_many(self, x, y, vx, owner: np.ndarray) -> int:
+        """Vectorized spawn(): takes the same slots, in the same order, as
+        spawning the bullets one by one.
+
+        Args:
+            x, y, vx (np.ndarray): position and velocity of each new bullet
+            owner (np.ndarray): index of the ship that fired each bullet
+
+        Returns:
+            int: how many bullets were spawned, from the first; the rest were
+                dropped because the pool is full
+        """
+        count = min(len(owner), self.free_top)
+        if not count:
+            return 0
+        slots = self.free[self.free_top - count : self.free_top][::-1]
+        self.free_top -= count
+        owner = owner[:count]
+        self.x[slots] = x[:count]
+        self.prev_x[slots] = x[:count]
+        self.y[slots] = y[:count]
+        self.vx[slots] = vx[:count]
+        self.owner[slots] = owner
+        self.alive[slots] = True
+        self.track(int(owner.max()) + 1)
+        np.add.at(self.counts, owner, 1)
+        self.size = max(self.size, int(slots.max()) + 1)
+        return count
+
+    # Put back bullets saved from this pool
+    def restore(self, slots, x, prev_x, y, vx, owner):
+        """Replaces every bullet with the given ones, in the same slots they
+        were saved from. Free slots always hand out the lowest first, so the
+        pool ends up exactly as it was when the bullets were saved.
+
+        Args:
+            slots (np.ndarray): slot of each bullet
+            x, prev_x, y, vx (np.ndarray): position, previous x and velocity of each bullet
+            owner (np.ndarray): index of the ship that fired each bullet
+        """
+        self.alive[: self.size] = False
+        self.x[slots] = x
+        self.prev_x[slots] = prev_x
+        self.y[slots] = y
+        self.vx[slots] = vx
+        self.owner[slots] = owner
+        self.alive[slots] = True
+        size = int(slots.max()) + 1 if len(slots) else 0
+        # Slots above both high-water marks were free all along and already
+        # sit at the bottom of the stack in order; only the rest is rebuilt
+        touched = max(self.size, size)
+        free = np.flatnonzero(~self.alive[:touched])[::-1]
+        bottom = self.capacity - touched
+        self.free[bottom : bottom + len(free)] = free
+        self.free_top = bottom + len(free)
+        self.size = size
+        if len(slots):
+            self.track(int(owner.max()) + 1)
+        self.counts[:] = np.bincount(owner, minlength=len(self.counts))
+
+    # Remove the bullets in the given slots
+    def kill(self, slots: np.ndarray):
+        """Frees the given slots. Every slot must currently be alive.
+
+        Args:
+            slots (np.ndarray): indices of the bullets to remove
+        """
+        if len(slots) == 0:
+            return
+        self.alive[slots] = False
+        np.subtract.at(self.counts, self.owner[slots], 1)
+        # Keep the free stack handing out the lowest slots first. Free slots
+        # above the high-water mark already sit below the holes in order, so
+        # only the holes and the freed slots are merged on top of them
+        holes = self.size - len(self)
+        start = self.free_top - holes
+        end = self.free_top + len(slots)
+        merged = np.concatenate((self.free[start : self.free_top], slots))
+        self.free[start:end] = np.sort(merged)[::-1]
+        self.free_top = end
+        live = np.flatnonzero(self.alive[: self.size])
+        self.size = int(live[-1]) + 1 if len(live) else 0
+
+    # Move every live bullet
+    def advance(self):
+        """Moves every live bullet by its velocity, rounding like pygame.Rect"""
+        n = self.size
+        self.prev_x[:n] = self.x[:n]
+        self.x[:n] = to_pixels(self.x[:n] + self.vx[:n])
+
+    # Swept test of bullet and rectangle pairs
+    def sweep(self, slots, x, y, width, height, prev_x, prev_y) -> tuple:
+        """Tests the segment each bullet travelled during the last advance
+        against a rectangle that moved from (prev_x, prev_y) to (x, y) in the
+        same tick. In the rectangle's frame the bullet's corner moves along a
+        straight line, which is clipped against the rectangle grown by the
+        bullet's size (slab test), so hits do not depend on the bullet
+        outrunning its own width between ticks. The rectangle arguments are
+        scalars or arrays matching slots.
+
+        Args:
+            slots (np.ndarray): bullets to test
+            x, y, width, height: the rectangles at the end of the tick
+            prev_x, prev_y: the rectangles' positions at the start of the tick
+
+        Returns:
+            tuple: the fraction of the tick at which each bullet entered its
+                rectangle, and whether it did at all
+        """
+        # Bullet corner relative to the rectangle, at the start and the end
+        start_x = self.prev_x[slots] - prev_x
+        end_x = self.x[slots] - x
+        rel_y = self.y[slots]
+        enter, leave = np.zeros(len(slots)), np.ones(len(slots))
+        for start, end, low, high in (
+            (start_x, end_x, -self.width, width),
+            (rel_y - prev_y, rel_y - y, -self.height, height),
+        ):
+            delta = end - start
+            moving = delta != 0
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t_low = (low - start) / delta
+                t_high = (high - start) / delta
+            # A still axis is inside for the whole tick or never (open interval)
+            inside = (low < start) & (start < high)
+            first = np.where(moving, np.minimum(t_low, t_high), -np.inf)
+            last = np.where(moving, np.maximum(t_low, t_high), np.inf)
+            first[~moving & ~inside] = np.inf
+            enter = np.maximum(enter, first)
+            leave = np.minimum(leave, last)
+        return enter, enter < leave
+
+    # Slots of bullets that left the arena horizontally
+    def off_screen(self, arena_width: int) -> np.ndarray:
+        n = self.size
+        bx = self.x[:n]
+        return np.flatnonzero(
+            self.alive[:n] & ((bx < 0) | (bx + self.width > arena_width))
+        )
+
+    # Live bullets as plain Python lists for drawing
+    def live(self, alpha: float = 1.0) -> tuple:
+        """Collects the live bullets, ready to be iterated over in Python.
+
+        Args:
+            alpha (float, optional): how far between the previous and the
+                current position to place each bullet. Defaults to 1.0.
+
+        Returns:
+            tuple: x, y and owner lists of every live bullet
+        """
+        slots = np.flatnonzero(self.alive[: self.size])
+        x = self.x[slots]
+        if alpha < 1.0:
+            x = to_pixels(self.prev_x[slots] + (x - self.prev_x[slots]) * alpha)
+        return (
+            x.astype(np.int32).tolist(),
+            self.y[slots].astype(np.int32).tolist(),
+            self.owner[slots].tolist(),
+        )
+
+    # Remove every bullet
+    def clear(self):
+        self.alive[:] = False
+        self.free[:] = np.arange(self.capacity - 1, -1, -1, dtype=np.int32)
+        self.free_top = self.capacity
+        self.size = 0
+        self.counts[:] = 0
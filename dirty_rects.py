@@ -0,0 +1,66 @@
+"""Dirty-rectangle bookkeeping for the gameplay renderer.
+
+Instead of re-blitting the whole background and presenting the whole screen
+every frame, the renderer restores the background only where something was
+drawn last frame, draws this frame's objects, and presents just the union of
+the old and new areas.
+"""
+
+import pygame
+
+# Past this many rectangles a single full-screen update is cheaper
+MAX_DIRTY_RECTS = 400
+
+
+class DirtyRectTracker:
+    """Remembers what was drawn last frame so it can be erased and presented.
+
+    Call restore() before drawing a frame, mark() for every object drawn and
+    present() once the frame is complete. invalidate() forces the next frame
+    to be redrawn in full (after menus, resizes or anything else that drew
+    over the screen).
+    """
+
+    def __init__(self, max_rects: int = MAX_DIRTY_RECTS):
+        self.max_rects = max_rects
+        self.previous = []  # Areas drawn during the last frame
+        self.current = []  # Areas drawn during this frame
+        self.full = True  # Next frame must be redrawn in full
+
+    # Force a full redraw on the next frame
+    def invalidate(self):
+        self.full = True
+        self.previous = []
+        self.current = []
+
+    # Erase last frame's objects
+    def restore(self, surface: pygame.Surface, background: pygame.Surface):
+        """Blits the background over everything drawn last frame, or over the
+        whole surface when a full redraw is pending.
+
+        Args:
+            surface (pygame.Surface): the display surface
+            background (pygame.Surface): background the same size as surface
+        """
+        self.current = []
+        if self.full or len(self.previous) > self.max_rects:
+            surface.blit(background, (0, 0))
+            self.full = True
+        else:
+            for rect in self.previous:
+                surface.blit(background, rect, rect)
+
+    # Record an area drawn this frame
+    def mark(self, rect):
+        self.current.append(pygame.Rect(rect))
+
+    # Present the frame
+    def present(self):
+        """Updates only the areas that changed since the last frame"""
+        if self.full or len(self.current) > self.max_rects:
+            pygame.display.update()
+        else:
+            pygame.display.update(self.previous + self.current)
+        self.previous = self.current
+        self.current = []
+        self.full = False
@@ -0,0 +1,100 @@
+"""Batched game-event bus filled during a simulation tick.
+
+World.step() records what happened during a tick (fires, lasers, hits,
+deaths, game over) into preallocated columns instead of building tuples or
+posting pygame events, which would wait in the SDL queue behind input and
+could overflow it during laser spam. Consumers read the whole batch once the
+tick is done: the simulation applies every hit of the tick in one go, the
+front end plays the sounds, and effects can use each event's position.
+"""
+
+import numpy as np
+
+DEFAULT_CAPACITY = 1024  # Events per tick before the columns grow
+
+
+class EventBus:
+    """The events of one tick, one row per event: kind (EVENT_*), ship index
+    and the position it happened at.
+
+    Iterating yields (kind, ship) tuples, oldest first. The bus is reused:
+    clear() empties it for the next tick without freeing the columns.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.ship = np.zeros(capacity, dtype=np.int16)
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.size = 0  # Rows in use
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        size = self.size
+        return zip(self.kind[:size].tolist(), self.ship[:size].tolist())
+
+    # Forget the previous tick's events
+    def clear(self):
+        self.size = 0
+
+    # Make room for more rows
+    def reserve(self, count: int):
+        capacity = len(self.kind)
+        if self.size + count <= capacity:
+            return
+        capacity = max(2 * capacity, self.size + count)
+        for name in ("kind", "ship", "x", "y"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: self.size] = column[: self.size]
+            setattr(self, name, grown)
+
+    # Record one event
+    def emit(self, kind: int, ship: int, x: float = 0.0, y: float = 0.0):
+        self.reserve(1)
+        row = self.size
+        self.kind[row] = kind
+        self.ship[row] = ship
+        self.x[row] = x
+        self.y[row] = y
+        self.size = row + 1
+
+    # Record one event per position
+    def emit_many(self, kind: int, ship, xs: np.ndarray, ys: np.ndarray):
+        """Appends len(xs) events in one slice assignment per column.
+
+        Args:
+            kind (int): EVENT_* kind of every event
+            ship: ship index of every event, or an array with one per event
+            xs (np.ndarray): x coordinate of each event
+            ys (np.ndarray): y coordinate of each event
+        """
+        count = len(xs)
+        if not count:
+            return
+        self.reserve(count)
+        rows = slice(self.size, self.size + count)
+        self.kind[rows] = kind
+        self.ship[rows] = ship
+        self.x[rows] = xs
+        self.y[rows] = ys
+        self.size += count
+
+    # Rows of one kind
+    def rows(self, kind: int) -> np.ndarray:
+        return np.flatnonzero(self.kind[: self.size] == kind)
+
+    # How many events of a kind each ship had
+    def count(self, kind: int, ships: int) -> np.ndarray:
+        """Counts the events of a kind per ship index.
+
+        Args:
+            kind (int): EVENT_* kind to count
+            ships (int): number of ships in the match
+
+        Returns:
+            np.ndarray: event count per ship index
+        """
+        return np.bincount(self.ship[self.rows(kind)], minlength=ships)
@@ -0,0 +1,113 @@
+"""Background loading of assets the first frame does not need.
+
+A Loader runs queued jobs one at a time, in order, on a single thread, and
+hands out a concurrent.futures.Future for each. The thread only starts when
+start() is called, normally once the first frame is on screen, so the work
+never competes with getting the window up. Code that needs a result calls
+result(), which starts the thread if nobody has yet. A job still waiting in
+the queue can be cancelled and done on the spot instead, which is never
+slower than waiting behind the rest of the queue.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future, wait
+
+
+# Run a job right away
+def run_now(function, *args) -> Future:
+    """Calls function(*args) and returns its outcome as a finished Future, for
+    code that can work with or without a Loader
+    """
+    future = Future()
+    future.set_running_or_notify_cancel()
+    try:
+        future.set_result(function(*args))
+    except Exception as error:
+        future.set_exception(error)
+    return future
+
+
+class Loader:
+    """Runs jobs in order on one background thread, started by start()."""
+
+    def __init__(self):
+        self.jobs = queue.SimpleQueue()  # (future, function, args), None to stop
+        self.futures = []  # Jobs submitted and not known to be done, in order
+        self.thread = threading.Thread(target=self.run, name="loader", daemon=True)
+        self.started = False
+
+    # Queue a job
+    def submit(self, function, *args) -> Future:
+        """Queues function(*args) to run on the loader thread
+
+        Returns:
+            Future: the job's outcome
+        """
+        future = Future()
+        self.pending()  # Forget the jobs already done
+        self.futures.append(future)
+        self.jobs.put((future, function, args))
+        return future
+
+    # Start working through the queue
+    def start(self):
+        if not self.started:
+            self.started = True
+            self.thread.start()
+
+    # Wait for one job
+    def result(self, future: Future):
+        """Returns the outcome of a job, starting the loader if needed and
+        blocking until the job has run
+
+        Args:
+            future (Future): returned by submit()
+        """
+        self.start()
+        return future.result()
+
+    # Jobs that have not run yet; finished ones are dropped along with their results
+    def pending(self) -> list:
+        self.futures = [future for future in self.futures if not future.done()]
+        return self.futures
+
+    # Whether every job so far has run
+    def idle(self) -> bool:
+        return not self.pending()
+
+    # Wait for every job so far
+    def wait(self, timeout: float = None) -> bool:
+        """Starts the loader and blocks until every submitted job has run
+
+        Args:
+            timeout (float, optional): seconds to wait at most. Defaults to no limit.
+
+        Returns:
+            bool: whether every job has run
+        """
+        self.start()
+        return not wait(self.pending(), timeout).not_done
+
+    # Stop the thread, dropping jobs that have not started
+    def close(self):
+        for future in self.pending():
+            future.cancel()
+        self.jobs.put(None)
+        if self.started:
+            self.thread.join()
+
+    # Body of the loader thread
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            future, function, args = job
+            # Skip jobs cancelled while queued
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args))
+            except Exception as error:
+                future.set_exception(error)
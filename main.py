@@ -1,22 +1,68 @@
 import pygame
+import argparse
 import os
 import random
+import sys
+import time
+
+import numpy as np
+
+from assets import AssetCache, TextCache
+from atlas import SpriteAtlas
+from dirty_rects import DirtyRectTracker
+from events import EventBus
+from loader import Loader
+from particles import EXPLOSION, SPARKS, TRAIL, ParticleSystem
+from profiler import FrameProfiler
+from replay import Recorder, Replay
+from scenes import Scene, SceneManager
+from snapshots import RewindBuffer
+from sounds import SoundManager
+from telemetry import MatchTelemetry, TelemetryWriter
+from simulation import (
+    ARENA_HEIGHT,
+    ARENA_WIDTH,
+    INTENSITIES,
+    SPACESHIP_SIZE,
+    INPUT_LEFT,
+    INPUT_RIGHT,
+    INPUT_UP,
+    INPUT_DOWN,
+    INPUT_FIRE,
+    INPUT_FIRE_HELD,
+    EVENT_DEATH,
+    EVENT_FIRE,
+    EVENT_HIT,
+    EVENT_LASER,
+    TICK_RATE,
+    World,
+    arena_fleet,
+    chase_controller,
+    swarm_controller,
+    to_pixel,
+)
+from timestep import FixedTimestep
 
-pygame.mixer.init()
 pygame.font.init()
 
-pygame.mixer.music.load(os.path.join("Assets", "Battle of Heroes.ogg"))
-pygame.mixer.music.play()
-
 # All Constants
 TITLE = "Python Space War"
+# Logical size of the screen: everything is drawn and played at this size, and
+# pygame.SCALED has the renderer stretch each presented frame to the window,
+# letterboxed, so resizing never changes the game or reloads anything
 WIDTH, HEIGHT = 1200, 600
 WIN = pygame.display.set_mode(
     (WIDTH, HEIGHT), pygame.RESIZABLE | pygame.SCALED | pygame.NOFRAME
 )
-BORDER = pygame.Rect(WIDTH // 2 - 5, 0, 10, HEIGHT)
-FPS = 60
+FPS = 60  # Frame rate cap; the simulation runs at TICK_RATE regardless
 CLOCK = pygame.time.Clock()
+TIMESTEP = FixedTimestep(TICK_RATE)
+# Rendering mode: "dirty" only redraws and presents what changed, "full" redraws
+# the whole screen every frame
+RENDER_MODE = os.environ.get("SPACE_WAR_RENDER", "dirty")
+DIRTY_RECTS = DirtyRectTracker()
+# Frame profiler: F3 toggles it and its overlay, F4 exports a Chrome trace
+PROFILER = FrameProfiler()
 # Colors
 COLORS = ["blue", "gray", "green", "pink", "purple", "red", "teal", "white", "yellow"]
 COLOR_CODES = {
@@ -31,25 +77,24 @@ COLOR_CODES = {
     "yellow": (255, 232, 31),
     "black": (0, 0, 0),
 }
-# Sounds
-BULLET_HIT_SOUND = pygame.mixer.Sound(os.path.join("Assets", "Grenade+1.mp3"))
-BULLET_FIRE_SOUND = pygame.mixer.Sound(os.path.join("Assets", "Gun+Silencer.mp3"))
-WINNER_SOUND = pygame.mixer.Sound(os.path.join("Assets", "Fanfare.mp3"))
-EXPLOSION_SOUND = pygame.mixer.Sound(os.path.join("Assets", "Explosion.mp3"))
-LASER_SOUND = pygame.mixer.Sound(os.path.join("Assets", "Space_Laser.mp3"))
+# Loads what the first frame does not need in the background, from the first
+# frame on: the mixer, music, sound effects and the other images
+LOADER = Loader()
+# Sounds: voices and min_interval (ms) bound the mixer work of rapid effects;
+# the fanfare and explosions have channels of their own
+SOUNDS = SoundManager(loader=LOADER)
+SOUNDS.music("Battle of Heroes.ogg")
+SOUNDS.load("hit", "Grenade+1.mp3", voices=3, min_interval=50)
+SOUNDS.load("fire", "Gun+Silencer.mp3", voices=4, min_interval=40)
+SOUNDS.load("laser", "Space_Laser.mp3", voices=2, min_interval=100)
+SOUNDS.load("winner", "Fanfare.mp3", reserved=True)
+SOUNDS.load("explosion", "Explosion.mp3", reserved=True)
 
 # Fonts
 HEALTH_FONT = pygame.font.SysFont("comicsans", 40, bold=False, italic=False)
 WINNER_FONT = pygame.font.SysFont("comincsans", 100, bold=True, italic=False)
 SMALL_TEXT = pygame.font.SysFont("comincsans", 30, bold=False, italic=True)
 # Intensity Metrics
-INTENSITIES = [
-    {"vel": 5, "bullet_vel": 7.5, "max_bullets": 3, "health": 10},
-    {"vel": 7.5, "bullet_vel": 10, "max_bullets": 6, "health": 20},
-    {"vel": 10, "bullet_vel": 15, "max_bullets": 10, "health": 30},
-    {"vel": 15, "bullet_vel": 25, "max_bullets": 15, "health": 40},
-    {"vel": 20, "bullet_vel": 35, "max_bullets": 30, "health": 150},
-]
 INTENSITY_DESC = [
     "Friendly",
     "Competitive",
@@ -57,465 +102,490 @@ INTENSITY_DESC = [
     "Ridiculous",
     "Don't Play This Level!",
 ]
-VEL = INTENSITIES[0]["vel"]
-BULLET_VEL = INTENSITIES[0]["bullet_vel"]
-MAX_BULLETS = INTENSITIES[0]["max_bullets"]
-HEALTH = INTENSITIES[0]["health"]
 # Spaceship specifications
 SHIP_COLORS = [COLORS[0], COLORS[1]]
-SPACESHIP_SIZE = (90, 60)
-SPACESHIP_WIDTH = SPACESHIP_SIZE[0]
-SPACESHIP_HEIGHT = SPACESHIP_SIZE[1]
-SHIP_2_HIT = pygame.USEREVENT + 1
-SHIP_1_HIT = pygame.USEREVENT + 2
-SPACE = pygame.transform.scale(
-    pygame.image.load(os.path.join("Assets", f"space{random.randint(1, 6)}.jpeg")),
-    (WIDTH, HEIGHT),
-)
-
-
-# Extend pygame.Rect class to offer customized attributes
-class Ship(pygame.Rect):
+# Keys for each player: left, right, up, down, fire
+PLAYER_KEYS = [
+    (pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s, pygame.K_LALT),
+    (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_RALT),
+]
+# Fire presses not yet consumed by a simulation tick
+FIRE_PRESSED = [False, False]
+# Images, loaded once and kept in display format
+ASSETS = AssetCache()
+ASSETS.prefetch(["atlas.png"], LOADER)
+# Ship, explosion and bullet sprites, pre-scaled and pre-rotated (atlas.py)
+ATLAS = SpriteAtlas(ASSETS)
+# Random choices of the current round, see new_round(); the background is
+# only loaded by the first new_round()
+ROUND_SEED = 0
+# Seed of the round after it, drawn early so its background can be prefetched
+NEXT_ROUND_SEED = random.randrange(2**32)
+BACKGROUND_INDEX = random.randint(1, 6)
+BACKGROUND = f"space{BACKGROUND_INDEX}.jpeg"
+SPACE = None
+# Rendered text, rasterized once per distinct string
+TEXT = TextCache()
+# Explosions, impact sparks and engine trails, within a fixed particle budget
+PARTICLES = ParticleSystem()
+# Kill cam: seconds of the end of a match replayed before the results, and how
+# fast (0.5 is half speed)
+KILLCAM_SECONDS = 2
+KILLCAM_SPEED = 0.5
+# Replay recording: directory to save matches in (set by --record)
+RECORD_DIR = None
+# Recorder of the match in progress, closed if the window is closed mid-match
+RECORDER = None
+# Match statistics log (a TelemetryWriter, opened by --telemetry)
+TELEMETRY = None
+# Kiosk mode (--kiosk): never quit on a timeout, play demo matches when idle
+KIOSK = False
+# Intensities demo matches pick from
+DEMO_INTENSITIES = INTENSITIES
+# Runs every screen of the game from one frame-paced loop
+SCENES = SceneManager(CLOCK, FPS)
+
+
+# Sprite for a simulated ship
+class Ship:
     angle = 90  # Keep track of the ships rotation
 
-    def __init__(self, x, y, width, height, color, health):
-        # Call the constructor of the parent class (pygame.Rect)
-        super().__init__(x, y, width, height)
-        self.color = color  # Give the ship color
-        self.health = health  # Give the ship health
-        self.bullets = []  # Initialize bullet list
+    def __init__(self, state):
+        self.state = state  # simulation.ShipState driving this sprite
+        self.color = state.color  # Give the ship color
 
         # Assign the ship its corresponding image
-        self.image = pygame.image.load(os.path.join("Assets", f"spaceship_{color}.png"))
+        self.image = f"spaceship_{self.color}.png"
 
         # Rotate the ship to face the middle
-        self.ship = pygame.transform.rotate(
-            pygame.transform.scale(self.image, SPACESHIP_SIZE), Ship.angle
-        )
+        self.ship = ATLAS.sprite(self.image, angle=Ship.angle)
         self.angle = Ship.angle
 
         # Change static variable to reflect rotational changes
         Ship.angle = 270 if Ship.angle == 90 else 90
 
     def __str__(self):
-        return f"{self.color.capitalize()} Wins!"
+        return str(self.state)
+
+    @property
+    def health(self):
+        return self.state.health
+
+    # Where to draw the ship, between its previous and current tick positions
+    def position(self, alpha: float = 1.0) -> tuple:
+        state = self.state
+        return (
+            to_pixel(state.prev_x + (state.x - state.prev_x) * alpha),
+            to_pixel(state.prev_y + (state.y - state.prev_y) * alpha),
+        )
 
     def destroyed(self):
-        self.image = pygame.image.load(os.path.join("Assets", f"Explosion.png"))
-        self.ship = pygame.transform.rotate(
-            pygame.transform.scale(self.image, SPACESHIP_SIZE), Ship.angle
-        )
-        EXPLOSION_SOUND.play()
+        self.image = "Explosion.png"
+        self.ship = ATLAS.sprite(self.image, angle=self.angle)
+        SOUNDS.play("explosion")
 
 
 # Draw all objects onto the window
-def draw_window(ship_1: Ship = None, ship_2: Ship = None):
+def draw_window(
+    ship_1: Ship = None,
+    ship_2: Ship = None,
+    bullets=None,
+    alpha: float = 1.0,
+    caption: str = None,
+):
     """Draws the updated window onto the screen. Two main configurations:
     1. Introduction: Activated when Ship args are not passed. This just displays the background and updates the display
     2. Main Gameplay: Activated when Ship args are passed. Displays background, ship health, ships, and bullets
+       With RENDER_MODE "dirty", only the areas that changed are redrawn and presented
 
 
     Args:
         ship_1 (Ship, optional): First ship object. Defaults to None.
         ship_2 (Ship, optional): Second ship object. Defaults to None.
+        bullets (BulletPool, optional): Bullets of the match. Defaults to None.
+        alpha (float, optional): Interpolation between the previous and the latest tick. Defaults to 1.0.
+        caption (str, optional): Text centered at the top of the gameplay. Defaults to None.
     """
-    # Display background
-    WIN.blit(SPACE, (0, 0))
-
     # If called during main gameplay
-    if ship_1 != None and ship_2 != None:
-        # Display ships' health
-        ship_1_health_text = HEALTH_FONT.render(
-            f"Health: {ship_1.health}", 1, COLOR_CODES["white"]
-        )
-        ship_2_health_text = HEALTH_FONT.render(
-            f"Health: {ship_2.health}", 1, COLOR_CODES["white"]
-        )
-        WIN.blit(ship_1_health_text, (30, 10))
-        WIN.blit(ship_2_health_text, (WIDTH - ship_2_health_text.get_width() - 30, 10))
-
-        # Display ships and their respective bullets
-        for ship in [ship_1, ship_2]:
-            WIN.blit(ship.ship, (ship.x, ship.y))
-            for bullet in ship.bullets:
-                pygame.draw.rect(WIN, ship.color, bullet)
+    if ship_1 != None and ship_2 != None and bullets != None:
+        if RENDER_MODE == "dirty":
+            draw_dirty(ship_1, ship_2, bullets, alpha, caption)
+            return
+        # Display background
+        WIN.blit(SPACE, (0, 0))
+        PROFILER.mark("blits")
+        draw_gameplay(ship_1, ship_2, bullets, alpha, caption)
+        pygame.display.update()
+        PROFILER.mark("present")
+        return
+    else:
+        # Display background
+        WIN.blit(SPACE, (0, 0))
+        DIRTY_RECTS.invalidate()
 
     # Update game display
     pygame.display.update()
 
 
-# Handle all movement from spaceship 1
-def ship_1_handle_movement(ship_1: Ship, keys_pressed: list):
-    """Moves the ship dependent upon the keys pressed by the user. Uses W-A-S-D. Checks to make sure ship is within its bounds
-    W = Up
-    A = Left
-    S = Down
-    D = Right
+# Draw the ships, their health and the bullets
+def draw_gameplay(
+    ship_1: Ship, ship_2: Ship, bullets, alpha: float, caption: str = None
+) -> list:
+    """Draws everything that moves during main gameplay on top of the background
 
     Args:
-        ship_1 (Ship): first ship object
-        keys_pressed (list): the keys pressed during the most recent iteration of the game program
-    """
-    # Move ship left
-    ship_1.x -= VEL if keys_pressed[pygame.K_a] and ship_1.x > 0 else 0
-    # Move ship right
-    ship_1.x += (
-        VEL
-        if keys_pressed[pygame.K_d] and ship_1.x < BORDER.x - ship_1.width / 1.3
-        else 0
-    )
-    # Move ship down
-    ship_1.y += (
-        VEL
-        if keys_pressed[pygame.K_s] and ship_1.y + ship_1.height * 1.5 < HEIGHT
-        else 0
-    )
-    # Move ship up
-    ship_1.y -= VEL if keys_pressed[pygame.K_w] and ship_1.y > 0 else 0
+        ship_1 (Ship): First ship object
+        ship_2 (Ship): Second ship object
+        bullets (BulletPool): Bullets of the match
+        alpha (float): Interpolation between the previous and the latest tick
+        caption (str, optional): Text centered at the top. Defaults to None.
 
-
-# Handle all movement from spaceship 2
-def ship_2_handle_movement(ship_2: Ship, keys_pressed: list):
-    """Moves the ship dependent upon the keys pressed by the user. Uses UP-LEFT-DOWN-RIGHT keys. Checks to make sure ship is within its bounds.
-
-    Args:
-        ship_2 (Ship): second ship object
-        keys_pressed (list): the keys pressed during the most recent iteration of the game program
+    Returns:
+        list: the area covered by each drawn object
     """
-    # Move ship left
-    ship_2.x -= (
-        VEL
-        if keys_pressed[pygame.K_LEFT] and ship_2.x > BORDER.x + BORDER.width * 1.5
-        else 0
+    # Display ships' health
+    ship_1_health_text = TEXT.render(
+        HEALTH_FONT, f"Health: {ship_1.health}", 1, COLOR_CODES["white"]
     )
-    # Move ship right
-    ship_2.x += (
-        VEL
-        if keys_pressed[pygame.K_RIGHT] and ship_2.x + ship_2.width / 1.3 < WIDTH
-        else 0
+    ship_2_health_text = TEXT.render(
+        HEALTH_FONT, f"Health: {ship_2.health}", 1, COLOR_CODES["white"]
     )
-    # Move ship down
-    ship_2.y += (
-        VEL
-        if keys_pressed[pygame.K_DOWN] and ship_2.y + ship_2.height * 1.5 < HEIGHT
-        else 0
-    )
-    # Move ship down
-    ship_2.y -= VEL if keys_pressed[pygame.K_UP] and ship_2.y > 0 else 0
-
-
-# Handle all bullet operations
-def handle_bullets(ship_1: Ship, ship_2: Ship):
-    """Handles all bullet functions for both ships
-    1. Moves bullets in the direction they were fired
-    2. Checks to see if bullet fired with opposing ship
-        a. Posts HIT event
-        b. Removes bullet
-    3. Checks to see if bullet has gone off screen
-        a. Removes bullet
+    drawn = [
+        WIN.blit(ship_1_health_text, (30, 10)),
+        WIN.blit(ship_2_health_text, (WIDTH - ship_2_health_text.get_width() - 30, 10)),
+    ]
+    if caption:
+        caption_text = TEXT.render(HEALTH_FONT, caption, 1, COLOR_CODES["white"])
+        drawn.append(
+            WIN.blit(caption_text, (WIDTH / 2 - caption_text.get_width() / 2, 10))
+        )
+    PROFILER.mark("text")
+
+    # Display ships and their respective bullets, in one batch
+    ships = [ship_1, ship_2]
+    sprites = [ATLAS.sprite(f"bullet_{ship.color}") for ship in ships]
+    batch = [(ship.ship, ship.position(alpha)) for ship in ships]
+    batch += [(sprites[owner], (x, y)) for x, y, owner in zip(*bullets.live(alpha))]
+    drawn += WIN.blits(batch)
+    PROFILER.mark("blits")
+    drawn += PARTICLES.draw(WIN)
+    PROFILER.mark("particles")
+    if PROFILER.enabled:
+        drawn.append(PROFILER.draw_overlay(WIN, SMALL_TEXT))
+    PROFILER.mark("blits")
+    return drawn
+
+
+# Redraw only what changed since the last frame
+def draw_dirty(ship_1: Ship, ship_2: Ship, bullets, alpha: float, caption: str):
+    """Restores the background behind last frame's objects, draws this frame's
+    objects and presents only the changed areas of the screen
 
     Args:
-        ship_1 (Ship): _description_
-        ship_2 (Ship): _description_
+        ship_1 (Ship): First ship object
+        ship_2 (Ship): Second ship object
+        bullets (BulletPool): Bullets of the match
+        alpha (float): Interpolation between the previous and the latest tick
+        caption (str): Text centered at the top, or None
     """
-    for bullet in ship_1.bullets:
-        bullet.x += BULLET_VEL
-        if ship_2.colliderect(bullet):
-            pygame.event.post(pygame.event.Event(SHIP_2_HIT))
-            ship_1.bullets.remove(bullet)
-        elif bullet.x + bullet.width > WIDTH:
-            ship_1.bullets.remove(bullet)
-
-    for bullet in ship_2.bullets:
-        bullet.x -= BULLET_VEL
-        if ship_1.colliderect(bullet):
-            pygame.event.post(pygame.event.Event(SHIP_1_HIT))
-            ship_2.bullets.remove(bullet)
-        elif bullet.x < 0:
-            ship_2.bullets.remove(bullet)
+    DIRTY_RECTS.restore(WIN, SPACE)
+    PROFILER.mark("blits")
+    for rect in draw_gameplay(ship_1, ship_2, bullets, alpha, caption):
+        DIRTY_RECTS.mark(rect)
+    DIRTY_RECTS.present()
+    PROFILER.mark("present")
 
 
-# All operations after game ends
-def draw_winner(text: str, ship_1: Ship, ship_2: Ship) -> bool:
-    """Handles all window events when the game ends.
-    1. Plays winner sound
-    2. Draws winner text onto the screen
-    3. Prompts user to play again
-    4. Handles user input on whether they want to play again
+# Check to see if user quit or resized window
+def check_universal_events(event: pygame.event.Event):
+    """Checks to see if user quit or resized window and runs different functions respectively
 
     Args:
-        text (str): Text defining which player won.
-        ship_1 (Ship): Player 1 Ship object
-        ship_2 (Ship): Player 1 Ship object
-
-    Returns:
-        bool: Whether user wants to play again
-    """
-    draw_window(ship_1, ship_2)
-
-    # Make texts
-    draw_text = WINNER_FONT.render(text, 1, COLOR_CODES["white"])
-    replay_text = HEALTH_FONT.render("Want to play again?", 1, COLOR_CODES["white"])
-    yes_or_no = HEALTH_FONT.render("Yes: y           No: n", 1, COLOR_CODES["white"])
-
-    # Post winner text
-    WIN.blit(
-        draw_text,
-        (
-            WIDTH / 2 - draw_text.get_width() / 2,
-            HEIGHT / 2 - draw_text.get_height() / 2,
-        ),
-    )
-    pygame.display.update()
-
-    pygame.time.delay(1000)
-    # Play winner fanfare
-    WINNER_SOUND.play()
-    # Wait 2 seconds
-    pygame.time.delay(2000)
-
-    # Post play again text
-    WIN.blit(
-        replay_text,
-        (
-            WIDTH / 2 - replay_text.get_width() / 2,
-            HEIGHT / 2 + draw_text.get_height(),
-        ),
-    )
-    WIN.blit(
-        yes_or_no,
-        (
-            WIDTH / 2 - replay_text.get_width() / 2,
-            HEIGHT / 2 + draw_text.get_height() + replay_text.get_height(),
-        ),
-    )
-    pygame.display.update()
-
-    # Gives user 30 seconds to make a rematch decision or else auto quits
-    start_time = pygame.time.get_ticks()
-    while pygame.time.get_ticks() - start_time < 30000:
-        for event in pygame.event.get():
-            # User quit window
-            if event.type == pygame.QUIT:
-                run = False
-                pygame.quit()
-            elif event.type == pygame.KEYDOWN:
-                # User clicked 'y' --> Wants to play again
-                if event.key == pygame.K_y:
-                    return True
-                # User clicked 'n' --> Does not want to play again
-                elif event.key == pygame.K_n:
-                    return False
-    # If no decision after 30 sec, assume users do not want to play again
-    return False
-
-
-# Fire bullets
-def fire_bullets(ship: Ship):
-    """Creates new bullet and adds to ship's bullet list.
-    Plays bullet firing sound
+        event (pygame.event.Event): most recent event
 
-    Args:
-        ship (Ship): Ship object (can be either player)
+    Exits the program if the user closes the window
     """
-    ship.bullets.append(
-        pygame.Rect(
-            ship.x + ship.width / 1.5 - 5,
-            ship.y + ship.height / 1.5 + 3,
-            15,
-            6,
-        )
-    )
-    if HEALTH != 150:
-        BULLET_FIRE_SOUND.play()
+    if event.type == pygame.QUIT:
+        LOADER.close()
+        if RECORDER:
+            RECORDER.close()
+        if TELEMETRY:
+            TELEMETRY.close()
+        pygame.quit()
+        sys.exit()
+    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+        PROFILER.toggle()
+    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+        PROFILER.export_chrome_trace(time.strftime("profile-%Y%m%d-%H%M%S.json"))
+    elif event.type == pygame.VIDEORESIZE:
+        # The renderer rescales on its own; present the whole frame again
+        DIRTY_RECTS.invalidate()
 
 
-# Ops if bullet hits ship
-def bullet_hit(health: int) -> int:
-    """Plays the bullet collided sound and decrements ship's health by 1
+# Translate the keyboard state into simulation inputs
+def read_inputs(fire_pressed: list) -> list:
+    """Builds the INPUT_* flags of both players from the keys currently held down
 
     Args:
-        health (int): the ships current health
+        fire_pressed (list): whether each player pressed fire since the last frame
 
     Returns:
-        int: the ships health decremented by 1
+        list: input flags for player 1 and player 2
     """
-    if HEALTH != 150:
-        BULLET_HIT_SOUND.play()
-    return health - 1
+    keys_pressed = pygame.key.get_pressed()
+    inputs = []
+    for keys, fired in zip(PLAYER_KEYS, fire_pressed):
+        left, right, up, down, fire = keys
+        flags = INPUT_FIRE if fired else 0
+        flags |= INPUT_LEFT if keys_pressed[left] else 0
+        flags |= INPUT_RIGHT if keys_pressed[right] else 0
+        flags |= INPUT_UP if keys_pressed[up] else 0
+        flags |= INPUT_DOWN if keys_pressed[down] else 0
+        flags |= INPUT_FIRE_HELD if keys_pressed[fire] else 0
+        inputs.append(flags)
+    return inputs
 
 
-# Check to see if health is at 0
-def is_game_over(ship_1: Ship, ship_2: Ship) -> bool:
-    """Check the health of both ships. If either ships' health is 0, end game.
+# Runs the main game loop
+def main_game_loop(
+    world: World,
+    ship_1: Ship,
+    ship_2: Ship,
+    elapsed: float = 1 / TICK_RATE,
+    inputs: list = None,
+    events: list = None,
+    recorder: Recorder = None,
+    controllers: list = None,
+    rewind: RewindBuffer = None,
+    telemetry: MatchTelemetry = None,
+) -> bool:
+    """Handles the general operations for the main game play
+    1. Iterates through all game events to check for fire presses
+    2. Steps the simulation as many fixed ticks as the elapsed time calls for
+    3. Plays the sounds for what happened during each tick
+    4. Draws the window, interpolated between the last two ticks, unless the game is over
 
     Args:
+        world (World): the running match
         ship_1 (Ship): Player 1 ship
         ship_2 (Ship): Player 2 ship
+        elapsed (float, optional): seconds since the previous frame. Defaults to one tick.
+        inputs (list, optional): INPUT_* flags to play instead of the keyboard's. Defaults to None.
+        events (list, optional): events already taken from the queue. Defaults to pumping the queue.
+        recorder (Recorder, optional): replay to log each tick's inputs to. Defaults to None.
+        controllers (list, optional): scripted players, called as controller(world, index) every tick. Defaults to None.
+        rewind (RewindBuffer, optional): buffer to snapshot every tick into. Defaults to None.
+        telemetry (MatchTelemetry, optional): statistics to log every tick to. Defaults to None.
 
     Returns:
-        bool: Is game over
+        bool: Whether or not the game is still running
     """
-    if ship_1.health <= 0 or ship_2.health <= 0:
-        return True
-    return False
+    PROFILER.begin_frame()
+    for event in pygame.event.get() if events is None else events:
+        check_universal_events(event)
+        if event.type == pygame.KEYDOWN:
+            # Check bullets fire
+            for i, keys in enumerate(PLAYER_KEYS):
+                if event.key == keys[4]:
+                    FIRE_PRESSED[i] = True
+    PROFILER.mark("events")
+    world.profiler = PROFILER if PROFILER.enabled else None
+
+    steps = TIMESTEP.advance(elapsed)
+    if steps and inputs is None and not controllers:
+        inputs = read_inputs(FIRE_PRESSED)
+        FIRE_PRESSED[:] = [False, False]
+    for _ in range(steps):
+        if controllers:
+            inputs = [controller(world, i) for i, controller in enumerate(controllers)]
+        if recorder:
+            recorder.record(inputs)
+        tick_events = world.step(inputs)
+        play_sounds(world, tick_events)
+        PROFILER.mark("sound")
+        spawn_particles(world, tick_events)
+        PROFILER.mark("particles")
+        if rewind is not None:
+            rewind.push()
+            PROFILER.mark("snapshots")
+        if telemetry:
+            telemetry.tick(tick_events)
+            PROFILER.mark("telemetry")
+        # A fire press only fires once, however many ticks the frame covers
+        inputs = [flags & ~INPUT_FIRE for flags in inputs]
+
+        # Check for winning condition
+        if world.over:
+            PROFILER.end_frame()
+            return False
+    PARTICLES.update(elapsed)
+    PROFILER.mark("particles")
+    draw_window(ship_1, ship_2, world.bullets, TIMESTEP.alpha)
+    PROFILER.end_frame()
+    return True
 
 
-# Decides which ship won the game
-def decide_winner(ship_1: Ship, ship_2: Ship):
-    """Checks to see which ship has been destroyed.
-    Destroys the losing ship
-    Calls draw_winner() function
-    Quits if user decides not to play again
+# Play the sounds for one simulation tick
+def play_sounds(world: World, events: EventBus):
+    """Plays the sound effect of every event returned by World.step
 
     Args:
-        ship_1 (Ship): Player 1 ship
-        ship_2 (Ship): Player 2 ship
+        world (World): the running match
+        events (EventBus): the tick's events
     """
-    # Check health of player 1 ship
-    if ship_1.health <= 0:
-        winner_text = ship_2.__str__()
-        ship_1.destroyed()
-    # Check health of player 2 ship
-    elif ship_2.health <= 0:
-        winner_text = ship_1.__str__()
-        ship_2.destroyed()
-
-    # Display endgame text. Prompt user for rematch.
-    play_again = draw_winner(
-        winner_text,
-        ship_1,
-        ship_2,
-    )
-    # If user does not want to play again, quit window.
-    if not play_again:
-        run = False
-        pygame.quit()
+    for kind, _ in events:
+        if kind == EVENT_LASER:
+            SOUNDS.play("laser")
+        # A laser's shots are all announced by its one EVENT_LASER
+        elif kind == EVENT_FIRE and not world.laser_mode:
+            SOUNDS.play("fire")
+        elif kind == EVENT_HIT:
+            SOUNDS.play("hit")
 
 
-def resize_window(event: pygame.event.Event, ship_1: Ship, ship_2: Ship):
-    global WIDTH, HEIGHT, BORDER, SPACE
-    new_size = event.size
-    WIDTH, HEIGHT = new_size
-    new_win = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
-    BORDER = pygame.Rect(WIDTH // 2 - 5, 0, 10, HEIGHT)
-    SPACE = pygame.transform.scale(
-        pygame.image.load(os.path.join("Assets", "space.png")), (WIDTH, HEIGHT)
-    )
-    ship_1.ship = pygame.transform.rotate(
-        pygame.transform.scale(ship_1.image, SPACESHIP_SIZE), ship_1.angle
+# Start the particle effects of one simulation tick
+def spawn_particles(world: World, events):
+    """Emits sparks where bullets hit, an explosion where a ship was
+    destroyed and engine trails behind the ships that moved
+
+    Args:
+        world (World): the running match
+        events (EventBus): the tick's events
+    """
+    hits = events.rows(EVENT_HIT)
+    if len(hits):
+        PARTICLES.emit(events.x[hits], events.y[hits], **SPARKS)
+    deaths = events.rows(EVENT_DEATH)
+    if len(deaths):
+        PARTICLES.emit(events.x[deaths], events.y[deaths], **EXPLOSION)
+    spawn_trails(world.fleet)
+
+
+# Start engine trails behind the ships that moved during the last tick
+def spawn_trails(fleet):
+    moving = (fleet.health > 0) & (
+        (fleet.x != fleet.prev_x) | (fleet.y != fleet.prev_y)
     )
-    ship_2.ship = pygame.transform.rotate(
-        pygame.transform.scale(ship_2.image, SPACESHIP_SIZE), ship_2.angle
+    if not moving.any():
+        return
+    ships = np.flatnonzero(moving)
+    forward = fleet.direction[ships] > 0
+    PARTICLES.emit(
+        np.where(forward, fleet.x[ships], fleet.x[ships] + fleet.width[ships]),
+        fleet.y[ships] + fleet.height[ships] / 2,
+        angle=np.where(forward, np.pi, 0.0),
+        **TRAIL,
     )
-    return new_win
 
 
-# Check to see if user quit or resized window
-def check_universal_events(event: pygame.event.Event):
-    """Checks to see if user quit or resized window and runs different functions respectively
+# Particle effects of a state restored from a snapshot, worked out from the
+# health each ship lost since the previous one: snapshots hold no events
+def spawn_snapshot_particles(fleet, health: np.ndarray):
+    hit = np.flatnonzero(fleet.health < health)
+    if len(hit):
+        centers_x = fleet.x[hit] + fleet.width[hit] / 2
+        centers_y = fleet.y[hit] + fleet.height[hit] / 2
+        PARTICLES.emit(centers_x, centers_y, **SPARKS)
+        dead = fleet.health[hit] <= 0
+        PARTICLES.emit(centers_x[dead], centers_y[dead], **EXPLOSION)
+    spawn_trails(fleet)
 
-    Args:
-        event (pygame.event.Event): most recent event
 
-    Returns:
-        bool: quits game and breaks loop is user closes window
-    """
-    if event.type == pygame.QUIT:
-        pygame.quit()
-        return False
-    elif event.type == pygame.VIDEORESIZE:
-        # Handle window resize event
-        WIN = resize_window(event, ship_1, ship_2)
-        pygame.display.flip()
-
-
-# Runs the main game loop
-def main_game_loop(ship_1: Ship, ship_2: Ship) -> bool:
-    """Handles the general operations for the main game play
-    1. Iterates through all game events to check different conditions
-        a. Fires bullets and posts collision events
-    2. Checks to see if game is over
-        a. Exit main game play
-    3. Else
-        a. gets all pressed keys
-        b. moves ships
+# Draw the background of a menu screen
+def draw_background():
+    """Covers the whole window with the background. The next gameplay frame is
+    then redrawn in full."""
+    WIN.blit(SPACE, (0, 0))
+    DIRTY_RECTS.invalidate()
 
-    Args:
-        ship_1 (Ship): Player 1 ship
-        ship_2 (Ship): Player 2 ship
 
-    Returns:
-        bool: Whether or not the game is still running
+# Pick the random elements of a new round
+def new_round():
+    """Seeds every random choice of the round so a replay can reproduce it, and
+    picks the round's background.
     """
-    for event in pygame.event.get():
-        check_universal_events(event)
-        if event.type == pygame.KEYDOWN and HEALTH != 150:
-            # Check bullets fire
-            if event.key == pygame.K_LALT and len(ship_1.bullets) < MAX_BULLETS:
-                fire_bullets(ship_1)
-            if event.key == pygame.K_RALT and len(ship_2.bullets) < MAX_BULLETS:
-                fire_bullets(ship_2)
-
-        # Check bullet collisions
-        if event.type == SHIP_1_HIT:
-            ship_1.health = bullet_hit(ship_1.health)
-        if event.type == SHIP_2_HIT:
-            ship_2.health = bullet_hit(ship_2.health)
-
-    # Check for winning condition
-    if is_game_over(ship_1, ship_2):
-        return False
+    global ROUND_SEED, NEXT_ROUND_SEED, BACKGROUND_INDEX, BACKGROUND, SPACE
+    ROUND_SEED = NEXT_ROUND_SEED
+    NEXT_ROUND_SEED = random.randrange(2**32)
+    random.seed(ROUND_SEED)
+    BACKGROUND_INDEX = random.randint(1, 6)
+    BACKGROUND = f"space{BACKGROUND_INDEX}.jpeg"
+    SPACE = ASSETS.image(BACKGROUND, (WIDTH, HEIGHT))
+    # Only the next round's background is decoded ahead: the seed picks it
+    upcoming = random.Random(NEXT_ROUND_SEED).randint(1, 6)
+    ASSETS.prefetch([f"space{upcoming}.jpeg"], LOADER, (WIDTH, HEIGHT))
+
+
+# Leave the game when nobody wants to keep playing
+def end_session(manager: SceneManager):
+    """Quits, or in kiosk mode starts a new round at the intro instead"""
+    if KIOSK:
+        new_round()
+        manager.switch(IntroScene())
     else:
-        # Check for pressed keys
-        keys_pressed = pygame.key.get_pressed()
+        manager.quit()
 
-        # Run main game loop
-        if HEALTH == 150 and (
-            keys_pressed[pygame.K_LALT] or keys_pressed[pygame.K_RALT]
-        ):
-            LASER_SOUND.play()
-            if keys_pressed[pygame.K_LALT]:
-                fire_bullets(ship_1)
-            if keys_pressed[pygame.K_RALT]:
-                fire_bullets(ship_2)
-        ship_1_handle_movement(ship_1, keys_pressed)
-        ship_2_handle_movement(ship_2, keys_pressed)
-        handle_bullets(ship_1, ship_2)
-        draw_window(
-            ship_1,
-            ship_2,
-        )
 
-    return True
+# Demo match between two scripted ships
+def demo_match() -> "MatchScene":
+    """Builds a match with a random intensity and random ships, played by
+    chase_controller until someone presses a key
+    """
+    intensity = random.choice(DEMO_INTENSITIES)
+    colors = random.sample(COLORS, 2)
+    controllers = [chase_controller(random.Random(ROUND_SEED + i)) for i in range(2)]
+    return MatchScene(intensity, colors, controllers)
 
 
 # Opening game sequence
-def intro() -> bool:
+class IntroScene(Scene):
     """Handles opening sequence: title slide and enter prompt
     1. Builds animated title sequence
     2. Prompts user to press 'Return' to enter main game
-
-
-    Returns:
-        bool: _description_
+    3. Quits if nobody presses 'Return' within 30 seconds, or plays a demo
+       match in kiosk mode
     """
-    draw_window()
 
-    # Make texts
-    # title = WINNER_FONT.render(f"Welcome to {TITLE}", 1, COLOR_CODES["white"])
-    title = WINNER_FONT.render(f"Welcome to {TITLE}", 1, COLOR_CODES["yellow"])
-    prompt = HEALTH_FONT.render("Press Enter to Play!", 1, COLOR_CODES["white"])
+    prompt_shown = False
+
+    @property
+    def animating(self) -> bool:
+        # One more frame after the animation so the title lands at full size
+        return self.age() < 900 + 1000 / FPS
 
-    start_time = pygame.time.get_ticks()
+    def wake_at(self):
+        if self.age() < 2400:
+            return self.started + 2400
+        return self.started + 30000
 
-    # Opening title text
-    while pygame.time.get_ticks() - start_time < 900:
-        for event in pygame.event.get():
+    def update(self, events: list, elapsed: float):
+        for event in events:
             check_universal_events(event)
-        # Scale the texts
-        elapsed_time = pygame.time.get_ticks() - start_time
-        scale_factor = 4.0 - (elapsed_time / 300)
+            # If user presses Return key, enter game
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+                self.manager.switch(IntensityScene())
+                return
+        age = self.age()
+        if age >= 30000:
+            # Nobody is playing: run a demo in kiosk mode, otherwise quit
+            if KIOSK:
+                self.manager.switch(demo_match())
+            else:
+                self.manager.quit()
+        elif self.animating or (age >= 2400) != self.prompt_shown:
+            self.needs_draw = True
+
+    def draw(self):
+        # Make texts
+        title = TEXT.render(
+            WINNER_FONT, f"Welcome to {TITLE}", 1, COLOR_CODES["yellow"]
+        )
+        prompt = TEXT.render(
+            HEALTH_FONT, "Press Enter to Play!", 1, COLOR_CODES["white"]
+        )
+
+        # Scale the opening title text
+        scale_factor = max(1.0, 4.0 - (self.age() / 300))
         scaled_title = pygame.transform.scale(
             title,
             (
@@ -525,7 +595,7 @@ def intro() -> bool:
         )
 
         # Post opening title text
-        WIN.blit(SPACE, (0, 0))
+        draw_background()
         WIN.blit(
             scaled_title,
             (
@@ -533,287 +603,792 @@ def intro() -> bool:
                 HEIGHT / 2 - title.get_height() / 2,
             ),
         )
+        # Post 'Enter' prompt text
+        self.prompt_shown = self.age() >= 2400
+        if self.prompt_shown:
+            WIN.blit(
+                prompt,
+                (
+                    WIDTH / 2 - prompt.get_width() / 2,
+                    HEIGHT / 2 + title.get_height(),
+                ),
+            )
         pygame.display.update()
-        CLOCK.tick(FPS)
-
-    # Wait
-    pygame.time.delay(1500)
-
-    # Post 'Enter' prompt text
-    WIN.blit(
-        prompt,
-        (
-            WIDTH / 2 - prompt.get_width() / 2,
-            HEIGHT / 2 + title.get_height(),
-        ),
-    )
-    pygame.display.update()
-    # Give user 30 seconds to enter game
-    while pygame.time.get_ticks() - start_time < 30000:
-        for event in pygame.event.get():
+
+
+class MenuScene(Scene):
+    """A menu revealed in steps (title, subtitle, options) that waits for a
+    number key. Subclasses define draw_step(), choose() and timed_out().
+    """
+
+    reveal = [0, 300, 600]  # Milliseconds at which each step appears
+    timeout = 30000  # Milliseconds before timed_out() is called
+    choices = 0  # Number keys 0 .. choices - 1 are accepted
+
+    # How many steps of the menu are visible
+    def steps(self) -> int:
+        return sum(1 for at in self.reveal if self.age() >= at)
+
+    def wake_at(self):
+        for at in self.reveal:
+            if self.age() < at:
+                return self.started + at
+        return self.started + self.timeout
+
+    def update(self, events: list, elapsed: float):
+        for event in events:
             check_universal_events(event)
-            # If user presses Return key, enter game
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
-                return False
-    # If no decision after 30 sec, assume users do not want to play again
-    pygame.quit()
+            if (
+                event.type == pygame.KEYDOWN
+                and pygame.K_0 <= event.key < pygame.K_0 + self.choices
+            ):
+                self.choose(event.key - pygame.K_0)
+                return
+        if self.age() >= self.timeout:
+            self.timed_out()
+        elif self.steps() != getattr(self, "drawn_steps", 0):
+            self.needs_draw = True
+
+    def draw(self):
+        draw_background()
+        self.drawn_steps = self.steps()
+        for step in range(self.drawn_steps):
+            self.draw_step(step)
+        pygame.display.update()
+
+    # Draw one step of the menu
+    def draw_step(self, step: int):
+        pass
+
+    # React to a number key
+    def choose(self, number: int):
+        pass
+
+    # React to nobody choosing in time
+    def timed_out(self):
+        end_session(self.manager)
 
 
 # Prompts user to select their desired intensity level
-def choose_intensity() -> dict:
+class IntensityScene(MenuScene):
     """Prompts players to select their desired intensity level for the game.
     Users have 5 choices. Based on their key input, set the conditions for the various intensity levels as defined in the constant INTENSITIES
-
-    Returns:
-        dict: the attributes of the selected intensity
     """
-    draw_window()
-    start_time = pygame.time.get_ticks()
-
-    # Create the texts
-    title = WINNER_FONT.render(f"Choose Your Intensity", 1, COLOR_CODES["yellow"])
-    subtitle = SMALL_TEXT.render(
-        f"Press Number For Corresponding Intensity Level", 1, COLOR_CODES["white"]
-    )
-    option_1 = HEALTH_FONT.render("Press Enter to Play!", 1, COLOR_CODES["white"])
-
-    # Post the title text
-    WIN.blit(
-        title,
-        (
-            WIDTH / 2 - title.get_width() / 2,
-            HEIGHT / 3 - title.get_height(),
-        ),
-    )
-
-    pygame.display.update()
-    pygame.time.delay(300)
-
-    # Post the subtitle text
-    WIN.blit(
-        subtitle,
-        (
-            WIDTH / 2 - subtitle.get_width() / 2,
-            HEIGHT / 3,
-        ),
-    )
 
-    pygame.display.update()
-    pygame.time.delay(300)
+    choices = len(INTENSITIES)
 
-    # Show user different intensity options
-    for i in range(4):
-        option = HEALTH_FONT.render(
-            f"{i}: {INTENSITY_DESC[i]}", 1, COLOR_CODES["white"]
+    def draw_step(self, step: int):
+        # Create the texts
+        title = TEXT.render(
+            WINNER_FONT, f"Choose Your Intensity", 1, COLOR_CODES["yellow"]
+        )
+        subtitle = TEXT.render(
+            SMALL_TEXT,
+            f"Press Number For Corresponding Intensity Level",
+            1,
+            COLOR_CODES["white"],
         )
-        if i % 2 == 0:
+
+        # Post the title text
+        if step == 0:
             WIN.blit(
-                option,
+                title,
                 (
-                    2.5 * WIDTH / 10,
-                    HEIGHT / 3 + title.get_height() + option.get_height() * (i // 2),
+                    WIDTH / 2 - title.get_width() / 2,
+                    HEIGHT / 3 - title.get_height(),
                 ),
             )
+        # Post the subtitle text
+        elif step == 1:
+            WIN.blit(
+                subtitle,
+                (
+                    WIDTH / 2 - subtitle.get_width() / 2,
+                    HEIGHT / 3,
+                ),
+            )
+        # Show user different intensity options
         else:
+            for i in range(4):
+                option = TEXT.render(
+                    HEALTH_FONT, f"{i}: {INTENSITY_DESC[i]}", 1, COLOR_CODES["white"]
+                )
+                WIN.blit(
+                    option,
+                    (
+                        (2.5 if i % 2 == 0 else 5.5) * WIDTH / 10,
+                        HEIGHT / 3
+                        + title.get_height()
+                        + option.get_height() * (i // 2),
+                    ),
+                )
+            option = TEXT.render(
+                HEALTH_FONT, f"4: {INTENSITY_DESC[4]}", 1, COLOR_CODES["white"]
+            )
             WIN.blit(
                 option,
                 (
-                    5.5 * WIDTH / 10,
-                    HEIGHT / 3 + title.get_height() + option.get_height() * (i // 2),
+                    WIDTH / 2 - option.get_width() / 2,
+                    HEIGHT / 3 + title.get_height() + option.get_height() * 2,
                 ),
             )
-        option = HEALTH_FONT.render(f"4: {INTENSITY_DESC[4]}", 1, COLOR_CODES["white"])
-        WIN.blit(
-            option,
-            (
-                WIDTH / 2 - option.get_width() / 2,
-                HEIGHT / 3 + title.get_height() + option.get_height() * 2,
-            ),
+
+    def choose(self, number: int):
+        self.manager.switch(CharacterScene(INTENSITIES[number], []))
+
+
+# Prompts both players to choose their desired ship characters
+class CharacterScene(MenuScene):
+    """Asks the next player for their desired color for their ship.
+    If no color is selected within 10 seconds. Randomly assign a color
+    """
+
+    choices = len(COLORS)
+    timeout = 10000
+
+    def __init__(self, intensity: dict, colors: list):
+        super().__init__()
+        self.intensity = intensity
+        self.colors = colors  # Colors chosen by the previous players
+        self.player = len(colors) + 1
+
+    def draw_step(self, step: int):
+        # Create text
+        title = TEXT.render(
+            WINNER_FONT,
+            f"Player {self.player} Choose Your Ship",
+            1,
+            COLOR_CODES["yellow"],
+        )
+        subtitle = TEXT.render(
+            SMALL_TEXT, f"Press Number For Corresponding Color", 1, COLOR_CODES["white"]
+        )
+        option_last = TEXT.render(
+            HEALTH_FONT, f"8: {COLORS[8].capitalize()}", 1, COLOR_CODES["white"]
         )
 
-    pygame.display.update()
+        # Post title text
+        if step == 0:
+            WIN.blit(
+                title,
+                (
+                    WIDTH / 2 - title.get_width() / 2,
+                    HEIGHT / 3 - title.get_height(),
+                ),
+            )
+        # Post subtitle text
+        elif step == 1:
+            WIN.blit(
+                subtitle,
+                (
+                    WIDTH / 2 - subtitle.get_width() / 2,
+                    HEIGHT / 3,
+                ),
+            )
+        # Show all color options to choose from
+        else:
+            for i in range(8):
+                option = TEXT.render(
+                    HEALTH_FONT,
+                    f"{i}: {COLORS[i].capitalize()}",
+                    1,
+                    COLOR_CODES["white"],
+                )
+                WIN.blit(
+                    option,
+                    (
+                        WIDTH / 2
+                        + option_last.get_width() * (-1.5 if i % 2 == 0 else 0.5),
+                        HEIGHT / 3
+                        + subtitle.get_height()
+                        + option.get_height() * (i // 2),
+                    ),
+                )
+            WIN.blit(
+                option_last,
+                (
+                    WIDTH / 2 - option_last.get_width() / 2,
+                    HEIGHT / 3
+                    + title.get_height()
+                    + option.get_height() * (len(COLORS) // 2 - 1),
+                ),
+            )
+
+    def choose(self, number: int):
+        colors = self.colors + [COLORS[number]]
+        if len(colors) < len(SHIP_COLORS):
+            self.manager.switch(CharacterScene(self.intensity, colors))
+        else:
+            SHIP_COLORS[:] = colors
+            self.manager.switch(MatchScene(self.intensity, colors))
+
+    # If user does not pick a ship, randomly assign them one
+    def timed_out(self):
+        self.choose(random.randrange(len(COLORS)))
 
-    # Give user 30 seconds to make a decision. Select intensity based on key input.
-    while pygame.time.get_ticks() - start_time < 30000:
-        for event in pygame.event.get():
+
+# Main game play
+class MatchScene(Scene):
+    """Runs main_game_loop once per frame until a ship is destroyed, recording
+    the match when --record is given and logging its statistics with
+    --telemetry. With controllers it is a demo match that any key press
+    interrupts.
+    """
+
+    animating = True
+
+    def __init__(self, intensity: dict, colors: list, controllers: list = None):
+        super().__init__()
+        self.world = World(intensity, colors)
+        self.ship_1 = Ship(self.world.ships[0])
+        self.ship_2 = Ship(self.world.ships[1])
+        self.controllers = controllers  # controller(world, index) per player
+        self.recorder = None
+        self.telemetry = None
+        self.rewind = RewindBuffer(self.world)  # For the kill cam
+
+    def enter(self):
+        global RECORDER
+        super().enter()
+        if RECORD_DIR and not self.controllers:
+            name = time.strftime("match-%Y%m%d-%H%M%S.swr")
+            self.recorder = RECORDER = Recorder(
+                os.path.join(RECORD_DIR, name),
+                self.world,
+                BACKGROUND_INDEX,
+                ROUND_SEED,
+            )
+        if TELEMETRY:
+            self.telemetry = TELEMETRY.match(self.world, demo=bool(self.controllers))
+        TIMESTEP.reset()
+        PARTICLES.clear()
+
+    def update(self, events: list, elapsed: float):
+        if self.controllers:
+            # A key press during a demo brings the players to the menus
+            if any(event.type == pygame.KEYDOWN for event in events):
+                if self.telemetry:
+                    self.telemetry.close()
+                new_round()
+                self.manager.switch(IntensityScene())
+                return
+        if not main_game_loop(
+            self.world,
+            self.ship_1,
+            self.ship_2,
+            elapsed,
+            events=events,
+            recorder=self.recorder,
+            controllers=self.controllers,
+            rewind=self.rewind,
+            telemetry=self.telemetry,
+        ):
+            if self.recorder:
+                self.recorder.close()
+            if self.telemetry:
+                self.telemetry.close()
+            self.manager.switch(
+                KillCamScene(
+                    self.rewind,
+                    ResultsScene(
+                        self.world,
+                        self.ship_1,
+                        self.ship_2,
+                        rematch=not self.controllers,
+                    ),
+                )
+            )
+
+    def draw(self):
+        DIRTY_RECTS.invalidate()
+
+
+# Free-for-all between many ships
+class ArenaScene(Scene):
+    """Runs an arena match between any number of ships, scaled down to fit the
+    window. The first `humans` ships (at most two) are played from the
+    keyboard, the rest by swarm_controller. The last ship standing wins; its
+    name stays up for 3 seconds before the session ends.
+    """
+
+    animating = True
+
+    def __init__(self, intensity: dict, ships: int, humans: int = 0):
+        super().__init__()
+        fleet = arena_fleet(intensity, ships, COLORS)
+        self.world = World(intensity, fleet.colors, fleet, (ARENA_WIDTH, ARENA_HEIGHT))
+        self.humans = min(humans, len(PLAYER_KEYS), ships)
+        self.bots = swarm_controller(np.random.default_rng(ROUND_SEED))
+        self.scale = min(WIDTH / ARENA_WIDTH, HEIGHT / ARENA_HEIGHT)
+        self.sprites = [
+            ATLAS.sprite(
+                f"spaceship_{ship.color}.png",
+                self.scale,
+                90 if ship.direction > 0 else 270,
+            )
+            for ship in self.world.ships
+        ]
+        self.bullet_sprites = [
+            ATLAS.sprite(f"bullet_{ship.color}", self.scale)
+            for ship in self.world.ships
+        ]
+        self.over_at = None  # Scene age when the last rival was destroyed
+
+    def enter(self):
+        super().enter()
+        TIMESTEP.reset()
+        PARTICLES.clear()
+
+    def update(self, events: list, elapsed: float):
+        for event in events:
             check_universal_events(event)
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_0:
-                    return INTENSITIES[0]
-                if event.key == pygame.K_1:
-                    return INTENSITIES[1]
-                if event.key == pygame.K_2:
-                    return INTENSITIES[2]
-                if event.key == pygame.K_3:
-                    return INTENSITIES[3]
-                if event.key == pygame.K_4:
-                    return INTENSITIES[4]
+                for i, keys in enumerate(PLAYER_KEYS):
+                    if event.key == keys[4]:
+                        FIRE_PRESSED[i] = True
+        PARTICLES.update(elapsed)
+        if self.over_at is not None:
+            if self.age() - self.over_at >= 3000:
+                end_session(self.manager)
+            # Let the last explosion play out
+            self.needs_draw = True
+            return
+
+        world = self.world
+        steps = TIMESTEP.advance(elapsed)
+        # Fire presses wait for a frame that runs a tick
+        if steps:
+            humans = read_inputs(FIRE_PRESSED)[: self.humans]
+            FIRE_PRESSED[:] = [False, False]
+        for _ in range(steps):
+            inputs = self.bots(world)
+            inputs[: self.humans] = humans
+            tick_events = world.step(inputs)
+            play_sounds(world, tick_events)
+            spawn_particles(world, tick_events)
+            # A fire press only fires once, however many ticks the frame covers
+            humans = [flags & ~INPUT_FIRE for flags in humans]
+            if world.over:
+                self.over_at = self.age()
+                SOUNDS.play("winner")
+                break
+        self.needs_draw = True
+
+    def draw(self):
+        world = self.world
+        fleet = world.fleet
+        scale = self.scale
+        alpha = 1.0 if world.over else TIMESTEP.alpha
+        WIN.blit(SPACE, (0, 0))
 
-        CLOCK.tick(FPS)
+        # Ships, and bullets in the color of the ship that fired them, in one
+        # batch
+        alive = np.flatnonzero(fleet.health > 0)
+        xs = (fleet.prev_x + (fleet.x - fleet.prev_x) * alpha)[alive] * scale
+        ys = (fleet.prev_y + (fleet.y - fleet.prev_y) * alpha)[alive] * scale
+        batch = [
+            (self.sprites[i], (x, y))
+            for i, x, y in zip(alive.tolist(), xs.tolist(), ys.tolist())
+        ]
+        sprites = self.bullet_sprites
+        batch += [
+            (sprites[owner], (x * scale, y * scale))
+            for x, y, owner in zip(*world.bullets.live(alpha))
+        ]
+        WIN.blits(batch, doreturn=False)
+        PARTICLES.draw(WIN, scale)
+
+        # A health bar above each ship
+        health = fleet.health[alive] / world.intensity["health"]
+        bar_width = SPACESHIP_SIZE[0] * scale
+        for x, y, share in zip(xs.tolist(), ys.tolist(), health.tolist()):
+            WIN.fill(COLOR_CODES["red"], (x, y - 5, bar_width, 3))
+            WIN.fill(COLOR_CODES["green"], (x, y - 5, bar_width * share, 3))
+
+        if world.over:
+            text = TEXT.render(
+                WINNER_FONT, str(world.winner()), 1, COLOR_CODES["white"]
+            )
+            WIN.blit(
+                text,
+                (
+                    WIDTH / 2 - text.get_width() / 2,
+                    HEIGHT / 2 - text.get_height() / 2,
+                ),
+            )
+        pygame.display.update()
+        DIRTY_RECTS.invalidate()
 
 
-# Prompts both players to choose their desired ship characters
-def choose_characters(i: int) -> str:
-    """Asks the 'i' player for his/her desired color for his/her ship.
-    If no color is selected within 10 seconds. Randomly assign a color
+# Match against a remote player
+class NetworkScene(Scene):
+    """Joins a match served by net.py and plays it with player 1's keys,
+    whichever side the server seats this player on. The server runs the
+    match; every frame this scene sends the keys held and draws the newest
+    snapshot.
+    """
 
-    Args:
-        i (int): Player
+    animating = True
 
-    Returns:
-        str: The color of the player's character
+    def __init__(self, host: str, port: int):
+        # Only networked play needs asyncio, which is slow to import
+        import asyncio
+        import net
+
+        super().__init__()
+        self.asyncio = asyncio
+        self.loop = asyncio.new_event_loop()
+        self.transport, self.client = self.loop.run_until_complete(
+            net.connect(host, port)
+        )
+        self.world = None  # Local copy of the match, once it started
+        self.ship_1 = self.ship_2 = None
+        PARTICLES.clear()
+
+    def update(self, events: list, elapsed: float):
+        for event in events:
+            check_universal_events(event)
+            if event.type == pygame.KEYDOWN and event.key == PLAYER_KEYS[0][4]:
+                FIRE_PRESSED[0] = True
+        # Run the client's pending callbacks without blocking the frame
+        self.loop.run_until_complete(self.asyncio.sleep(0))
+        client = self.client
+        client.send_input(read_inputs(FIRE_PRESSED)[0])
+        FIRE_PRESSED[:] = [False, False]
+
+        snapshot = client.latest
+        if snapshot is None:
+            return
+        if self.world is None:
+            self.world = World(client.intensity, client.colors)
+            self.ship_1 = Ship(self.world.ships[0])
+            self.ship_2 = Ship(self.world.ships[1])
+        world = self.world
+        if snapshot.tick != world.tick:
+            health = world.fleet.health.copy()
+            snapshot.apply(world)
+            if (world.fleet.health < health).any():
+                SOUNDS.play("hit")
+            spawn_snapshot_particles(world.fleet, health)
+        PARTICLES.update(elapsed)
+        if world.over:
+            self.transport.close()
+            self.loop.close()
+            self.manager.switch(
+                ResultsScene(world, self.ship_1, self.ship_2, rematch=False)
+            )
+            return
+        draw_window(self.ship_1, self.ship_2, world.bullets)
+
+    def draw(self):
+        # Until the match starts
+        if self.world is None:
+            draw_background()
+            text = TEXT.render(
+                HEALTH_FONT, "Waiting for the other player...", 1, COLOR_CODES["white"]
+            )
+            WIN.blit(
+                text,
+                (WIDTH / 2 - text.get_width() / 2, HEIGHT / 2 - text.get_height() / 2),
+            )
+            pygame.display.update()
+        else:
+            DIRTY_RECTS.invalidate()
+
+
+# Watch a recorded match
+class ReplayScene(Scene):
+    """Plays back a replay file at normal speed in the game window"""
+
+    animating = True
+
+    def __init__(self, path: str, start: int = 0):
+        super().__init__()
+        self.replay = Replay(path)
+        self.world, self.inputs = self.replay.seek(start)
+        self.ship_1 = Ship(self.world.ships[0])
+        self.ship_2 = Ship(self.world.ships[1])
+
+    def enter(self):
+        global BACKGROUND, SPACE
+        super().enter()
+        BACKGROUND = f"space{self.replay.background}.jpeg"
+        SPACE = ASSETS.image(BACKGROUND, (WIDTH, HEIGHT))
+        TIMESTEP.reset()
+        PARTICLES.clear()
+
+    def update(self, events: list, elapsed: float):
+        for event in events:
+            check_universal_events(event)
+        world = self.world
+        for _ in range(TIMESTEP.advance(elapsed)):
+            tick_inputs = next(self.inputs, None)
+            # Recording ended before the match did
+            if tick_inputs is None:
+                self.manager.quit()
+                return
+            tick_events = world.step(tick_inputs)
+            play_sounds(world, tick_events)
+            spawn_particles(world, tick_events)
+            if world.over:
+                self.manager.switch(
+                    ResultsScene(world, self.ship_1, self.ship_2, rematch=False)
+                )
+                return
+        PARTICLES.update(elapsed)
+        draw_window(self.ship_1, self.ship_2, world.bullets, TIMESTEP.alpha)
+
+    def draw(self):
+        DIRTY_RECTS.invalidate()
+
+
+# Slow-motion replay of how the match ended
+class KillCamScene(Scene):
+    """Plays the last KILLCAM_SECONDS of a match again at KILLCAM_SPEED from
+    the snapshots of its RewindBuffer, then moves on to the results. Any key
+    press skips it.
     """
-    draw_window()
-    start_time = pygame.time.get_ticks()
 
-    # Create text
-    title = WINNER_FONT.render(f"Player {i} Choose Your Ship", 1, COLOR_CODES["yellow"])
-    subtitle = SMALL_TEXT.render(
-        f"Press Number For Corresponding Color", 1, COLOR_CODES["white"]
-    )
-    option_last = HEALTH_FONT.render(
-        f"8: {COLORS[8].capitalize()}", 1, COLOR_CODES["white"]
-    )
+    animating = True
+
+    def __init__(self, rewind: RewindBuffer, results: Scene):
+        super().__init__()
+        self.rewind = rewind
+        self.results = results
+        match = rewind.world
+        # A copy of the match to restore the snapshots into
+        self.world = World(match.intensity, match.fleet.colors)
+        self.ship_1 = Ship(self.world.ships[0])
+        self.ship_2 = Ship(self.world.ships[1])
+        self.first = max(0, len(rewind) - KILLCAM_SECONDS * TICK_RATE)
+        self.shown = None  # Index of the snapshot on screen
+
+    def enter(self):
+        super().enter()
+        PARTICLES.clear()
+
+    def update(self, events: list, elapsed: float):
+        for event in events:
+            check_universal_events(event)
+            if event.type == pygame.KEYDOWN:
+                self.manager.switch(self.results)
+                return
+        # Ticks of the original match shown so far, and how far into the next
+        played = self.age() / 1000 * TICK_RATE * KILLCAM_SPEED
+        index = self.first + int(played)
+        if index >= len(self.rewind):
+            self.manager.switch(self.results)
+            return
+        if index != self.shown:
+            health = self.world.fleet.health.copy()
+            self.rewind.rewind(len(self.rewind) - 1 - index, self.world)
+            if self.shown is not None:
+                spawn_snapshot_particles(self.world.fleet, health)
+            self.shown = index
+        PARTICLES.update(elapsed * KILLCAM_SPEED)
+        draw_window(self.ship_1, self.ship_2, self.world.bullets, 1.0, "KILL CAM")
+
+    def draw(self):
+        DIRTY_RECTS.invalidate()
 
-    # Post title text
-    WIN.blit(
-        title,
-        (
-            WIDTH / 2 - title.get_width() / 2,
-            HEIGHT / 3 - title.get_height(),
-        ),
-    )
 
-    pygame.display.update()
-    pygame.time.delay(300)
-
-    # Post subtitle text
-    WIN.blit(
-        subtitle,
-        (
-            WIDTH / 2 - subtitle.get_width() / 2,
-            HEIGHT / 3,
-        ),
-    )
+# All operations after game ends
+class ResultsScene(Scene):
+    """Handles all window events when the game ends.
+    1. Destroys the losing ship and draws winner text onto the screen
+    2. Plays winner sound after 1 second
+    3. Prompts user to play again after 3 seconds
+    4. Starts a new round on 'y', quits on 'n' or after 30 more seconds (back
+       to the intro in kiosk mode)
+    """
 
-    pygame.display.update()
-    pygame.time.delay(300)
+    prompt_shown = False
+
+    def __init__(self, world: World, ship_1: Ship, ship_2: Ship, rematch=True):
+        super().__init__()
+        self.world = world
+        self.ship_1 = ship_1
+        self.ship_2 = ship_2
+        self.rematch = rematch  # False after a replay or demo: leave after 3 s
+        self.fanfare = False
+
+    def enter(self):
+        super().enter()
+        # Check which ship has been destroyed
+        if self.ship_1.health <= 0:
+            self.ship_1.destroyed()
+        elif self.ship_2.health <= 0:
+            self.ship_2.destroyed()
+
+    def wake_at(self):
+        if self.age() < 1000:
+            return self.started + 1000
+        if self.age() < 3000:
+            return self.started + 3000
+        return self.started + 33000
+
+    def update(self, events: list, elapsed: float):
+        for event in events:
+            check_universal_events(event)
+            if event.type == pygame.KEYDOWN and self.prompt_shown:
+                # User clicked 'y' --> Wants to play again
+                if event.key == pygame.K_y:
+                    new_round()
+                    self.manager.switch(IntensityScene())
+                    return
+                # User clicked 'n' --> Does not want to play again
+                elif event.key == pygame.K_n:
+                    end_session(self.manager)
+                    return
+        # Let the final explosion play out
+        if len(PARTICLES):
+            PARTICLES.update(elapsed)
+            self.needs_draw = True
+        age = self.age()
+        # Play winner fanfare
+        if age >= 1000 and not self.fanfare:
+            SOUNDS.play("winner")
+            self.fanfare = True
+        if age >= 33000 or (age >= 3000 and not self.rematch):
+            # If no decision after 30 sec, assume users do not want to play again
+            end_session(self.manager)
+        elif (age >= 3000) != self.prompt_shown:
+            self.needs_draw = True
+
+    def draw(self):
+        # Redraw in full: nothing drawn by the previous scene may linger
+        DIRTY_RECTS.invalidate()
+        draw_window(self.ship_1, self.ship_2, self.world.bullets)
+        DIRTY_RECTS.invalidate()
+
+        # Make texts
+        text = str(self.world.winner())
+        draw_text = TEXT.render(WINNER_FONT, text, 1, COLOR_CODES["white"])
+        replay_text = TEXT.render(
+            HEALTH_FONT, "Want to play again?", 1, COLOR_CODES["white"]
+        )
+        yes_or_no = TEXT.render(
+            HEALTH_FONT, "Yes: y           No: n", 1, COLOR_CODES["white"]
+        )
 
-    # Show all color options to choose from
-    for i in range(8):
-        option = HEALTH_FONT.render(
-            f"{i}: {COLORS[i].capitalize()}", 1, COLOR_CODES["white"]
+        # Post winner text
+        WIN.blit(
+            draw_text,
+            (
+                WIDTH / 2 - draw_text.get_width() / 2,
+                HEIGHT / 2 - draw_text.get_height() / 2,
+            ),
         )
-        if i % 2 == 0:
+        # Post play again text
+        self.prompt_shown = self.age() >= 3000
+        if self.prompt_shown:
             WIN.blit(
-                option,
+                replay_text,
                 (
-                    WIDTH / 2 - option_last.get_width() * 1.5,
-                    HEIGHT / 3 + subtitle.get_height() + option.get_height() * (i // 2),
+                    WIDTH / 2 - replay_text.get_width() / 2,
+                    HEIGHT / 2 + draw_text.get_height(),
                 ),
             )
-        else:
             WIN.blit(
-                option,
+                yes_or_no,
                 (
-                    WIDTH / 2 + option_last.get_width() * 0.5,
-                    HEIGHT / 3 + subtitle.get_height() + option.get_height() * (i // 2),
+                    WIDTH / 2 - replay_text.get_width() / 2,
+                    HEIGHT / 2 + draw_text.get_height() + replay_text.get_height(),
                 ),
             )
-    WIN.blit(
-        option_last,
-        (
-            WIDTH / 2 - option_last.get_width() / 2,
-            HEIGHT / 3
-            + title.get_height()
-            + option.get_height() * (len(COLORS) // 2 - 1),
-        ),
-    )
-
-    pygame.display.update()
-
-    # Give user 10 seconds to select character
-    while pygame.time.get_ticks() - start_time < 10000:
-        for event in pygame.event.get():
-            check_universal_events(event)
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_0:
-                    return COLORS[0]
-                if event.key == pygame.K_1:
-                    return COLORS[1]
-                if event.key == pygame.K_2:
-                    return COLORS[2]
-                if event.key == pygame.K_3:
-                    return COLORS[3]
-                if event.key == pygame.K_4:
-                    return COLORS[4]
-                if event.key == pygame.K_5:
-                    return COLORS[5]
-                if event.key == pygame.K_6:
-                    return COLORS[6]
-                if event.key == pygame.K_7:
-                    return COLORS[7]
-                if event.key == pygame.K_8:
-                    return COLORS[8]
-
-        CLOCK.tick(FPS)
-    # If user does not pick a ship, randomly assign them one
-    return COLORS[random.randint(0, 9)]
+        pygame.display.update()
 
 
 # Main game loop
-def main(first_time: bool):
-    global VEL, BULLET_VEL, MAX_BULLETS, HEALTH, SHIP_COLORS, SPACE
-    pygame.display.set_caption(TITLE)
-    SPACE = pygame.transform.scale(
-        pygame.image.load(os.path.join("Assets", f"space{random.randint(1, 6)}.jpeg")),
-        (WIDTH, HEIGHT),
-    )
-    if first_time:
-        first_time = intro()
-    intesity = choose_intensity()
-    {"vel": 5, "bulllet_vel": 7.5, "max_bullets": 3, "health": 10}
-    VEL = intesity["vel"]
-    BULLET_VEL = intesity["bullet_vel"]
-    MAX_BULLETS = intesity["max_bullets"]
-    HEALTH = intesity["health"]
-
-    SHIP_COLORS[0] = choose_characters(1)
-    SHIP_COLORS[1] = choose_characters(2)
-
-    ship_1 = Ship(
-        300,
-        HEIGHT / 2 - SPACESHIP_HEIGHT,
-        SPACESHIP_WIDTH,
-        SPACESHIP_HEIGHT,
-        SHIP_COLORS[0],
-        HEALTH,
-    )
-    ship_2 = Ship(
-        900,
-        HEIGHT / 2 - SPACESHIP_HEIGHT,
-        SPACESHIP_HEIGHT,
-        SPACESHIP_HEIGHT,
-        SHIP_COLORS[1],
-        HEALTH,
-    )
+def main(first_time: bool = True):
+    """Runs the game's scenes until the players quit
 
-    winner_text = ""
-
-    run = True
-    main_game = True
-    while run:
-        CLOCK.tick(FPS)
-        # Run main game loop
-        if main_game:
-            main_game = main_game_loop(ship_1, ship_2)
-        else:
-            decide_winner(ship_1, ship_2)
-            break
-
-    main(False)
+    Args:
+        first_time (bool, optional): show the intro before the first round. Defaults to True.
+    """
+    pygame.display.set_caption(TITLE)
+    new_round()
+    SCENES.run(IntroScene() if first_time else IntensityScene(), started=LOADER.start)
+    LOADER.close()
+    if TELEMETRY:
+        TELEMETRY.close()
+    pygame.quit()
 
 
 # Only run main if file is explicitly called
 if __name__ == "__main__":
-    main(True)
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument(
+        "--record", metavar="DIR", help="save a replay of every match in DIR"
+    )
+    parser.add_argument("--replay", metavar="FILE", help="watch a recorded match")
+    parser.add_argument(
+        "--telemetry",
+        metavar="FILE",
+        help="log the statistics of every match to FILE (see telemetry.py)",
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="start with the frame profiler on"
+    )
+    parser.add_argument(
+        "--kiosk",
+        action="store_true",
+        help="run unattended: never quit on a timeout, play demo matches when idle",
+    )
+    parser.add_argument(
+        "--seek", type=int, default=0, metavar="TICK", help="start the replay at TICK"
+    )
+    parser.add_argument(
+        "--arena",
+        type=int,
+        metavar="SHIPS",
+        help="play a free-for-all between SHIPS ships in a large arena",
+    )
+    parser.add_argument(
+        "--humans",
+        type=int,
+        default=0,
+        choices=range(len(PLAYER_KEYS) + 1),
+        help="how many arena ships are played from the keyboard",
+    )
+    parser.add_argument(
+        "--intensity",
+        type=int,
+        default=0,
+        choices=range(len(INTENSITIES)),
+        help="intensity level of the arena",
+    )
+    parser.add_argument(
+        "--connect",
+        metavar="HOST:PORT",
+        help="join a networked match served by net.py",
+    )
+    args = parser.parse_args()
+    RECORD_DIR = args.record
+    if args.telemetry:
+        TELEMETRY = TelemetryWriter(args.telemetry)
+    KIOSK = args.kiosk
+    if args.profile:
+        PROFILER.toggle()
+    if args.replay:
+        SCENES.run(ReplayScene(args.replay, args.seek), started=LOADER.start)
+        LOADER.close()
+        pygame.quit()
+    elif args.connect:
+        host, _, port = args.connect.rpartition(":")
+        pygame.display.set_caption(TITLE)
+        new_round()
+        SCENES.run(NetworkScene(host, int(port)), started=LOADER.start)
+        LOADER.close()
+        pygame.quit()
+    elif args.arena:
+        pygame.display.set_caption(TITLE)
+        new_round()
+        SCENES.run(
+            ArenaScene(INTENSITIES[args.intensity], args.arena, args.humans),
+            started=LOADER.start,
+        )
+        LOADER.close()
+        pygame.quit()
+    else:
+        main(True)
@@ -0,0 +1,596 @@
+"""Networked multiplayer over UDP with asyncio.
+
+The server is authoritative: it runs the only World, at TICK_RATE, and each
+client just sends its input flags and draws the snapshots it receives. Both
+sides are asyncio DatagramProtocols, so the server plays a whole match on one
+event loop and the game's client can pump its loop once per frame.
+
+Every input packet repeats the client's last REDUNDANCY inputs, so a lost
+packet costs nothing as long as one of the next few arrives. The server
+queues new inputs and applies one per tick; when none arrived in time it
+repeats the keys held last (without a fresh fire press).
+
+Snapshots are quantized (whole pixels and health as int16) and delta-encoded
+against the latest snapshot the client acknowledged: the ship fields that
+changed, the slots of bullets that disappeared and the bullets fired since.
+Bullets in flight cost nothing, because the client advances them itself with
+the simulation's rounding. Without a usable base the server sends everything.
+
+Packets (little-endian):
+    hello     b"H"
+    welcome   b"W" player, intensity level, ship count, colors (length-prefixed)
+    input     b"I" client ms, acknowledged snapshot tick, first sequence number,
+              count, one flags byte per input
+    snapshot  b"S" tick, base tick, echoed client ms, ms the echo was held,
+              over, ship count, removed count, added count, then per ship a
+              change mask and the changed int16 fields (x, y, health), the
+              removed bullet slots and the added bullets (slot, x, y, owner)
+
+Serve a match and join it from two games:
+    python net.py --port 5555 --intensity 2
+    python main.py --connect 127.0.0.1:5555
+"""
+
+import argparse
+import asyncio
+import random
+import struct
+import time
+from collections import deque
+
+import numpy as np
+
+from bullets import to_pixels
+from simulation import INPUT_FIRE, INTENSITIES, TICK_RATE, World, duel_fleet
+
+DEFAULT_PORT = 5555
+COLORS = ["blue", "red"]
+REDUNDANCY = 8  # Past inputs repeated in every input packet
+MAX_QUEUED_INPUTS = 4  # Inputs waiting at the server; older ones only add lag
+SNAPSHOT_INTERVAL = 2  # Ticks between snapshots (30 per second)
+HISTORY = 64  # Ticks of snapshots kept on both sides to delta-encode against
+NO_BASE = 0xFFFFFFFF  # Base tick of a full snapshot, or no acknowledgement
+LINGER = 2.0  # Seconds the server repeats the final snapshot after game over
+UDP_OVERHEAD = 28  # Bytes of IPv4 and UDP headers counted per datagram
+
+HELLO = b"H"
+WELCOME = struct.Struct("<cBBB")  # tag, player, intensity level, ships
+INPUT = struct.Struct("<cIIIB")  # tag, client ms, ack, first sequence, count
+SNAPSHOT = struct.Struct("<cIIIHBBHH")
+FIELD = struct.Struct("<h")
+SHIP_FIELDS = 3  # x, y, health
+ADDED = np.dtype([("slot", "<u2"), ("x", "<i2"), ("y", "<i2"), ("owner", "u1")])
+
+
+class Snapshot:
+    """The quantized state of a match at one tick: what a client can know.
+
+    Bullets are listed by slot, in ascending order. On the server each bullet
+    also has the tick it was fired, which tells a reused slot apart from the
+    bullet that held it before.
+    """
+
+    def __init__(self, tick, ships, slots, x, y, owner, over=False, born=None):
+        self.tick = tick
+        self.ships = ships  # int16 x, y and health, one row per ship
+        self.slots = slots
+        self.x = x
+        self.y = y
+        self.owner = owner
+        self.over = over
+        self.born = born
+
+    # Snapshot of a running match
+    @classmethod
+    def capture(cls, world: World, born: np.ndarray) -> "Snapshot":
+        fleet, bullets = world.fleet, world.bullets
+        slots = np.flatnonzero(bullets.alive[: bullets.size])
+        ships = np.stack((fleet.x, fleet.y, fleet.health), axis=1).astype(np.int16)
+        return cls(
+            world.tick,
+            ships,
+            slots,
+            bullets.x[slots].astype(np.int16),
+            bullets.y[slots].astype(np.int16),
+            bullets.owner[slots].astype(np.uint8),
+            world.over,
+            born[slots],
+        )
+
+    # Same state as another snapshot
+    def same(self, other: "Snapshot") -> bool:
+        return (
+            self.tick == other.tick
+            and self.over == other.over
+            and np.array_equal(self.ships, other.ships)
+            and np.array_equal(self.slots, other.slots)
+            and np.array_equal(self.x, other.x)
+            and np.array_equal(self.y, other.y)
+            and np.array_equal(self.owner, other.owner)
+        )
+
+    # Show the snapshot in a local World
+    def apply(self, world: World):
+        """Overwrites a World's ships and bullets with this snapshot, so the
+        game can draw it like a local match.
+
+        Args:
+            world (World): a World with the match's intensity and colors
+        """
+        fleet = world.fleet
+        fleet.x[:], fleet.y[:], fleet.health[:] = self.ships.T
+        fleet.prev_x[:] = fleet.x
+        fleet.prev_y[:] = fleet.y
+        bullets = world.bullets
+        bullets.clear()
+        bullets.spawn_many(
+            self.x.astype(np.float64),
+            self.y.astype(np.float64),
+            np.zeros(len(self.slots)),
+            self.owner.astype(np.int16),
+        )
+        world.tick = self.tick
+        world.over = self.over
+
+
+# Pack a snapshot as a delta against one the client has
+def encode(
+    snapshot: Snapshot, base: Snapshot, echo_ms: int = 0, hold_ms: int = 0
+) -> bytes:
+    """Delta-encodes a server snapshot.
+
+    Args:
+        snapshot (Snapshot): the current state
+        base (Snapshot): a state the client acknowledged, or None for a full snapshot
+        echo_ms (int, optional): latest client timestamp, echoed for RTT. Defaults to 0.
+        hold_ms (int, optional): ms since that timestamp arrived. Defaults to 0.
+
+    Returns:
+        bytes: the snapshot packet
+    """
+    ships = snapshot.ships
+    if base is None:
+        changed = np.ones(ships.shape, dtype=bool)
+        removed = np.zeros(0, dtype=np.uint16)
+        added = np.arange(len(snapshot.slots))
+    else:
+        changed = ships != base.ships
+        # A bullet is kept when its slot still holds the bullet fired then
+        keys = (snapshot.slots.astype(np.int64) << 32) | snapshot.born
+        base_keys = (base.slots.astype(np.int64) << 32) | base.born
+        removed = base.slots[~np.isin(base_keys, keys)].astype(np.uint16)
+        added = np.flatnonzero(~np.isin(keys, base_keys))
+
+    parts = [
+        SNAPSHOT.pack(
+            b"S",
+            snapshot.tick,
+            NO_BASE if base is None else base.tick,
+            echo_ms & 0xFFFFFFFF,
+            min(hold_ms, 0xFFFF),
+            snapshot.over,
+            len(ships),
+            len(removed),
+            len(added),
+        )
+    ]
+    masks = (changed << np.arange(SHIP_FIELDS)).sum(axis=1)
+    for mask, values, fields in zip(masks.tolist(), ships, changed):
+        parts.append(bytes([mask]))
+        parts.append(values[fields].astype("<i2").tobytes())
+    parts.append(removed.astype("<u2").tobytes())
+    records = np.empty(len(added), dtype=ADDED)
+    records["slot"] = snapshot.slots[added]
+    records["x"] = snapshot.x[added]
+    records["y"] = snapshot.y[added]
+    records["owner"] = snapshot.owner[added]
+    parts.append(records.tobytes())
+    return b"".join(parts)
+
+
+# Rebuild a snapshot from a packet and the base it was encoded against
+def decode(data: bytes, bases: dict, direction: np.ndarray, bullet_vel: float):
+    """Decodes a snapshot packet.
+
+    Args:
+        data (bytes): the packet
+        bases (dict): earlier snapshots by tick
+        direction (np.ndarray): facing of each ship, to advance bullets
+        bullet_vel (float): the match's bullet velocity
+
+    Returns:
+        tuple: the Snapshot, echoed client ms and ms the echo was held, or
+            None if the base is no longer known
+    """
+    _, tick, base_tick, echo_ms, hold_ms, over, count, removed, added = (
+        SNAPSHOT.unpack_from(data)
+    )
+    base = None
+    if base_tick != NO_BASE:
+        base = bases.get(base_tick)
+        if base is None:
+            return None
+    offset = SNAPSHOT.size
+
+    ships = (
+        base.ships.copy()
+        if base is not None
+        else np.zeros((count, SHIP_FIELDS), dtype=np.int16)
+    )
+    for ship in range(count):
+        mask = data[offset]
+        offset += 1
+        for field in range(SHIP_FIELDS):
+            if mask >> field & 1:
+                ships[ship, field] = FIELD.unpack_from(data, offset)[0]
+                offset += FIELD.size
+    removed = np.frombuffer(data, "<u2", removed, offset)
+    offset += removed.nbytes
+    added = np.frombuffer(data, ADDED, added, offset)
+
+    # The base's surviving bullets, moved on to this tick like the server does
+    if base is not None:
+        keep = ~np.isin(base.slots, removed)
+        owner = base.owner[keep]
+        x = base.x[keep].astype(np.float64)
+        vx = bullet_vel * direction[owner]
+        for _ in range(tick - base.tick):
+            x = to_pixels(x + vx)
+        slots = np.concatenate((base.slots[keep], added["slot"]))
+        x = np.concatenate((x, added["x"]))
+        y = np.concatenate((base.y[keep], added["y"]))
+        owner = np.concatenate((owner, added["owner"]))
+    else:
+        slots, x, y, owner = added["slot"], added["x"], added["y"], added["owner"]
+    order = np.argsort(slots, kind="stable")
+    snapshot = Snapshot(
+        tick,
+        ships,
+        slots[order].astype(np.int64),
+        x[order].astype(np.int16),
+        y[order].astype(np.int16),
+        owner[order].astype(np.uint8),
+        bool(over),
+    )
+    return snapshot, echo_ms, hold_ms
+
+
+class NetConditions:
+    """Simulated network trouble for loopback tests: each datagram is dropped
+    with probability loss, or else delivered after delay +/- jitter seconds
+    (so packets can also arrive out of order).
+    """
+
+    def __init__(self, loss=0.0, delay=0.0, jitter=0.0, seed=0):
+        self.loss = loss
+        self.delay = delay
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+
+
+class Counters:
+    """Traffic and latency of one connection, as seen by one side"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.bytes_sent = 0  # Including IP and UDP headers
+        self.bytes_received = 0
+        self.packets_sent = 0
+        self.packets_received = 0
+        self.dropped = 0  # Sent packets thrown away by NetConditions
+        self.missed = 0  # Snapshots never received (lost or too late)
+        self.undecodable = 0  # Snapshots whose base was already forgotten
+        self.rtt_ms = None  # Smoothed round-trip time
+
+    # Count a sent datagram
+    def sent(self, size: int):
+        self.bytes_sent += size + UDP_OVERHEAD
+        self.packets_sent += 1
+
+    # Count a received datagram
+    def received(self, size: int):
+        self.bytes_received += size + UDP_OVERHEAD
+        self.packets_received += 1
+
+    # Fold in one round-trip measurement
+    def add_rtt(self, sample_ms: float):
+        if self.rtt_ms is None:
+            self.rtt_ms = sample_ms
+        else:
+            self.rtt_ms += (sample_ms - self.rtt_ms) / 8
+
+    # Totals and per-second rates
+    def summary(self) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "seconds": elapsed,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "sent_bytes_per_s": self.bytes_sent / elapsed,
+            "received_bytes_per_s": self.bytes_received / elapsed,
+            "packets_sent": self.packets_sent,
+            "packets_received": self.packets_received,
+            "dropped": self.dropped,
+            "missed": self.missed,
+            "undecodable": self.undecodable,
+            "rtt_ms": self.rtt_ms,
+        }
+
+
+class Endpoint(asyncio.DatagramProtocol):
+    """Shared sending side of the server and the client: counts every
+    datagram and applies the simulated NetConditions, if any.
+    """
+
+    def __init__(self, conditions: NetConditions = None):
+        self.conditions = conditions
+        self.counters = Counters()
+        self.transport = None
+        self.loop = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.loop = asyncio.get_event_loop()
+
+    # Send a datagram, through the simulated network if there is one
+    def send(self, data: bytes, addr=None, counters: Counters = None):
+        counters = counters or self.counters
+        counters.sent(len(data))
+        conditions = self.conditions
+        if conditions is None:
+            self.transport.sendto(data, addr)
+            return
+        if conditions.rng.random() < conditions.loss:
+            counters.dropped += 1
+            return
+        delay = conditions.delay + conditions.rng.uniform(
+            -conditions.jitter, conditions.jitter
+        )
+        self.loop.call_later(max(0.0, delay), self.send_now, data, addr)
+
+    # Send a delayed datagram, unless the connection closed meanwhile
+    def send_now(self, data: bytes, addr):
+        if not self.transport.is_closing():
+            self.transport.sendto(data, addr)
+
+
+class RemotePlayer:
+    """What the server knows about one connected client"""
+
+    def __init__(self, index: int, addr):
+        self.index = index
+        self.addr = addr
+        self.inputs = deque()  # Received inputs not applied yet
+        self.last_seq = 0  # Highest input sequence number queued
+        self.held = 0  # Flags applied on the last tick
+        self.ack = NO_BASE  # Newest snapshot tick the client has
+        self.echo_ms = 0  # Newest client timestamp, echoed for RTT
+        self.echo_at = 0.0  # Loop time it arrived
+        self.counters = Counters()
+
+
+class Server(Endpoint):
+    """Authoritative server for one two-player match. Create it with
+    loop.create_datagram_endpoint(), then await run().
+    """
+
+    def __init__(
+        self,
+        level: int,
+        conditions: NetConditions = None,
+        interval: int = SNAPSHOT_INTERVAL,
+    ):
+        super().__init__(conditions)
+        self.level = level
+        self.interval = interval  # Ticks between snapshots
+        self.world = World(INTENSITIES[level], COLORS)
+        self.players = {}  # Address -> RemotePlayer
+        capacity = self.world.bullets.capacity
+        self.born = np.zeros(capacity, dtype=np.int64)  # Tick each slot fired
+        self.was_alive = np.zeros(capacity, dtype=bool)
+        self.history = {0: Snapshot.capture(self.world, self.born)}
+
+    def datagram_received(self, data: bytes, addr):
+        player = self.players.get(addr)
+        tag = data[:1]
+        if tag == HELLO:
+            if player is None:
+                if len(self.players) == len(self.world.ships):
+                    return  # Match is full
+                player = RemotePlayer(len(self.players), addr)
+                self.players[addr] = player
+            player.counters.received(len(data))
+            colors = b"".join(bytes([len(c)]) + c.encode() for c in COLORS)
+            welcome = WELCOME.pack(b"W", player.index, self.level, len(COLORS))
+            self.send(welcome + colors, addr, player.counters)
+        elif tag == b"I" and player is not None:
+            player.counters.received(len(data))
+            _, sent_ms, ack, first, count = INPUT.unpack_from(data)
+            for seq, flags in enumerate(data[INPUT.size : INPUT.size + count], first):
+                if seq > player.last_seq:
+                    player.inputs.append(flags)
+                    player.last_seq = seq
+            if ack != NO_BASE and (player.ack == NO_BASE or ack > player.ack):
+                player.ack = ack
+            if sent_ms > player.echo_ms:
+                player.echo_ms = sent_ms
+                player.echo_at = self.loop.time()
+
+    # The input a player plays this tick
+    def next_input(self, player: RemotePlayer) -> int:
+        while len(player.inputs) > MAX_QUEUED_INPUTS:
+            player.inputs.popleft()
+        if player.inputs:
+            player.held = player.inputs.popleft()
+        else:
+            # Nothing arrived in time: keep the keys held, without a new press
+            player.held &= ~INPUT_FIRE
+        return player.held
+
+    # Advance the match by one tick and remember its snapshot
+    def tick(self):
+        world = self.world
+        players = sorted(self.players.values(), key=lambda player: player.index)
+        world.step([self.next_input(player) for player in players])
+        alive = world.bullets.alive
+        self.born[alive & ~self.was_alive] = world.tick
+        self.was_alive[:] = alive
+        self.history[world.tick] = Snapshot.capture(world, self.born)
+        self.history.pop(world.tick - HISTORY, None)
+
+    # Send every player the latest snapshot
+    def send_snapshots(self):
+        snapshot = self.history[self.world.tick]
+        now = self.loop.time()
+        for player in self.players.values():
+            base = self.history.get(player.ack)
+            hold_ms = int(1000 * (now - player.echo_at))
+            packet = encode(snapshot, base, player.echo_ms, hold_ms)
+            self.send(packet, player.addr, player.counters)
+
+    # Play the match
+    async def run(self, linger: float = LINGER):
+        """Waits for both players, plays the match at TICK_RATE sending a
+        snapshot every interval ticks, and returns linger seconds after game
+        over.
+        """
+        while len(self.players) < len(self.world.ships):
+            await asyncio.sleep(0.05)
+        next_tick = self.loop.time()
+        over_at = None
+        while over_at is None or self.loop.time() - over_at < linger:
+            if not self.world.over:
+                self.tick()
+                if self.world.over:
+                    over_at = self.loop.time()
+            if self.world.over or self.world.tick % self.interval == 0:
+                self.send_snapshots()
+            next_tick += 1 / TICK_RATE
+            await asyncio.sleep(max(0.0, next_tick - self.loop.time()))
+
+
+class Client(Endpoint):
+    """A player's connection to a Server. Call send_input() once per frame;
+    the newest decoded state is in latest.
+    """
+
+    def __init__(self, conditions: NetConditions = None):
+        super().__init__(conditions)
+        self.player = None  # Seat assigned by the server's welcome
+        self.intensity = None
+        self.colors = None
+        self.direction = None
+        self.seq = 0
+        self.recent = deque(maxlen=REDUNDANCY)  # Inputs repeated in each packet
+        self.snapshots = {}  # Decoded snapshots by tick, to decode deltas
+        self.latest = None
+        self.epoch = time.monotonic()
+
+    # Milliseconds since the client started, stamped on input packets
+    def now_ms(self) -> int:
+        return int(1000 * (time.monotonic() - self.epoch)) & 0xFFFFFFFF
+
+    # Send this frame's input (or keep asking to join)
+    def send_input(self, flags: int):
+        if self.player is None:
+            self.send(HELLO)
+            return
+        self.seq += 1
+        self.recent.append(flags)
+        ack = self.latest.tick if self.latest is not None else NO_BASE
+        first = self.seq - len(self.recent) + 1
+        header = INPUT.pack(b"I", self.now_ms(), ack, first, len(self.recent))
+        self.send(header + bytes(self.recent))
+
+    def datagram_received(self, data: bytes, addr):
+        self.counters.received(len(data))
+        tag = data[:1]
+        if tag == b"W" and self.player is None:
+            _, self.player, level, count = WELCOME.unpack_from(data)
+            offset, colors = WELCOME.size, []
+            for _ in range(count):
+                length = data[offset]
+                colors.append(data[offset + 1 : offset + 1 + length].decode())
+                offset += 1 + length
+            self.intensity = INTENSITIES[level]
+            self.colors = colors
+            self.direction = duel_fleet(self.intensity, colors).direction
+        elif tag == b"S" and self.player is not None:
+            tick = SNAPSHOT.unpack_from(data)[1]
+            latest = self.latest
+            if latest is not None and tick <= latest.tick:
+                return  # Duplicate or overtaken by a newer snapshot
+            decoded = decode(
+                data, self.snapshots, self.direction, self.intensity["bullet_vel"]
+            )
+            if decoded is None:
+                self.counters.undecodable += 1
+                return
+            snapshot, echo_ms, hold_ms = decoded
+            if latest is not None and not snapshot.over:
+                self.counters.missed += (tick - latest.tick) // SNAPSHOT_INTERVAL - 1
+            if echo_ms:
+                self.counters.add_rtt((self.now_ms() - echo_ms - hold_ms) & 0xFFFFFFFF)
+            self.latest = snapshot
+            self.snapshots[tick] = snapshot
+            for old in [old for old in self.snapshots if old <= tick - HISTORY]:
+                del self.snapshots[old]
+
+
+# Open a client connection
+async def connect(host: str, port: int, conditions: NetConditions = None) -> tuple:
+    """Creates a Client talking to the server at host:port.
+
+    Returns:
+        tuple: the datagram transport and the Client
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.create_datagram_endpoint(
+        lambda: Client(conditions), remote_addr=(host, port)
+    )
+
+
+# Serve one match
+async def serve(host: str, port: int, level: int, conditions: NetConditions = None):
+    loop = asyncio.get_running_loop()
+    transport, server = await loop.create_datagram_endpoint(
+        lambda: Server(level, conditions), local_addr=(host, port)
+    )
+    print(f"Serving intensity {level} on {host}:{port}, waiting for 2 players")
+    try:
+        await server.run()
+    finally:
+        transport.close()
+    winner = server.world.winner()
+    print(f"Finished at tick {server.world.tick}: {winner}")
+    for player in server.players.values():
+        summary = player.counters.summary()
+        print(
+            f"player {player.index + 1}: {summary['sent_bytes_per_s'] / 1024:.2f} "
+            f"KiB/s down, {summary['received_bytes_per_s'] / 1024:.2f} KiB/s up"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a networked match.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--intensity", type=int, default=0, choices=range(len(INTENSITIES))
+    )
+    parser.add_argument("--loss", type=float, default=0.0, help="simulated loss rate")
+    parser.add_argument(
+        "--delay", type=float, default=0.0, help="simulated one-way delay in seconds"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="simulated delay jitter in seconds"
+    )
+    args = parser.parse_args()
+    conditions = None
+    if args.loss or args.delay or args.jitter:
+        conditions = NetConditions(args.loss, args.delay, args.jitter)
+    asyncio.run(serve(args.host, args.port, args.intensity, conditions))
+
+
+if __name__ == "__main__":
+    main()
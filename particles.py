@@ -0,0 +1,221 @@
+"""Particle effects: explosions, bullet impact sparks and engine trails.
+
+Every particle lives in a row of preallocated NumPy columns (position,
+velocity, age, lifetime, drag and color), packed at the front of the pool.
+Moving, slowing and fading them is a few array operations per frame however
+many there are, and drawing them is an additive write of their pixels straight
+into the screen's pixel buffer, with no per-particle Python at all.
+
+The pool never grows: at most `capacity` particles are alive, so the cost of
+a frame's particles is bounded whatever happens in the match. Like a sound's
+oldest voice, the oldest particles make way when an effect needs the room.
+
+Effects are emitted from the events of World.step(); EXPLOSION, SPARKS and
+TRAIL are the settings the game uses, passed to emit() as keyword arguments.
+"""
+
+import numpy as np
+import pygame
+
+MAX_PARTICLES = 4096  # Particles alive at once, the hard budget
+TILE = 64  # Side of the screen tiles reported as drawn, in pixels
+
+# Effect settings for ParticleSystem.emit(); speeds are in pixels per second,
+# lifetimes in seconds, drag is the share of velocity kept after one second
+EXPLOSION = {
+    "count": 240,
+    "speed": (30, 320),
+    "life": (0.6, 1.4),
+    "drag": 0.2,
+    "colors": ((255, 220, 120), (255, 140, 40), (230, 60, 20)),
+}
+SPARKS = {
+    "count": 14,
+    "speed": (120, 360),
+    "life": (0.15, 0.4),
+    "drag": 0.02,
+    "colors": ((255, 255, 210), (255, 210, 90)),
+}
+TRAIL = {
+    "count": 2,
+    "speed": (40, 90),
+    "life": (0.2, 0.45),
+    "drag": 0.5,
+    "spread": 0.35,
+    "colors": ((110, 160, 255), (80, 110, 200)),
+}
+
+
+class ParticleSystem:
+    """A fixed-size pool of particles. emit() some, then once per frame
+    update() them and draw() them onto the screen.
+    """
+
+    def __init__(self, capacity: int = MAX_PARTICLES, seed: int = None):
+        self.capacity = capacity
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.age = np.zeros(capacity, dtype=np.float32)
+        self.life = np.ones(capacity, dtype=np.float32)
+        self.drag = np.ones(capacity, dtype=np.float32)
+        self.color = np.zeros((capacity, 3), dtype=np.float32)
+        self.columns = [
+            self.x,
+            self.y,
+            self.vx,
+            self.vy,
+            self.age,
+            self.life,
+            self.drag,
+            self.color,
+        ]
+        self.count = 0  # Live particles, in rows [0, count), oldest first
+        self.rng = np.random.default_rng(seed)  # Particles are only cosmetic
+        self.emitted = 0  # Particles created
+        self.stolen = 0  # Live particles dropped to make room for new ones
+
+    def __len__(self) -> int:
+        return self.count
+
+    # Remove every particle
+    def clear(self):
+        self.count = 0
+
+    # Drop the oldest particles
+    def discard(self, count: int):
+        kept = self.count - count
+        for column in self.columns:
+            column[:kept] = column[count : self.count]
+        self.count = kept
+        self.stolen += count
+
+    # Start new particles
+    def emit(
+        self,
+        x,
+        y,
+        count: int,
+        speed: tuple,
+        life: tuple,
+        colors: tuple,
+        drag: float = 1.0,
+        angle=0.0,
+        spread: float = np.pi,
+    ):
+        """Starts count particles at each origin, flying out at random speeds
+        within spread radians either side of angle. Makes room by dropping the
+        oldest particles once the pool is full.
+
+        Args:
+            x: x coordinate of each origin, or a single one
+            y: y coordinate of each origin, or a single one
+            count (int): particles per origin
+            speed (tuple): lowest and highest speed
+            life (tuple): shortest and longest lifetime
+            colors (tuple): RGB colors the particles pick from
+            drag (float, optional): share of velocity kept after a second. Defaults to 1.0.
+            angle (optional): direction of each origin's particles, in radians. Defaults to 0.0.
+            spread (float, optional): radians either side of angle. Defaults to a full circle.
+        """
+        x, y, angle = np.broadcast_arrays(*np.atleast_1d(x, y, angle))
+        total = min(len(x) * count, self.capacity)
+        if not total:
+            return
+        if self.count + total > self.capacity:
+            self.discard(self.count + total - self.capacity)
+        rng = self.rng
+        rows = slice(self.count, self.count + total)
+        heading = np.repeat(angle, count)[:total] + rng.uniform(-spread, spread, total)
+        velocity = rng.uniform(*speed, total)
+        self.x[rows] = np.repeat(x, count)[:total]
+        self.y[rows] = np.repeat(y, count)[:total]
+        self.vx[rows] = np.cos(heading) * velocity
+        self.vy[rows] = np.sin(heading) * velocity
+        self.age[rows] = 0
+        self.life[rows] = rng.uniform(*life, total)
+        self.drag[rows] = drag
+        self.color[rows] = np.asarray(colors, dtype=np.float32)[
+            rng.integers(len(colors), size=total)
+        ]
+        self.count += total
+        self.emitted += total
+
+    # Move, slow down and age every particle, removing the expired ones
+    def update(self, elapsed: float):
+        """Advances every particle by elapsed seconds
+
+        Args:
+            elapsed (float): seconds since the last update
+        """
+        count = self.count
+        if not count:
+            return
+        vx, vy, age = self.vx[:count], self.vy[:count], self.age[:count]
+        self.x[:count] += vx * elapsed
+        self.y[:count] += vy * elapsed
+        damping = self.drag[:count] ** elapsed
+        vx *= damping
+        vy *= damping
+        age += elapsed
+
+        # Pack the survivors at the front, keeping their order
+        alive = age < self.life[:count]
+        if not alive.all():
+            kept = int(np.count_nonzero(alive))
+            for column in self.columns:
+                column[:kept] = column[:count][alive]
+            self.count = kept
+
+    # Draw every particle
+    def draw(self, surface: pygame.Surface, scale: float = 1.0) -> list:
+        """Adds each particle's color, faded by its age, to the pixels under
+        it. The surface must not be locked by anything else.
+
+        Args:
+            surface (pygame.Surface): 32 bit surface to draw on
+            scale (float, optional): screen pixels per particle coordinate. Defaults to 1.0.
+
+        Returns:
+            list: Rects of the TILE x TILE areas drawn on, for dirty rectangles
+        """
+        count = self.count
+        if not count:
+            return []
+        width, height = surface.get_size()
+        px = (self.x[:count] * scale).astype(np.intp)
+        py = (self.y[:count] * scale).astype(np.intp)
+        fade = 1 - self.age[:count] / self.life[:count]
+        rgb = (self.color[:count] * fade[:, None]).astype(np.uint32)
+        inside = (px >= 0) & (px < width - 1) & (py >= 0) & (py < height - 1)
+        if not inside.all():
+            px, py, rgb = px[inside], py[inside], rgb[inside]
+            if not len(px):
+                return []
+
+        # Each particle is a 2x2 square: add its color to the four pixels, one
+        # channel at a time, saturating at 255
+        buffer = surface.get_buffer()
+        pixels = np.frombuffer(buffer, np.uint32)
+        row = surface.get_pitch() // 4
+        corner = py * row + px
+        shifts = surface.get_shifts()[:3]
+        for offset in (0, 1, row, row + 1):
+            index = corner + offset
+            old = pixels[index]
+            new = old & ~np.uint32(sum(255 << shift for shift in shifts))
+            for channel, shift in enumerate(shifts):
+                value = np.minimum(((old >> shift) & 255) + rgb[:, channel], 255)
+                new |= value << shift
+            pixels[index] = new
+        del pixels, buffer  # Unlocks the surface
+
+        columns = -(-width // TILE)
+        tiles = np.unique(py // TILE * columns + px // TILE).tolist()
+        return [
+            pygame.Rect(
+                tile % columns * TILE, tile // columns * TILE, TILE + 1, TILE + 1
+            )
+            for tile in tiles
+        ]
@@ -0,0 +1,196 @@
+"""Per-phase frame profiler with an in-game overlay and Chrome trace export.
+
+The game loop calls mark(phase) at the end of each stage of a frame; the time
+since the previous mark is charged to that phase. Per-frame totals and every
+individual phase span go into preallocated ring buffers, so profiling never
+allocates while a match runs. When the profiler is disabled, begin_frame(),
+mark() and end_frame() return immediately.
+
+F3 toggles the profiler and its overlay, F4 writes the recorded spans to a
+JSON file that chrome://tracing or https://ui.perfetto.dev can open.
+"""
+
+import json
+import time
+
+import numpy as np
+import pygame
+
+PHASES = [
+    "events",
+    "movement",
+    "bullets",
+    "sound",
+    "snapshots",
+    "telemetry",
+    "text",
+    "blits",
+    "particles",
+    "present",
+]
+PHASE_COLORS = [
+    (120, 120, 255),
+    (0, 200, 0),
+    (255, 160, 0),
+    (200, 0, 200),
+    (160, 160, 160),
+    (120, 80, 40),
+    (0, 220, 220),
+    (255, 255, 0),
+    (255, 130, 200),
+    (255, 60, 60),
+]
+FRAME_HISTORY = 240  # Frames kept for the overlay
+SPAN_HISTORY = 65536  # Phase spans kept for trace export
+FRAME_BUDGET = 1 / 60  # Seconds; drawn as a line on the frame graph
+
+
+class FrameProfiler:
+    """Times the phases of every frame into ring buffers."""
+
+    def __init__(self, frames: int = FRAME_HISTORY, spans: int = SPAN_HISTORY):
+        self.enabled = False
+        self.phase_index = {name: i for i, name in enumerate(PHASES)}
+        # Per-frame seconds spent in each phase, and the frame's total
+        self.phase_times = np.zeros((frames, len(PHASES)))
+        self.frame_times = np.zeros(frames)
+        self.frame = 0  # Frames recorded so far
+        # Individual spans: phase, start and duration (seconds)
+        self.span_phase = np.zeros(spans, dtype=np.int8)
+        self.span_start = np.zeros(spans)
+        self.span_duration = np.zeros(spans)
+        self.span = 0  # Spans recorded so far
+        self.frame_start = 0.0
+        self.last = 0.0  # Time of the previous mark
+        self.origin = time.perf_counter()
+
+    # Turn profiling on or off
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.last = time.perf_counter()
+
+    # Start timing a frame
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.last = time.perf_counter()
+        self.phase_times[self.frame % len(self.frame_times)] = 0.0
+
+    # Charge the time since the previous mark to a phase
+    def mark(self, phase: str):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        duration = now - self.last
+        self.phase_times[
+            self.frame % len(self.frame_times), self.phase_index[phase]
+        ] += duration
+        slot = self.span % len(self.span_start)
+        self.span_phase[slot] = self.phase_index[phase]
+        self.span_start[slot] = self.last - self.origin
+        self.span_duration[slot] = duration
+        self.span += 1
+        self.last = now
+
+    # Finish timing a frame
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.frame_times[self.frame % len(self.frame_times)] = (
+            time.perf_counter() - self.frame_start
+        )
+        self.frame += 1
+
+    # Recorded frames, oldest first
+    def history(self) -> tuple:
+        """Collects the recorded frames from the ring buffers.
+
+        Returns:
+            tuple: frame times and per-phase times, oldest frame first
+        """
+        size = len(self.frame_times)
+        count = min(self.frame, size)
+        order = (np.arange(count) + self.frame - count) % size
+        return self.frame_times[order], self.phase_times[order]
+
+    # Write the recorded spans as a Chrome trace
+    def export_chrome_trace(self, path: str):
+        """Writes every recorded span in the Chrome trace event format
+
+        Args:
+            path (str): JSON file to write
+        """
+        size = len(self.span_start)
+        count = min(self.span, size)
+        order = (np.arange(count) + self.span - count) % size
+        events = [
+            {
+                "name": PHASES[phase],
+                "cat": "frame",
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": duration * 1e6,
+                "pid": 1,
+                "tid": 1,
+            }
+            for phase, start, duration in zip(
+                self.span_phase[order].tolist(),
+                self.span_start[order].tolist(),
+                self.span_duration[order].tolist(),
+            )
+        ]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    # Draw frame-time graph and per-phase bars
+    def draw_overlay(self, surface: pygame.Surface, font) -> pygame.Rect:
+        """Draws the last frames' times as a graph and the average time per
+        phase as bars in the bottom-left corner of surface.
+
+        Args:
+            surface (pygame.Surface): surface to draw on
+            font (pygame.font.Font): font for the labels
+
+        Returns:
+            pygame.Rect: the area drawn over
+        """
+        frame_times, phase_times = self.history()
+        width, height = len(self.frame_times), 60
+        area = pygame.Rect(
+            10, surface.get_height() - height - 20 * len(PHASES) - 20, 0, 0
+        )
+        area.size = (width + 200, height + 20 * len(PHASES) + 10)
+        surface.fill((0, 0, 0), area)
+
+        # Frame time graph, scaled so the frame budget sits at mid-height
+        graph_bottom = area.top + height
+        scale = height / (2 * FRAME_BUDGET)
+        budget_y = graph_bottom - int(FRAME_BUDGET * scale)
+        pygame.draw.line(
+            surface, (90, 90, 90), (area.left, budget_y), (area.left + width, budget_y)
+        )
+        for x, frame_time in enumerate(frame_times.tolist()):
+            bar = min(height, int(frame_time * scale))
+            color = (255, 60, 60) if frame_time > FRAME_BUDGET else (0, 200, 0)
+            pygame.draw.line(
+                surface,
+                color,
+                (area.left + x, graph_bottom),
+                (area.left + x, graph_bottom - bar),
+            )
+
+        # Average of each phase over the recorded frames
+        averages = (
+            phase_times.mean(axis=0) if len(phase_times) else np.zeros(len(PHASES))
+        )
+        for i, (name, average) in enumerate(zip(PHASES, averages.tolist())):
+            y = graph_bottom + 10 + 20 * i
+            bar = min(width, int(average * scale * 4))
+            pygame.draw.rect(
+                surface, PHASE_COLORS[i], (area.left, y + 4, max(bar, 1), 12)
+            )
+            label = font.render(
+                f"{name} {average * 1000:.2f} ms", True, (255, 255, 255)
+            )
+            surface.blit(label, (area.left + width + 10, y))
+        return area
@@ -0,0 +1,245 @@
+"""Deterministic match recording and playback.
+
+The simulation is deterministic, so a match is fully described by its setup
+(intensity, ship colors, background, RNG seed) and every tick's input flags.
+A replay file stores exactly that, plus a keyframe of the world state every
+KEYFRAME_INTERVAL ticks and an index of those keyframes, so playback can jump
+to any tick without re-simulating from the start.
+
+File layout (little-endian):
+    header    magic, version, intensity, background, seed, player count, colors
+    records   tag (b"I" inputs / b"K" keyframe) + payload length + payload
+    index     (tick, record offset) for every keyframe
+    footer    index offset, keyframe count, total ticks, index magic
+
+Play a replay headless at full speed:
+    python replay.py match.swr [--seek TICK]
+"""
+
+import argparse
+import struct
+import time
+
+from simulation import World
+
+MAGIC = b"SWRP"
+INDEX_MAGIC = b"SWIX"
+VERSION = 3  # 2: hits applied in the tick they happen, 3: swept collision
+KEYFRAME_INTERVAL = 300  # Ticks between keyframes (5 seconds of play)
+FLUSH_TICKS = 60  # Ticks of inputs buffered before a record is written
+
+HEADER = struct.Struct("<4sBddHHBBIB")
+RECORD = struct.Struct("<cI")  # tag, payload length
+INDEX_ENTRY = struct.Struct("<IQ")  # keyframe tick, record offset
+FOOTER = struct.Struct("<QII4s")  # index offset, keyframes, ticks, magic
+INPUTS = b"I"
+KEYFRAME = b"K"
+
+
+class Recorder:
+    """Writes a replay of a match as it is played.
+
+    Call record() with each tick's inputs right before they are passed to
+    World.step(), and close() once the match is over.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        world: World,
+        background: int,
+        seed: int,
+        interval: int = KEYFRAME_INTERVAL,
+    ):
+        self.world = world
+        self.interval = interval
+        self.players = len(world.ships)
+        self.file = open(path, "wb")
+        self.pending = bytearray()  # Inputs not yet written
+        self.index = []  # (tick, offset) of every keyframe
+        self.ticks = 0
+
+        intensity = world.intensity
+        self.file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                intensity["vel"],
+                intensity["bullet_vel"],
+                intensity["max_bullets"],
+                intensity["health"],
+                intensity["laser"],
+                background,
+                seed,
+                self.players,
+            )
+        )
+        for ship in world.ships:
+            color = ship.color.encode()
+            self.file.write(bytes([len(color)]) + color)
+        self.write_keyframe()
+
+    # Log the inputs of one tick
+    def record(self, inputs):
+        """Adds one tick of inputs, writing a keyframe first if one is due.
+
+        Args:
+            inputs: INPUT_* flags of every player for the coming tick
+        """
+        if self.ticks and self.ticks % self.interval == 0:
+            self.flush()
+            self.write_keyframe()
+        self.pending.extend(inputs)
+        self.ticks += 1
+        if len(self.pending) >= FLUSH_TICKS * self.players:
+            self.flush()
+
+    # Write the buffered inputs
+    def flush(self):
+        if self.pending:
+            self.file.write(RECORD.pack(INPUTS, len(self.pending)))
+            self.file.write(self.pending)
+            self.pending = bytearray()
+
+    # Write the current world state and remember where it is
+    def write_keyframe(self):
+        state = self.world.get_state()
+        self.index.append((self.ticks, self.file.tell()))
+        self.file.write(RECORD.pack(KEYFRAME, len(state)))
+        self.file.write(state)
+
+    # Finish the file
+    def close(self):
+        """Writes the remaining inputs, the keyframe index and the footer"""
+        if self.file.closed:
+            return
+        self.flush()
+        index_offset = self.file.tell()
+        for tick, offset in self.index:
+            self.file.write(INDEX_ENTRY.pack(tick, offset))
+        self.file.write(
+            FOOTER.pack(index_offset, len(self.index), self.ticks, INDEX_MAGIC)
+        )
+        self.file.close()
+
+
+class Replay:
+    """A recorded match, ready to be re-simulated from its start or from any
+    tick.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self.data = file.read()
+        (
+            magic,
+            version,
+            vel,
+            bullet_vel,
+            max_bullets,
+            health,
+            laser,
+            self.background,
+            self.seed,
+            self.players,
+        ) = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay")
+        self.intensity = {
+            "vel": vel,
+            "bullet_vel": bullet_vel,
+            "max_bullets": max_bullets,
+            "health": health,
+            "laser": bool(laser),
+        }
+        offset = HEADER.size
+        self.colors = []
+        for _ in range(self.players):
+            length = self.data[offset]
+            self.colors.append(self.data[offset + 1 : offset + 1 + length].decode())
+            offset += 1 + length
+
+        index_offset, keyframes, self.ticks, magic = FOOTER.unpack_from(
+            self.data, len(self.data) - FOOTER.size
+        )
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{path} was not closed properly")
+        self.index = [
+            INDEX_ENTRY.unpack_from(self.data, index_offset + i * INDEX_ENTRY.size)
+            for i in range(keyframes)
+        ]
+        self.end = index_offset  # Records stop where the index starts
+
+    # A fresh world with the recorded setup
+    def new_world(self) -> World:
+        return World(self.intensity, self.colors)
+
+    # Inputs of every tick after a record offset
+    def inputs(self, offset: int = None):
+        """Yields each tick's inputs, as a tuple of flags per player, from the
+        record at offset (the first keyframe by default) to the end.
+        """
+        offset = self.index[0][1] if offset is None else offset
+        players = self.players
+        while offset < self.end:
+            tag, length = RECORD.unpack_from(self.data, offset)
+            offset += RECORD.size
+            if tag == INPUTS:
+                chunk = self.data[offset : offset + length]
+                for i in range(0, length, players):
+                    yield tuple(chunk[i : i + players])
+            offset += length
+
+    # Jump to a tick
+    def seek(self, tick: int) -> tuple:
+        """Restores the nearest keyframe at or before tick and simulates the
+        remaining ticks.
+
+        Args:
+            tick (int): tick to stop at
+
+        Returns:
+            tuple: the World at that tick, and an iterator over the inputs of
+                the ticks after it
+        """
+        tick = max(0, min(tick, self.ticks))
+        keyframe_tick, offset = self.index[0]
+        for entry in self.index:
+            if entry[0] <= tick:
+                keyframe_tick, offset = entry
+        world = self.new_world()
+        tag, length = RECORD.unpack_from(self.data, offset)
+        world.set_state(self.data[offset + RECORD.size : offset + RECORD.size + length])
+        inputs = self.inputs(offset)
+        while world.tick < tick:
+            world.step(next(inputs))
+        return world, inputs
+
+    # Re-run the whole match as fast as possible
+    def play(self, start: int = 0) -> World:
+        world, inputs = self.seek(start)
+        for tick_inputs in inputs:
+            world.step(tick_inputs)
+        return world
+
+
+# Play a replay headless and report the result
+def main():
+    parser = argparse.ArgumentParser(description="Re-simulate a recorded match.")
+    parser.add_argument("path", help="replay file to play")
+    parser.add_argument("--seek", type=int, default=0, help="tick to start from")
+    args = parser.parse_args()
+
+    replay = Replay(args.path)
+    start = time.perf_counter()
+    world = replay.play(args.seek)
+    elapsed = time.perf_counter() - start
+    winner = world.winner()
+    print(f"{replay.ticks} ticks recorded, {len(replay.index)} keyframes")
+    print(f"Finished at tick {world.tick}: {winner if winner else 'no winner'}")
+    print(f"Health: {', '.join(str(ship.health) for ship in world.ships)}")
+    print(f"{(world.tick - args.seek) / max(elapsed, 1e-9):.0f} ticks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Scene state machine driving every screen of the game from one loop.
+
+Each screen (intro, intensity select, character select, match, results) is a
+Scene. The SceneManager runs a single loop: while the active scene animates
+it is paced by the clock at the frame rate; while it shows a static screen
+the loop sleeps in pygame.event.wait() until input arrives or the scene's
+next scheduled change is due, so an idle cabinet uses almost no CPU.
+"""
+
+import pygame
+
+# Window events after which a static scene must be drawn again
+REDRAW_EVENTS = (pygame.VIDEORESIZE, pygame.WINDOWEXPOSED)
+
+
+class Scene:
+    """One screen of the game. Subclasses override update() and draw()."""
+
+    animating = False  # True while the scene needs frames at the frame rate
+
+    def __init__(self):
+        self.manager = None  # Set by SceneManager.switch()
+        self.started = 0  # pygame ticks when the scene became active
+        self.needs_draw = True
+
+    # Called when the scene becomes the active one
+    def enter(self):
+        self.started = pygame.time.get_ticks()
+        self.needs_draw = True
+
+    # Milliseconds since the scene became active
+    def age(self) -> int:
+        return pygame.time.get_ticks() - self.started
+
+    # pygame ticks of the scene's next change that is not caused by input
+    def wake_at(self):
+        """Tells the manager how long it may sleep without input.
+
+        Returns:
+            int: when the loop must run again at the latest, or None to sleep
+                until the next event
+        """
+        return None
+
+    # Advance the scene by one loop iteration
+    def update(self, events: list, elapsed: float):
+        """Reacts to the events since the last iteration.
+
+        Args:
+            events (list): pygame events since the last iteration
+            elapsed (float): seconds since the last iteration
+        """
+
+    # Draw the scene
+    def draw(self):
+        pass
+
+
+class SceneManager:
+    """Runs the active scene until a scene calls quit()."""
+
+    def __init__(self, clock: pygame.time.Clock, fps: int):
+        self.clock = clock
+        self.fps = fps
+        self.scene = None
+        self.running = False
+
+    # Make another scene the active one
+    def switch(self, scene: Scene):
+        scene.manager = self
+        self.scene = scene
+        scene.enter()
+
+    # Stop the loop after the current iteration
+    def quit(self):
+        self.running = False
+
+    # Wait for the next iteration: frame-paced or asleep until needed
+    def wait(self) -> tuple:
+        """Blocks until the next loop iteration is due.
+
+        Returns:
+            tuple: the events since the last iteration, and the seconds elapsed
+        """
+        scene = self.scene
+        if scene.animating or scene.needs_draw:
+            elapsed = self.clock.tick(self.fps) / 1000
+            return pygame.event.get(), elapsed
+
+        wake_at = scene.wake_at()
+        if wake_at is None:
+            first = pygame.event.wait()
+        else:
+            timeout = wake_at - pygame.time.get_ticks()
+            first = pygame.event.wait(timeout) if timeout > 0 else None
+        events = [] if first is None or first.type == pygame.NOEVENT else [first]
+        events.extend(pygame.event.get())
+        return events, self.clock.tick() / 1000
+
+    # Run scenes until one quits
+    def run(self, scene: Scene, started=None):
+        """Makes scene the active one and loops until a scene calls quit()
+
+        Args:
+            scene (Scene): the first scene
+            started (callable, optional): called once the first frame is drawn. Defaults to None.
+        """
+        self.running = True
+        self.switch(scene)
+        self.step(*self.wait())
+        if started:
+            started()
+        while self.running:
+            self.step(*self.wait())
+
+    # One loop iteration
+    def step(self, events: list, elapsed: float):
+        """Updates the active scene and draws it if needed. run() calls this
+        once per iteration; headless harnesses can call it directly with
+        their own events and timing.
+
+        Args:
+            events (list): pygame events since the last iteration
+            elapsed (float): seconds since the last iteration
+        """
+        scene = self.scene
+        if any(event.type in REDRAW_EVENTS for event in events):
+            scene.needs_draw = True
+        scene.update(events, elapsed)
+        if self.running and self.scene is scene and scene.needs_draw:
+            scene.draw()
+            scene.needs_draw = False
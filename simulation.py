@@ -0,0 +1,669 @@
+"""Headless simulation core for Python Space War.
+
+Holds the game rules (movement, firing, bullets, hits and the winning
+condition) without touching pygame, so a match can be stepped as fast as the
+CPU allows. The pygame front end in main.py turns key presses into input
+flags, calls World.step() once per frame and reacts to the returned events.
+"""
+
+import struct
+
+import numpy as np
+
+from bullets import DEFAULT_CAPACITY, BulletPool, to_pixels
+from events import EventBus
+from spatial import SpatialHash
+
+# Arena specifications
+WIDTH, HEIGHT = 1200, 600
+BORDER_X, BORDER_WIDTH = WIDTH // 2 - 5, 10
+SPACESHIP_SIZE = (90, 60)
+SPACESHIP_WIDTH = SPACESHIP_SIZE[0]
+SPACESHIP_HEIGHT = SPACESHIP_SIZE[1]
+BULLET_SIZE = (15, 6)
+BULLET_WIDTH = BULLET_SIZE[0]
+BULLET_HEIGHT = BULLET_SIZE[1]
+# Size of the N-ship arena (see arena_fleet)
+ARENA_WIDTH, ARENA_HEIGHT = 2400, 1200
+# Ticks per second the intensity velocities are tuned for
+TICK_RATE = 60
+# Intensity Metrics
+INTENSITIES = [
+    {"vel": 5, "bullet_vel": 7.5, "max_bullets": 3, "health": 10, "laser": False},
+    {"vel": 7.5, "bullet_vel": 10, "max_bullets": 6, "health": 20, "laser": False},
+    {"vel": 10, "bullet_vel": 15, "max_bullets": 10, "health": 30, "laser": False},
+    {"vel": 15, "bullet_vel": 25, "max_bullets": 15, "health": 40, "laser": False},
+    {"vel": 20, "bullet_vel": 35, "max_bullets": 30, "health": 150, "laser": True},
+]
+# Input flags, one bit per control. FIRE is a fresh key press, FIRE_HELD is the
+# fire key being held down (used by the laser intensity).
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_UP = 4
+INPUT_DOWN = 8
+INPUT_FIRE = 16
+INPUT_FIRE_HELD = 32
+# Event kinds in the EventBus returned by World.step, iterated as (kind, ship
+# index) tuples
+EVENT_FIRE = 0
+EVENT_HIT = 1
+EVENT_LASER = 2
+EVENT_GAME_OVER = 3  # Ship index is the winner
+EVENT_DEATH = 4  # Ship index is the destroyed ship
+# Binary layouts used by World.get_state/set_state
+STATE_HEADER = struct.Struct("<IBHI")  # tick, over, ships, bullets
+SHIP_STATE = struct.Struct("<iiiii")  # x, y, prev_x, prev_y, health
+# Below this many bullet-ship pairs, testing every pair beats the spatial hash
+BRUTE_FORCE_PAIRS = 4096
+
+
+# Round a coordinate the same way pygame.Rect does when assigned a float
+def to_pixel(value: float) -> int:
+    """Rounds half away from zero, matching pygame.Rect attribute assignment.
+
+    Args:
+        value (float): coordinate to round
+
+    Returns:
+        int: the rounded coordinate
+    """
+    return int(value + 0.5) if value >= 0 else -int(-value + 0.5)
+
+
+# One value per ship, from a scalar or a sequence
+def per_ship(value, count: int, dtype=np.float64) -> np.ndarray:
+    return np.broadcast_to(np.asarray(value, dtype=dtype), (count,)).copy()
+
+
+class Fleet:
+    """Every ship of a match as compact per-ship arrays, so movement, firing
+    and collision are a few vectorized passes however many ships there are.
+    Positions are whole pixels (rounded like pygame.Rect) in float columns.
+
+    Each argument is a single value shared by every ship or one value per ship.
+    """
+
+    def __init__(
+        self, x, y, width, height, colors, health, direction, min_x, max_x, max_y
+    ):
+        count = len(colors)
+        self.x = to_pixels(per_ship(x, count))
+        self.y = to_pixels(per_ship(y, count))
+        self.prev_x = self.x.copy()  # Position before the latest tick
+        self.prev_y = self.y.copy()
+        self.width = per_ship(width, count)
+        self.height = per_ship(height, count)
+        self.colors = list(colors)
+        self.health = per_ship(health, count, np.int64)
+        self.direction = per_ship(direction, count)  # +1 fires right, -1 left
+        self.min_x = per_ship(min_x, count)  # Ship may move left while x > min_x
+        self.max_x = per_ship(max_x, count)  # Ship may move right while x < max_x
+        self.max_y = per_ship(max_y, count)  # Bottom edge of the playing field
+
+    def __len__(self):
+        return len(self.colors)
+
+
+# Attribute of a ShipState kept in a column of its Fleet
+class FleetColumn:
+    def __init__(self, cast=int):
+        self.cast = cast
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, ship, owner=None):
+        if ship is None:
+            return self
+        return self.cast(getattr(ship.fleet, self.name)[ship.index])
+
+    def __set__(self, ship, value):
+        getattr(ship.fleet, self.name)[ship.index] = value
+
+
+class ShipState:
+    """The simulated state of a single ship: position, hitbox, health and the
+    horizontal band it is allowed to move in. A view of one row of a Fleet.
+    """
+
+    x = FleetColumn()
+    y = FleetColumn()
+    prev_x = FleetColumn()  # Position before the latest tick, for interpolation
+    prev_y = FleetColumn()
+    width = FleetColumn()
+    height = FleetColumn()
+    health = FleetColumn()
+    direction = FleetColumn()
+    min_x = FleetColumn(float)
+    max_x = FleetColumn(float)
+
+    def __init__(self, fleet: Fleet, index: int):
+        self.fleet = fleet
+        self.index = index
+
+    @property
+    def color(self) -> str:
+        return self.fleet.colors[self.index]
+
+    def __str__(self):
+        return f"{self.color.capitalize()} Wins!"
+
+
+# The two ships of a classic match
+def duel_fleet(intensity: dict, colors: list) -> Fleet:
+    """Player 1 on the left facing right, player 2 on the right facing left,
+    each kept to its own side of the border.
+    """
+    return Fleet(
+        x=[300, 900],
+        y=HEIGHT / 2 - SPACESHIP_HEIGHT,
+        # Player 2's hitbox has always been square
+        width=[SPACESHIP_WIDTH, SPACESHIP_HEIGHT],
+        height=SPACESHIP_HEIGHT,
+        colors=colors,
+        health=intensity["health"],
+        direction=[1, -1],
+        min_x=[0, BORDER_X + BORDER_WIDTH * 1.5],
+        max_x=[BORDER_X - SPACESHIP_WIDTH / 1.3, WIDTH - SPACESHIP_HEIGHT / 1.3],
+        max_y=HEIGHT,
+    )
+
+
+# Ships lined up on both halves of a large arena
+def arena_fleet(
+    intensity: dict,
+    count: int,
+    colors: list,
+    width: int = ARENA_WIDTH,
+    height: int = ARENA_HEIGHT,
+) -> Fleet:
+    """Even ships start on the left half facing right, odd ships on the right
+    half facing left, in a grid on each half. Every ship may roam the whole
+    arena.
+
+    Args:
+        intensity (dict): entry of INTENSITIES to play at
+        count (int): number of ships
+        colors (list): ship colors, repeated as needed
+        width (int, optional): arena width. Defaults to ARENA_WIDTH.
+        height (int, optional): arena height. Defaults to ARENA_HEIGHT.
+
+    Returns:
+        Fleet: the arena's ships
+    """
+    index = np.arange(count)
+    side = index % 2
+    per_side = -(-count // 2)
+    columns = int(np.ceil(np.sqrt(per_side / 2)))
+    rows = -(-per_side // columns)
+    slot = index // 2
+    cell_width, cell_height = width / 2 / columns, height / rows
+    return Fleet(
+        x=side * width / 2 + (slot % columns + 0.5) * cell_width - SPACESHIP_WIDTH / 2,
+        y=(slot // columns + 0.5) * cell_height - SPACESHIP_HEIGHT / 2,
+        width=SPACESHIP_WIDTH,
+        height=SPACESHIP_HEIGHT,
+        colors=[colors[i % len(colors)] for i in range(count)],
+        health=intensity["health"],
+        direction=1 - 2 * side,
+        min_x=0,
+        max_x=width - SPACESHIP_WIDTH,
+        max_y=height,
+    )
+
+
+# Handle all movement
+def move_ships(fleet: Fleet, flags: np.ndarray, vel: float, active: np.ndarray):
+    """Moves every active ship according to its input flags, keeping it within
+    its bounds
+
+    Args:
+        fleet (Fleet): the ships
+        flags (np.ndarray): each ship's INPUT_* flags for this tick
+        vel (float): distance moved per tick
+        active (np.ndarray): which ships may move
+    """
+    x, y = fleet.x, fleet.y
+    fleet.prev_x[:] = x
+    fleet.prev_y[:] = y
+    flags = np.where(active, flags, 0)
+    # Move ship left
+    go = (flags & INPUT_LEFT > 0) & (x > fleet.min_x)
+    x[:] = to_pixels(x - vel * go)
+    # Move ship right
+    go = (flags & INPUT_RIGHT > 0) & (x < fleet.max_x)
+    x[:] = to_pixels(x + vel * go)
+    # Move ship down
+    go = (flags & INPUT_DOWN > 0) & (y + fleet.height * 1.5 < fleet.max_y)
+    y[:] = to_pixels(y + vel * go)
+    # Move ship up
+    go = (flags & INPUT_UP > 0) & (y > 0)
+    y[:] = to_pixels(y - vel * go)
+
+
+# Fire bullets
+def fire_ships(
+    bullets: BulletPool, fleet: Fleet, firing: np.ndarray, bullet_vel: float
+) -> np.ndarray:
+    """Creates a new bullet in front of every firing ship, travelling the way
+    it faces.
+
+    Args:
+        bullets (BulletPool): the match's bullets
+        fleet (Fleet): the ships
+        firing (np.ndarray): which ships fire
+        bullet_vel (float): distance a bullet travels per tick
+
+    Returns:
+        np.ndarray: indices of the ships that fired; fewer than asked if the
+            pool ran full
+    """
+    index = np.flatnonzero(firing)
+    if not len(index):
+        return index
+    fired = bullets.spawn_many(
+        to_pixels(fleet.x[index] + fleet.width[index] / 1.5 - 5),
+        to_pixels(fleet.y[index] + fleet.height[index] / 1.5 + 3),
+        bullet_vel * fleet.direction[index],
+        index,
+    )
+    return index[:fired]
+
+
+# Most bullets a ship can have in flight at once
+def bullets_per_ship(intensity: dict, arena_width: int = WIDTH) -> int:
+    """Without lasers the intensity's max_bullets; a laser fires every tick
+    and each bullet lives until it has crossed the arena.
+
+    Args:
+        intensity (dict): entry of INTENSITIES
+        arena_width (int, optional): width bullets cross. Defaults to WIDTH.
+
+    Returns:
+        int: the bullet limit per ship
+    """
+    if not intensity["laser"]:
+        return intensity["max_bullets"]
+    return int(arena_width // intensity["bullet_vel"]) + 2
+
+
+# Bullets that touched a ship during the tick
+def find_hits(
+    bullets: BulletPool, x, y, width, height, prev_x, prev_y, grid: SpatialHash
+) -> tuple:
+    """Finds every bullet whose path this tick crossed a ship other than the
+    one that fired it. Small matches test every bullet against every ship;
+    larger ones file the bullets' swept boxes in the spatial hash and only
+    test the bullets near each ship. Each bullet hits at most one ship: the
+    one it touched first.
+
+    Args:
+        bullets (BulletPool): the match's bullets, already advanced
+        x, y, width, height (np.ndarray): ship hitboxes at the end of the tick
+        prev_x, prev_y (np.ndarray): ship positions at the start of the tick
+        grid (SpatialHash): broad phase covering the arena
+
+    Returns:
+        tuple: ship index, bullet slot and contact time (fraction of the
+            tick) of every hit, ordered by ship then slot
+    """
+    n = bullets.size
+    # Boxes swept by the bullets and the ships during the tick
+    bx0 = np.minimum(bullets.x[:n], bullets.prev_x[:n])
+    bx1 = np.maximum(bullets.x[:n], bullets.prev_x[:n]) + bullets.width
+    by0 = bullets.y[:n]
+    by1 = by0 + bullets.height
+    sx0, sx1 = np.minimum(x, prev_x), np.maximum(x, prev_x) + width
+    sy0, sy1 = np.minimum(y, prev_y), np.maximum(y, prev_y) + height
+
+    if n * len(x) <= BRUTE_FORCE_PAIRS:
+        ship, slot = np.divmod(np.arange(n * len(x)), n)
+        near = (bx0[slot] < sx1[ship]) & (sx0[ship] < bx1[slot])
+        near &= (by0[slot] < sy1[ship]) & (sy0[ship] < by1[slot])
+        near &= bullets.alive[slot]
+        ship, slot = ship[near], slot[near]
+    else:
+        grid.build(bx0, by0, bx1, by1, bullets.alive[:n])
+        ship, slot = grid.query(sx0, sy0, sx1, sy1)
+    own = bullets.owner[slot] != ship
+    ship, slot = ship[own], slot[own]
+    if not len(slot):
+        return ship, slot, np.zeros(0)
+
+    t, hit = bullets.sweep(
+        slot, x[ship], y[ship], width[ship], height[ship], prev_x[ship], prev_y[ship]
+    )
+    ship, slot, t = ship[hit], slot[hit], t[hit]
+    if len(slot) > 1:
+        # Earliest contact of each bullet, then ship and slot order
+        first = np.lexsort((t, slot))
+        first = first[np.r_[True, slot[first][1:] != slot[first][:-1]]]
+        first = first[np.lexsort((slot[first], ship[first]))]
+        ship, slot, t = ship[first], slot[first], t[first]
+    return ship, slot, t
+
+
+# Handle all bullet operations
+def handle_bullets(
+    fleet: Fleet,
+    bullets: BulletPool,
+    events: EventBus,
+    grid: SpatialHash,
+    arena_width: int = WIDTH,
+):
+    """Handles all bullet functions for every ship
+    1. Moves bullets in the direction they were fired
+    2. Removes bullets whose path this tick crossed another live ship,
+       emitting an EVENT_HIT at the point of contact for each
+    3. Removes bullets that went off screen
+
+    Args:
+        fleet (Fleet): the ships
+        bullets (BulletPool): the match's bullets
+        events (EventBus): the tick's events
+        grid (SpatialHash): broad phase covering the arena
+        arena_width (int, optional): bullets beyond it are removed. Defaults to WIDTH.
+    """
+    bullets.advance()
+    live = fleet.health > 0
+    # Views instead of copies while every ship is alive
+    live = slice(None) if live.all() else np.flatnonzero(live)
+    ship, slots, t = find_hits(
+        bullets,
+        fleet.x[live],
+        fleet.y[live],
+        fleet.width[live],
+        fleet.height[live],
+        fleet.prev_x[live],
+        fleet.prev_y[live],
+        grid,
+    )
+    if len(slots):
+        prev_x = bullets.prev_x[slots]
+        contact_x = prev_x + (bullets.x[slots] - prev_x) * t
+        ship = np.arange(len(fleet))[live][ship]
+        events.emit_many(EVENT_HIT, ship, contact_x, bullets.y[slots])
+        bullets.kill(slots)
+    bullets.kill(bullets.off_screen(arena_width))
+
+
+# Ops if bullet hits ship
+def bullet_hit(health: int, hits: int = 1) -> int:
+    """Decrements ship's health by 1 per hit
+
+    Args:
+        health (int): the ships current health
+        hits (int, optional): bullets that hit the ship this tick. Defaults to 1.
+
+    Returns:
+        int: the ships health decremented by the hits
+    """
+    return health - hits
+
+
+# Check to see if health is at 0
+def is_game_over(fleet: Fleet) -> bool:
+    """Check the health of every ship. Once at most one ship has health left,
+    end game. With two ships, that is as soon as either reaches 0.
+
+    Args:
+        fleet (Fleet): the ships
+
+    Returns:
+        bool: Is game over
+    """
+    return np.count_nonzero(fleet.health > 0) <= 1
+
+
+class World:
+    """A complete match. Advance it with step(); read the ships for drawing or
+    analysis. By default the classic two-player match; pass a fleet built by
+    arena_fleet() and its size for an arena with any number of ships.
+    """
+
+    def __init__(
+        self,
+        intensity: dict,
+        colors: list,
+        fleet: Fleet = None,
+        size: tuple = (WIDTH, HEIGHT),
+    ):
+        self.intensity = intensity
+        self.vel = intensity["vel"]
+        self.bullet_vel = intensity["bullet_vel"]
+        self.max_bullets = intensity["max_bullets"]
+        self.laser_mode = intensity["laser"]
+        self.width, self.height = size
+        self.fleet = fleet if fleet is not None else duel_fleet(intensity, colors)
+        self.ships = [ShipState(self.fleet, i) for i in range(len(self.fleet))]
+        self.bullets = BulletPool(
+            BULLET_WIDTH, BULLET_HEIGHT, max(DEFAULT_CAPACITY, 256 * len(self.ships))
+        )
+        self.events = EventBus()  # What happened during the last tick
+        self.grid = SpatialHash(self.width, self.height)  # Collision broad phase
+        self.tick = 0
+        self.over = False
+        self.profiler = None  # Optional profiler.FrameProfiler timing each phase
+
+    # Advance the match by one tick
+    def step(self, inputs) -> EventBus:
+        """Runs one tick of the match
+        1. Fires bullets for fresh fire presses, or lasers while fire is held
+        2. Moves ships and bullets
+        3. Applies every hit of the tick at once
+        4. Checks to see if game is over
+
+        Args:
+            inputs: INPUT_* flags of every ship
+
+        Returns:
+            EventBus: what happened during the tick, valid until the next step
+        """
+        events = self.events
+        events.clear()
+        if self.over:
+            return events
+        self.tick += 1
+        fleet = self.fleet
+        flags = np.asarray(inputs)
+        alive = fleet.health > 0
+
+        # Check bullets fire
+        if not self.laser_mode:
+            firing = alive & (flags & INPUT_FIRE > 0)
+            firing &= self.bullets.owner_counts(len(fleet)) < self.max_bullets
+            fired = fire_ships(self.bullets, fleet, firing, self.bullet_vel)
+
+        # Lasers fire every tick while held
+        else:
+            firing = alive & (flags & INPUT_FIRE_HELD > 0)
+            if firing.any():
+                events.emit(EVENT_LASER, int(firing.argmax()))
+            fired = fire_ships(self.bullets, fleet, firing, self.bullet_vel)
+        events.emit_many(EVENT_FIRE, fired, fleet.x[fired], fleet.y[fired])
+
+        move_ships(fleet, flags, self.vel, alive)
+        if self.profiler:
+            self.profiler.mark("movement")
+
+        # Check bullet collisions and apply the damage in the same tick
+        handle_bullets(fleet, self.bullets, events, self.grid, self.width)
+        if len(events):
+            fleet.health[:] = bullet_hit(
+                fleet.health, events.count(EVENT_HIT, len(fleet))
+            )
+            dead = np.flatnonzero(alive & (fleet.health <= 0))
+            events.emit_many(
+                EVENT_DEATH,
+                dead,
+                fleet.x[dead] + fleet.width[dead] / 2,
+                fleet.y[dead] + fleet.height[dead] / 2,
+            )
+        if self.profiler:
+            self.profiler.mark("bullets")
+
+        # Check for winning condition
+        if is_game_over(fleet):
+            self.over = True
+            # Report the index of the surviving ship
+            events.emit(EVENT_GAME_OVER, self.winner().index)
+        return events
+
+    # Serialize everything that changes during a match
+    def get_state(self) -> bytes:
+        """Packs the match state (ships and live bullets) into a compact binary
+        blob that set_state() can restore.
+
+        Returns:
+            bytes: the packed state
+        """
+        bullets = self.bullets
+        slots = np.flatnonzero(bullets.alive[: bullets.size])
+        parts = [STATE_HEADER.pack(self.tick, self.over, len(self.ships), len(slots))]
+        for ship in self.ships:
+            parts.append(
+                SHIP_STATE.pack(ship.x, ship.y, ship.prev_x, ship.prev_y, ship.health)
+            )
+        for column in (bullets.x, bullets.prev_x, bullets.y, bullets.vx):
+            parts.append(column[slots].tobytes())
+        parts.append(bullets.owner[slots].tobytes())
+        return b"".join(parts)
+
+    # Restore a state produced by get_state()
+    def set_state(self, data: bytes):
+        """Overwrites the match state with one packed by get_state() on a World
+        created with the same intensity.
+
+        Args:
+            data (bytes): the packed state
+        """
+        tick, over, ship_count, count = STATE_HEADER.unpack_from(data)
+        offset = STATE_HEADER.size
+        for ship in self.ships[:ship_count]:
+            ship.x, ship.y, ship.prev_x, ship.prev_y, ship.health = (
+                SHIP_STATE.unpack_from(data, offset)
+            )
+            offset += SHIP_STATE.size
+        self.tick, self.over = tick, bool(over)
+
+        columns = []
+        for dtype in (np.float64, np.float64, np.float64, np.float64, np.int16):
+            columns.append(np.frombuffer(data, dtype, count, offset))
+            offset += columns[-1].nbytes
+        x, prev_x, y, vx, owner = columns
+        bullets = self.bullets
+        bullets.clear()
+        for i in range(count):
+            bullets.spawn(x[i], y[i], vx[i], int(owner[i]))
+        bullets.prev_x[:count] = prev_x
+
+    # Winner of a finished match
+    def winner(self) -> ShipState:
+        """Returns the surviving ship (the last one if nobody survived), or None
+        if the match is still running
+        """
+        if not self.over:
+            return None
+        alive = np.flatnonzero(self.fleet.health > 0)
+        return self.ships[int(alive[0]) if len(alive) else -1]
+
+
+# Run a whole match without a display
+def play_match(
+    intensity: dict, colors: list, controllers: list, max_ticks: int = 36000
+) -> World:
+    """Plays a match to completion as fast as possible.
+
+    Args:
+        intensity (dict): entry of INTENSITIES to play at
+        colors (list): colors of player 1 and player 2
+        controllers (list): one callable per player, called as
+            controller(world, index) and returning that player's INPUT_* flags
+        max_ticks (int, optional): give up after this many ticks. Defaults to 36000.
+
+    Returns:
+        World: the finished (or timed out) match
+    """
+    world = World(intensity, colors)
+    while not world.over and world.tick < max_ticks:
+        world.step([controllers[0](world, 0), controllers[1](world, 1)])
+    return world
+
+
+# Scripted player for demo matches and automated runs
+def chase_controller(rng):
+    """Builds a controller that follows the opponent up and down, drifts
+    sideways at random and fires when the two ships are roughly level.
+
+    Args:
+        rng (random.Random): source of the scripted choices
+
+    Returns:
+        callable: controller(world, index) returning INPUT_* flags
+    """
+
+    def controller(world: World, index: int) -> int:
+        ship = world.ships[index]
+        gap = world.ships[1 - index].y - ship.y
+        flags = 0
+        if gap > world.vel:
+            flags |= INPUT_DOWN
+        elif gap < -world.vel:
+            flags |= INPUT_UP
+        if rng.random() < 0.3:
+            flags |= rng.choice((INPUT_LEFT, INPUT_RIGHT))
+        if abs(gap) < ship.height and rng.random() < 0.1:
+            flags |= INPUT_FIRE | INPUT_FIRE_HELD
+        return flags
+
+    return controller
+
+
+# Scripted players for every ship of an arena at once
+def swarm_controller(rng: np.random.Generator, standoff: float = 300):
+    """Builds a controller that steers every ship to a spot standoff pixels
+    behind its nearest enemy (preferring enemies it faces), level with it, and fires while the enemy is
+    ahead and roughly level. Ships also drift at random so they do not lock
+    into stalemates.
+
+    Args:
+        rng (np.random.Generator): source of the scripted choices
+        standoff (float, optional): horizontal distance kept from the target. Defaults to 300.
+
+    Returns:
+        callable: controller(world) returning the INPUT_* flags of every ship
+    """
+
+    def controller(world: World) -> np.ndarray:
+        fleet = world.fleet
+        count = len(fleet)
+        cx = fleet.x + fleet.width / 2
+        cy = fleet.y + fleet.height / 2
+        dx = cx[None, :] - cx[:, None]
+        dy = cy[None, :] - cy[:, None]
+        # Prefer enemies in front, which can be shot without turning around
+        behind = dx * fleet.direction[:, None] <= 0
+        distance = np.abs(dx) + np.abs(dy) + behind * (world.width + world.height)
+        distance[:, fleet.health <= 0] = np.inf
+        np.fill_diagonal(distance, np.inf)
+        target = distance.argmin(axis=1)
+        rows = np.arange(count)
+        dx = dx[rows, target]
+        dy = dy[rows, target]
+
+        vel = world.vel
+        ahead = dx * fleet.direction > 0
+        move_x = dx - fleet.direction * standoff
+        flags = np.where(dy > vel, INPUT_DOWN, np.where(dy < -vel, INPUT_UP, 0))
+        flags |= np.where(
+            move_x > vel, INPUT_RIGHT, np.where(move_x < -vel, INPUT_LEFT, 0)
+        )
+        drift = rng.random(count) < 0.2
+        flags[drift] ^= rng.choice(
+            (INPUT_LEFT, INPUT_RIGHT, INPUT_UP, INPUT_DOWN), np.count_nonzero(drift)
+        )
+        fire = ahead & (np.abs(dy) < fleet.height) & (rng.random(count) < 0.2)
+        flags |= np.where(fire, INPUT_FIRE | INPUT_FIRE_HELD, 0)
+        return flags
+
+    return controller
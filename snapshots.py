@@ -0,0 +1,196 @@
+"""Fixed-layout binary snapshots of a match and a rewind buffer of them.
+
+A snapshot is one record of a NumPy structured dtype built for a World's
+ship count: a header (tick, game over, live bullets), one row per ship and
+a fixed number of bullet rows, the most bullets the match can ever have in
+flight (simulation.bullets_per_ship). Only the first `bullets` rows are used.
+Bullets are saved with the pool slot they occupy, so restoring one gives back
+the very same pool and the match continues exactly as it would have.
+
+Every field is at a fixed offset, so taking a snapshot is a handful of array
+copies into memory allocated once, and record.tobytes() / from_bytes() are
+the same bytes on disk or over the wire. The simulation has no random state
+of its own; the tick is all the timing there is to save.
+
+RewindBuffer keeps the last few seconds of snapshots in one preallocated
+array, taken every tick, for instant rewind and the kill cam.
+"""
+
+import numpy as np
+
+from simulation import TICK_RATE, World, bullets_per_ship
+
+REWIND_SECONDS = 5  # Seconds of play a RewindBuffer keeps by default
+
+SHIP = np.dtype(
+    [
+        ("x", "<i2"),
+        ("y", "<i2"),
+        ("prev_x", "<i2"),
+        ("prev_y", "<i2"),
+        ("health", "<i2"),
+    ]
+)
+# Bullet x moves by bullet_vel, which can be a half pixel: float32 keeps it exact
+BULLET = np.dtype(
+    [
+        ("slot", "<u4"),
+        ("owner", "<u2"),
+        ("x", "<f4"),
+        ("prev_x", "<f4"),
+        ("y", "<i2"),
+        ("vx", "<f4"),
+    ]
+)
+
+
+# Record type of the snapshots of a match
+def snapshot_dtype(world: World) -> np.dtype:
+    """Builds the fixed layout of a World's snapshots
+
+    Args:
+        world (World): the match to snapshot
+
+    Returns:
+        np.dtype: structured record type of one snapshot
+    """
+    limit = len(world.ships) * bullets_per_ship(world.intensity, world.width)
+    return np.dtype(
+        [
+            ("tick", "<u4"),
+            ("over", "u1"),
+            ("bullets", "<u4"),
+            ("ships", SHIP, (len(world.ships),)),
+            ("bullet_rows", BULLET, (limit,)),
+        ]
+    )
+
+
+# Save the state of a match into a snapshot record
+def take(world: World, record: np.ndarray):
+    """Copies everything that changes during a match into record
+
+    Args:
+        world (World): the match
+        record (np.ndarray): 0-d array of snapshot_dtype(world) to overwrite
+    """
+    fleet, bullets = world.fleet, world.bullets
+    record["tick"] = world.tick
+    record["over"] = world.over
+    ships = record["ships"]
+    ships["x"] = fleet.x
+    ships["y"] = fleet.y
+    ships["prev_x"] = fleet.prev_x
+    ships["prev_y"] = fleet.prev_y
+    ships["health"] = fleet.health
+
+    slots = np.flatnonzero(bullets.alive[: bullets.size])
+    count = len(slots)
+    rows = record["bullet_rows"][:count]
+    rows["slot"] = slots
+    rows["owner"] = bullets.owner[slots]
+    rows["x"] = bullets.x[slots]
+    rows["prev_x"] = bullets.prev_x[slots]
+    rows["y"] = bullets.y[slots]
+    rows["vx"] = bullets.vx[slots]
+    record["bullets"] = count
+
+
+# Put a match back in the state of a snapshot
+def restore(world: World, record: np.ndarray):
+    """Overwrites the match state with a snapshot taken from a World created
+    with the same intensity and fleet
+
+    Args:
+        world (World): the match
+        record (np.ndarray): 0-d array of snapshot_dtype(world)
+    """
+    fleet = world.fleet
+    world.tick = int(record["tick"])
+    world.over = bool(record["over"])
+    ships = record["ships"]
+    fleet.x[:] = ships["x"]
+    fleet.y[:] = ships["y"]
+    fleet.prev_x[:] = ships["prev_x"]
+    fleet.prev_y[:] = ships["prev_y"]
+    fleet.health[:] = ships["health"]
+
+    rows = record["bullet_rows"][: int(record["bullets"])]
+    world.bullets.restore(
+        rows["slot"].astype(np.intp),
+        rows["x"],
+        rows["prev_x"],
+        rows["y"],
+        rows["vx"],
+        rows["owner"].astype(np.int16),
+    )
+
+
+# Read a snapshot saved with record.tobytes()
+def from_bytes(world: World, data: bytes) -> np.ndarray:
+    """Returns the snapshot record stored in data, for restore()
+
+    Args:
+        world (World): the match the snapshot was taken from
+        data (bytes): output of record.tobytes()
+
+    Returns:
+        np.ndarray: 0-d array of snapshot_dtype(world)
+    """
+    return np.frombuffer(data, snapshot_dtype(world), 1).reshape(())
+
+
+class RewindBuffer:
+    """Ring buffer of the latest snapshots of a match. Call push() after
+    every World.step(); older snapshots are overwritten once it is full.
+    """
+
+    def __init__(self, world: World, seconds: float = REWIND_SECONDS):
+        self.world = world
+        self.records = np.empty(int(seconds * TICK_RATE), snapshot_dtype(world))
+        # Touch every page now rather than during the first pass of play
+        self.records.view(np.uint8).fill(0)
+        self.head = 0  # Slot the next snapshot goes into
+        self.count = 0  # Snapshots held, up to len(self.records)
+
+    def __len__(self) -> int:
+        return self.count
+
+    # Snapshot the match as it is now
+    def push(self):
+        take(self.world, self.records[self.head, ...])
+        self.head = (self.head + 1) % len(self.records)
+        self.count = min(self.count + 1, len(self.records))
+
+    # A held snapshot, oldest first
+    def __getitem__(self, index: int) -> np.ndarray:
+        """Returns the index-th held snapshot, counting from the oldest; negative
+        indices count back from the latest
+
+        Args:
+            index (int): which snapshot
+
+        Returns:
+            np.ndarray: 0-d snapshot record, valid until it is overwritten
+        """
+        if not -self.count <= index < self.count:
+            raise IndexError("snapshot not held")
+        index %= self.count
+        return self.records[(self.head - self.count + index) % len(self.records), ...]
+
+    # Go back in time
+    def rewind(self, ticks: int, world: World = None):
+        """Restores the snapshot taken ticks ticks before the latest one, or
+        the oldest held if that is further back. Restored into the buffer's
+        own match, snapshots newer than it are dropped so play can carry on
+        from there; another World (the kill cam's) leaves the buffer as is.
+
+        Args:
+            ticks (int): how far back to go
+            world (World, optional): where to restore it. Defaults to the buffer's match.
+        """
+        back = min(ticks, self.count - 1)
+        restore(world or self.world, self[-1 - back])
+        if world is None or world is self.world:
+            self.head = (self.head - back) % len(self.records)
+            self.count -= back
@@ -0,0 +1,193 @@
+"""Voice-limited playback of the game's sound effects.
+
+Every effect is decoded into memory once, when it is registered. Playing one
+then goes through its limits instead of grabbing a free mixer channel:
+- voices: the most copies of the sound that play at once. Past it, the
+  oldest copy is restarted with the new one instead of taking another
+  channel.
+- min_interval: plays closer together than this many milliseconds are
+  coalesced into the one already playing.
+- reserved: the sound gets channels of its own that nothing else can take,
+  so important cues are heard however busy the match is.
+The number of channels mixed at once is bounded by the voices registered,
+whatever the fire rate.
+
+Given a loader.Loader, opening the mixer, decoding the effects and starting
+the music all happen on its thread instead of blocking startup. Effects that
+are not decoded yet are skipped; reserved ones are waited for.
+
+Without an audio device the mixer does not open, and every method quietly
+does nothing instead: the game plays on in silence.
+"""
+
+import os
+from concurrent.futures import Future
+
+import pygame
+
+from loader import Loader, run_now
+
+ASSETS_DIR = "Assets"
+MIXER_CHANNELS = 16  # Channels allocated on the mixer
+
+
+class SoundManager:
+    """Named sound effects with per-sound voice and rate limits. Opens the
+    mixer if it is not open yet.
+    """
+
+    def __init__(
+        self,
+        directory: str = ASSETS_DIR,
+        channels: int = MIXER_CHANNELS,
+        loader: Loader = None,
+    ):
+        self.directory = directory
+        self.loader = loader  # Where to load; None loads right away
+        self.reserved = 0  # Channels set aside for reserved sounds
+        self.sounds = {}  # name -> Future of the decoded Sound
+        self.limits = {}  # name -> (voices, min_interval, reserved)
+        self.channels = {}  # name -> own Channels of a reserved sound
+        self.voices = {}  # name -> Channels it played on, oldest first
+        self.last_played = {}  # name -> get_ticks() of its last play
+        self.played = 0  # Plays that started a voice
+        self.coalesced = 0  # Plays merged into one already playing
+        self.stolen = 0  # Plays that restarted the sound's oldest voice
+        self.dropped = 0  # Plays with no free channel
+        self.unready = 0  # Plays of effects not decoded yet
+        self.opened = self.defer(self.open, channels)
+
+    # Run a loading step on the loader, or now without one
+    def defer(self, function, *args) -> Future:
+        if self.loader is None:
+            return run_now(function, *args)
+        return self.loader.submit(function, *args)
+
+    # Open the mixer, setting aside the channels of reserved sounds so far
+    def open(self, channels: int):
+        if not pygame.mixer.get_init():
+            try:
+                pygame.mixer.init()
+            except pygame.error:
+                return  # No audio device: play nothing
+        pygame.mixer.set_num_channels(channels)
+        pygame.mixer.set_reserved(self.reserved)
+
+    # Start the background music
+    def music(self, file: str):
+        """Streams a music file on a loop, once the mixer is open
+
+        Args:
+            file (str): file name inside the assets directory
+        """
+        self.defer(self.start_music, file)
+
+    # Load and play the music; runs on the loader
+    def start_music(self, file: str):
+        self.opened.result()
+        if not pygame.mixer.get_init():
+            return
+        pygame.mixer.music.load(os.path.join(self.directory, file))
+        pygame.mixer.music.play()
+
+    # Register a sound effect
+    def load(
+        self,
+        name: str,
+        file: str,
+        voices: int = 1,
+        min_interval: int = 0,
+        reserved: bool = False,
+        volume: float = 1.0,
+    ):
+        """Decodes a sound file and registers it under name.
+
+        Args:
+            name (str): name to play it by
+            file (str): file name inside the assets directory
+            voices (int, optional): copies that can play at once. Defaults to 1.
+            min_interval (int, optional): milliseconds within which repeats are coalesced. Defaults to 0.
+            reserved (bool, optional): give the sound channels of its own. Defaults to False.
+            volume (float, optional): playback volume, 0 to 1. Defaults to 1.0.
+        """
+        first = self.reserved
+        if reserved:
+            self.reserved += voices
+        self.limits[name] = (voices, min_interval, reserved)
+        self.voices[name] = []
+        self.sounds[name] = self.defer(
+            self.decode, name, file, volume, range(first, self.reserved)
+        )
+
+    # Decode a sound file and set up its reserved channels
+    def decode(
+        self, name: str, file: str, volume: float, channels: range
+    ) -> pygame.mixer.Sound:
+        self.opened.result()
+        if not pygame.mixer.get_init():
+            return None
+        sound = pygame.mixer.Sound(os.path.join(self.directory, file))
+        sound.set_volume(volume)
+        if channels:
+            pygame.mixer.set_reserved(channels.stop)
+            self.channels[name] = [pygame.mixer.Channel(i) for i in channels]
+        return sound
+
+    # Play a sound within its limits
+    def play(self, name: str) -> bool:
+        """Starts the named sound unless it is coalesced with a recent play.
+
+        Args:
+            name (str): name it was registered under
+
+        Returns:
+            bool: whether the sound started; never without a mixer
+        """
+        future = self.sounds[name]
+        voices, min_interval, reserved = self.limits[name]
+        if reserved:
+            sound = self.loader.result(future) if self.loader else future.result()
+        elif future.done():
+            sound = future.result()
+        else:
+            self.unready += 1
+            return False
+        if sound is None or not pygame.mixer.get_init():
+            return False
+        now = pygame.time.get_ticks()
+        last = self.last_played.get(name)
+        if last is not None and now - last < min_interval:
+            self.coalesced += 1
+            return False
+
+        # Voices of this sound still playing, oldest first
+        playing = [
+            channel
+            for channel in self.voices[name]
+            if channel.get_busy() and channel.get_sound() is sound
+        ]
+        if len(playing) >= voices:
+            channel = playing.pop(0)
+            self.stolen += 1
+        elif name in self.channels:
+            channel = next(c for c in self.channels[name] if c not in playing)
+        else:
+            channel = pygame.mixer.find_channel()
+            if channel is None:
+                self.dropped += 1
+                return False
+        channel.play(sound)
+        playing.append(channel)
+        self.voices[name] = playing
+        self.last_played[name] = now
+        self.played += 1
+        return True
+
+    # Silence every sound effect
+    def stop(self):
+        if not pygame.mixer.get_init():
+            return
+        for name, future in self.sounds.items():
+            if future.done() and future.result() is not None:
+                future.result().stop()
+            self.voices[name] = []
@@ -0,0 +1,111 @@
+"""Uniform-grid spatial hash for the collision broad phase.
+
+Items are axis-aligned boxes given as NumPy columns (bullets, ships, later
+obstacles). Each item is filed under the grid cell holding its top-left
+corner, and queries grow their box by the largest item, so every item that
+can overlap a query box is found exactly once, without deduplication.
+
+The grid is rebuilt every tick, but incrementally: it keeps the previous
+tick's item order, sorted by cell. Objects rarely change cells from one tick
+to the next, so that order is still sorted or nearly so. Nothing is sorted
+when no item moved across a cell boundary; otherwise a stable sort (timsort,
+linear on nearly sorted runs) repairs it.
+"""
+
+import numpy as np
+
+DEFAULT_CELL_SIZE = 64  # Pixels; about the size of a ship
+
+
+class SpatialHash:
+    """Items sorted by grid cell, plus where each cell starts in that order.
+
+    Cells are numbered row by row, so the cells of one grid row that a query
+    box covers form a single contiguous run of items.
+    """
+
+    def __init__(self, width: float, height: float, cell_size: int = DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cols = max(1, -(-int(width) // cell_size))
+        self.rows = max(1, -(-int(height) // cell_size))
+        self.cells = self.cols * self.rows  # Also the key of left-out items
+        self.order = np.zeros(0, dtype=np.int64)  # Item indices sorted by cell
+        self.starts = np.zeros(self.cells + 2, dtype=np.int64)
+        self.x0 = self.y0 = self.x1 = self.y1 = np.zeros(0)
+        self.max_width = self.max_height = 0.0  # Largest filed item
+        self.sorts = 0  # Builds that had to re-sort
+
+    # Grid column and row of points, clamped to the grid
+    def cell(self, x: np.ndarray, y: np.ndarray) -> tuple:
+        cx = np.clip(np.floor_divide(x, self.cell_size), 0, self.cols - 1)
+        cy = np.clip(np.floor_divide(y, self.cell_size), 0, self.rows - 1)
+        return cx.astype(np.int64), cy.astype(np.int64)
+
+    # File every item
+    def build(self, x0, y0, x1, y1, valid: np.ndarray = None):
+        """Files items i covering [x0[i], x1[i]) x [y0[i], y1[i]).
+
+        Args:
+            x0, y0, x1, y1 (np.ndarray): item boxes
+            valid (np.ndarray, optional): items to file; the rest are left out.
+                Defaults to all.
+        """
+        n = len(x0)
+        cx, cy = self.cell(x0, y0)
+        keys = cy * self.cols + cx
+        if valid is not None:
+            keys[~valid] = self.cells
+
+        # Start from last build's order, adjusted to the new item count
+        order = self.order
+        if len(order) > n:
+            order = order[order < n]
+        elif len(order) < n:
+            order = np.concatenate([order, np.arange(len(order), n)])
+        sorted_keys = keys[order]
+        if n > 1 and (sorted_keys[1:] < sorted_keys[:-1]).any():
+            resort = np.argsort(sorted_keys, kind="stable")
+            order = order[resort]
+            sorted_keys = sorted_keys[resort]
+            self.sorts += 1
+        self.order = order
+        counts = np.bincount(sorted_keys, minlength=self.cells + 1)
+        self.starts = np.concatenate(([0], np.cumsum(counts)))
+
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        filed = keys < self.cells
+        self.max_width = float((x1 - x0)[filed].max()) if filed.any() else 0.0
+        self.max_height = float((y1 - y0)[filed].max()) if filed.any() else 0.0
+
+    # Pairs of query boxes and items that overlap
+    def query(self, x0, y0, x1, y1) -> tuple:
+        """Finds every filed item overlapping each query box (open intervals:
+        touching edges do not count).
+
+        Args:
+            x0, y0, x1, y1 (np.ndarray): query boxes
+
+        Returns:
+            tuple: query indices and item indices of the overlapping pairs
+        """
+        # Items filed up to one item size above-left of the box can reach it
+        cx0, cy0 = self.cell(x0 - self.max_width, y0 - self.max_height)
+        cx1, cy1 = self.cell(x1, y1)
+
+        # One run of items per (query, grid row)
+        rows = cy1 - cy0 + 1
+        query = np.repeat(np.arange(len(x0)), rows)
+        first = np.repeat(np.cumsum(rows) - rows, rows)  # Query's first entry
+        row = cy0[query] + np.arange(len(query)) - first
+        begin = self.starts[row * self.cols + cx0[query]]
+        count = self.starts[row * self.cols + cx1[query] + 1] - begin
+
+        # Expand the runs into (query, item) pairs
+        query = np.repeat(query, count)
+        shift = np.repeat(begin - np.cumsum(count) + count, count)
+        entry = shift + np.arange(len(query))
+        item = self.order[entry]
+
+        overlap = (self.x0[item] < x1[query]) & (x0[query] < self.x1[item])
+        overlap &= (self.y0[item] < y1[query]) & (y0[query] < self.y1[item])
+        return query[overlap], item[overlap]
@@ -0,0 +1,420 @@
+"""Match telemetry: per-tick and per-match statistics in a columnar log.
+
+During a match, MatchTelemetry.tick() copies a few numbers per ship (health,
+shots fired, damage taken, bullets in flight) into a preallocated row buffer.
+Full buffers go through a queue to a background thread, which writes each
+one to the log as a chunk. The game loop never touches the file. When the
+match ends, one row sums it up: intensity, colors, winner, length and totals.
+That row is written as soon as the match ends.
+
+A log holds two tables, "ticks" and "matches". Each chunk stores one table's
+rows column by column, so an analysis reads just the columns it needs.
+TelemetryLog.column() loads a whole column from every chunk into one NumPy
+array. Logs are append-only: opening an existing log carries on after its
+last chunk. If the game stops without closing the log, it is still readable
+up to the last complete chunk.
+
+File layout (little-endian):
+    header    magic, version
+    chunks    table, row count, then each column of the rows in schema order
+    index     (table, rows, chunk offset) of every chunk
+    footer    index offset, chunk count, index magic
+
+Summarize a log by intensity level:
+    python telemetry.py telemetry.swt
+"""
+
+import argparse
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+from simulation import EVENT_FIRE, EVENT_HIT, INTENSITIES, World
+
+MAGIC = b"SWTL"
+INDEX_MAGIC = b"SWTI"
+VERSION = 1
+CHUNK_ROWS = 4096  # Rows buffered per table before a chunk is written
+
+HEADER = struct.Struct("<4sB")  # magic, version
+CHUNK = struct.Struct("<BI")  # table, rows
+INDEX_ENTRY = struct.Struct("<BIQ")  # table, rows, chunk offset
+FOOTER = struct.Struct("<QI4s")  # index offset, chunks, magic
+
+# One row per ship per tick
+TICK = np.dtype(
+    [
+        ("match", "<u4"),
+        ("tick", "<u4"),
+        ("ship", "u1"),
+        ("health", "<i2"),
+        ("shots", "<u2"),  # Bullets fired this tick
+        ("damage", "<u2"),  # Hits taken this tick
+        ("bullets", "<u2"),  # Own bullets in flight after the tick
+    ]
+)
+# One row per match
+MATCH = np.dtype(
+    [
+        ("match", "<u4"),
+        ("started", "<f8"),  # Unix time
+        ("intensity", "i1"),  # Index in INTENSITIES, -1 for any other
+        ("demo", "u1"),  # Played by scripted ships
+        ("color_1", "S8"),
+        ("color_2", "S8"),
+        ("winner", "i1"),  # Ship index, -1 if the match was abandoned
+        ("ticks", "<u4"),
+        ("seconds", "<f4"),  # Wall-clock length
+        ("shots_1", "<u4"),
+        ("shots_2", "<u4"),
+        ("damage_1", "<u4"),
+        ("damage_2", "<u4"),
+    ]
+)
+TABLES = ("ticks", "matches")
+SCHEMAS = (TICK, MATCH)
+
+
+# Chunks of a log
+def read_index(data) -> tuple:
+    """Reads the index of a log, or finds the chunks one by one when the log
+    was not closed properly
+
+    Args:
+        data: the whole file, as bytes or an mmap
+
+    Returns:
+        tuple: (table, rows, offset) of every complete chunk, and the offset
+            where the chunks end
+    """
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} telemetry log")
+    if len(data) >= HEADER.size + FOOTER.size:
+        index_offset, count, magic = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+        if magic == INDEX_MAGIC:
+            chunks = [
+                INDEX_ENTRY.unpack_from(data, index_offset + i * INDEX_ENTRY.size)
+                for i in range(count)
+            ]
+            return chunks, index_offset
+
+    chunks = []
+    offset = HEADER.size
+    while offset + CHUNK.size <= len(data):
+        table, rows = CHUNK.unpack_from(data, offset)
+        if table >= len(SCHEMAS):
+            break
+        end = offset + CHUNK.size + rows * SCHEMAS[table].itemsize
+        if end > len(data):
+            break
+        chunks.append((table, rows, offset))
+        offset = end
+    return chunks, offset
+
+
+class TelemetryWriter:
+    """Appends telemetry to a log from a background thread. Create a
+    MatchTelemetry per match with match(), and close() the writer when done:
+    matches still open then are closed with it.
+    """
+
+    def __init__(self, path: str, chunk_rows: int = CHUNK_ROWS):
+        self.chunk_rows = chunk_rows
+        self.index = []  # (table, rows, offset) of every chunk in the file
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as file, mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as data:
+                self.index, end = read_index(data)
+            self.file = open(path, "r+b")
+            # Drop the old index, or a chunk cut short, and carry on from there
+            self.file.truncate(end)
+            self.file.seek(end)
+        else:
+            self.file = open(path, "wb")
+            self.file.write(HEADER.pack(MAGIC, VERSION))
+        self.matches = sum(rows for table, rows, _ in self.index if table == 1)
+        self.open = {}  # match -> MatchTelemetry not closed yet
+
+        self.buffers = [self.new_buffer(schema) for schema in SCHEMAS]
+        self.rows = [0] * len(SCHEMAS)  # Rows used in each buffer
+        # Buffers of each table already written out, to reuse
+        self.spare = [queue.SimpleQueue() for _ in SCHEMAS]
+        self.chunks = queue.SimpleQueue()  # (table, buffer, rows), None to stop
+        self.error = None  # First error of the writer thread
+        self.thread = threading.Thread(target=self.run, name="telemetry", daemon=True)
+        self.thread.start()
+
+    # Empty columns for a chunk of a table
+    def new_buffer(self, schema: np.dtype) -> dict:
+        return {
+            name: np.empty(self.chunk_rows, schema.fields[name][0])
+            for name in schema.names
+        }
+
+    # Start logging a match
+    def match(self, world: World, demo: bool = False) -> "MatchTelemetry":
+        """Returns the telemetry of a new two-ship match
+
+        Args:
+            world (World): the match, before its first tick
+            demo (bool, optional): whether scripted ships play it. Defaults to False.
+        """
+        self.matches += 1
+        telemetry = MatchTelemetry(self, self.matches - 1, world, demo)
+        self.open[telemetry.match] = telemetry
+        return telemetry
+
+    # Rows to fill in a table's buffer
+    def reserve(self, table: int, count: int) -> tuple:
+        """Makes room for count rows, handing a full buffer to the writer
+        thread first if needed
+
+        Args:
+            table (int): index in TABLES
+            count (int): rows needed, at most chunk_rows
+
+        Returns:
+            tuple: the buffer (column name -> array) and the slice of it to fill
+        """
+        rows = self.rows[table]
+        if rows + count > self.chunk_rows:
+            self.flush(table)
+            rows = 0
+        self.rows[table] = rows + count
+        return self.buffers[table], slice(rows, rows + count)
+
+    # Queue a table's buffered rows for writing
+    def flush(self, table: int):
+        if not self.rows[table]:
+            return
+        self.chunks.put((table, self.buffers[table], self.rows[table]))
+        # Reuse a buffer the thread is done with rather than allocating one
+        try:
+            self.buffers[table] = self.spare[table].get_nowait()
+        except queue.Empty:
+            self.buffers[table] = self.new_buffer(SCHEMAS[table])
+        self.rows[table] = 0
+
+    # Body of the writer thread
+    def run(self):
+        while True:
+            job = self.chunks.get()
+            if job is None:
+                return
+            table, buffer, rows = job
+            if self.error is None:
+                try:
+                    self.write_chunk(table, buffer, rows)
+                except OSError as error:
+                    self.error = error
+            self.spare[table].put(buffer)
+
+    # Write rows as one chunk
+    def write_chunk(self, table: int, buffer: dict, rows: int):
+        offset = self.file.tell()
+        self.file.write(CHUNK.pack(table, rows))
+        for name in SCHEMAS[table].names:
+            self.file.write(buffer[name][:rows])
+        self.file.flush()
+        self.index.append((table, rows, offset))
+
+    # Finish the log
+    def close(self):
+        """Writes the summary of every match still open (the game quit in the
+        middle of it), the buffered rows, the index and the footer. Raises the
+        first error the writer thread ran into, if any.
+        """
+        if self.file.closed:
+            return
+        for telemetry in list(self.open.values()):
+            telemetry.close()
+        for table in range(len(SCHEMAS)):
+            self.flush(table)
+        self.chunks.put(None)
+        self.thread.join()
+        if self.error is None:
+            index_offset = self.file.tell()
+            for entry in self.index:
+                self.file.write(INDEX_ENTRY.pack(*entry))
+            self.file.write(FOOTER.pack(index_offset, len(self.index), INDEX_MAGIC))
+        self.file.close()
+        if self.error is not None:
+            raise self.error
+
+
+class MatchTelemetry:
+    """Statistics of one match. Call tick() with the events of every
+    World.step() and close() once the match is over or abandoned.
+    """
+
+    def __init__(self, writer: TelemetryWriter, match: int, world: World, demo: bool):
+        self.writer = writer
+        self.match = match
+        self.world = world
+        self.demo = demo
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.first_tick = world.tick
+        ships = len(world.ships)
+        self.ship = np.arange(ships)
+        self.shots = [0] * ships  # Totals of the match so far
+        self.damage = [0] * ships
+
+    # Log one tick
+    def tick(self, events):
+        """Buffers a row per ship for the tick World.step() just ran
+
+        Args:
+            events (EventBus): the tick's events
+        """
+        world = self.world
+        ships = len(self.ship)
+        # A tick has a handful of events: counting them in Python beats NumPy
+        shots = [0] * ships
+        damage = [0] * ships
+        for kind, ship in events:
+            if kind == EVENT_FIRE:
+                shots[ship] += 1
+                self.shots[ship] += 1
+            elif kind == EVENT_HIT:
+                damage[ship] += 1
+                self.damage[ship] += 1
+        buffer, rows = self.writer.reserve(0, ships)
+        buffer["match"][rows] = self.match
+        buffer["tick"][rows] = world.tick
+        buffer["ship"][rows] = self.ship
+        buffer["health"][rows] = world.fleet.health
+        buffer["shots"][rows] = shots
+        buffer["damage"][rows] = damage
+        buffer["bullets"][rows] = world.bullets.owner_counts(ships)
+
+    # Log the match summary, once
+    def close(self):
+        if self.writer.open.pop(self.match, None) is None:
+            return
+        world = self.world
+        try:
+            intensity = INTENSITIES.index(world.intensity)
+        except ValueError:
+            intensity = -1
+        winner = world.winner()
+        color_1, color_2 = (ship.color for ship in world.ships[:2])
+        summary = {
+            "match": self.match,
+            "started": self.started,
+            "intensity": intensity,
+            "demo": self.demo,
+            "color_1": color_1,
+            "color_2": color_2,
+            "winner": -1 if winner is None else winner.index,
+            "ticks": world.tick - self.first_tick,
+            "seconds": time.perf_counter() - self.start,
+            "shots_1": self.shots[0],
+            "shots_2": self.shots[1],
+            "damage_1": self.damage[0],
+            "damage_2": self.damage[1],
+        }
+        buffer, rows = self.writer.reserve(1, 1)
+        for name, value in summary.items():
+            buffer[name][rows.start] = value
+        # Matches are few: write each one out right away
+        self.writer.flush(1)
+
+
+class TelemetryLog:
+    """A telemetry log opened for analysis. The file is memory-mapped and
+    only the columns asked for are read.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.chunks, _ = read_index(self.data)
+
+    # Rows of a table
+    def rows(self, table: str) -> int:
+        number = TABLES.index(table)
+        return sum(rows for t, rows, _ in self.chunks if t == number)
+
+    # Load a whole column
+    def column(self, table: str, name: str) -> np.ndarray:
+        """Reads one column of every chunk of a table into one array
+
+        Args:
+            table (str): "ticks" or "matches"
+            name (str): column name, a field of TICK or MATCH
+
+        Returns:
+            np.ndarray: the column, in the order the rows were written
+        """
+        number = TABLES.index(table)
+        schema = SCHEMAS[number]
+        dtype = schema.fields[name][0]
+        # Bytes per row of the columns before this one
+        before = sum(
+            schema.fields[field][0].itemsize
+            for field in schema.names[: schema.names.index(name)]
+        )
+        column = np.empty(self.rows(table), dtype)
+        filled = 0
+        for t, rows, offset in self.chunks:
+            if t != number:
+                continue
+            start = offset + CHUNK.size + before * rows
+            column[filled : filled + rows] = np.frombuffer(
+                self.data, dtype, rows, start
+            )
+            filled += rows
+        return column
+
+    # Load several columns
+    def columns(self, table: str, names: list = None) -> dict:
+        """Returns column name -> array for the given columns of a table, all
+        of them by default
+        """
+        schema = SCHEMAS[TABLES.index(table)]
+        return {name: self.column(table, name) for name in names or schema.names}
+
+    def close(self):
+        self.data.close()
+
+
+# Print a summary of a log
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a telemetry log.")
+    parser.add_argument("path", help="telemetry log to read")
+    args = parser.parse_args()
+
+    log = TelemetryLog(args.path)
+    matches = log.columns("matches")
+    print(
+        f"{len(log.chunks)} chunks, {log.rows('matches')} matches, "
+        f"{log.rows('ticks')} tick rows"
+    )
+    print(
+        f"{'intensity':<10}{'matches':>8}{'demos':>7}{'avg s':>8}{'avg ticks':>11}"
+        f"{'shots':>9}{'hit rate':>10}"
+    )
+    for level in np.unique(matches["intensity"]).tolist():
+        chosen = matches["intensity"] == level
+        shots = matches["shots_1"][chosen].sum() + matches["shots_2"][chosen].sum()
+        hits = matches["damage_1"][chosen].sum() + matches["damage_2"][chosen].sum()
+        print(
+            f"{level:<10}{np.count_nonzero(chosen):>8}"
+            f"{np.count_nonzero(matches['demo'][chosen]):>7}"
+            f"{matches['seconds'][chosen].mean():>8.1f}"
+            f"{matches['ticks'][chosen].mean():>11.0f}{shots:>9}"
+            f"{hits / max(shots, 1):>10.1%}"
+        )
+    log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Fixed-timestep accumulator decoupling the simulation from the frame rate.
+
+Each rendered frame reports how much real time passed; the accumulator says
+how many fixed simulation ticks to run so the game advances at the same speed
+on every machine, and how far between the last two ticks the frame falls so
+positions can be interpolated for drawing.
+"""
+
+
+class FixedTimestep:
+    """Turns variable frame times into a whole number of fixed ticks.
+
+    When a frame takes so long that more than max_steps ticks are due, the
+    extra time is dropped: the game briefly slows down instead of spiralling
+    into ever longer catch-up frames on weak hardware.
+    """
+
+    def __init__(self, tick_rate: int, max_steps: int = 5):
+        self.tick_rate = tick_rate
+        self.dt = 1 / tick_rate  # Seconds per tick
+        self.max_steps = max_steps
+        self.accumulator = 0.0  # Real time not yet simulated, in seconds
+        self.dropped = 0.0  # Total time skipped under load, in seconds
+
+    # Forget time accumulated while the match was not running
+    def reset(self):
+        self.accumulator = 0.0
+
+    # How many ticks to run for a frame
+    def advance(self, elapsed: float) -> int:
+        """Adds a frame's real time and returns the number of ticks now due.
+
+        Args:
+            elapsed (float): seconds since the previous frame
+
+        Returns:
+            int: ticks to simulate this frame, at most max_steps
+        """
+        self.accumulator += elapsed
+        # The epsilon keeps float error from losing a tick on exact frame times
+        steps = int(self.accumulator / self.dt + 1e-9)
+        if steps > self.max_steps:
+            self.dropped += self.accumulator - self.max_steps * self.dt
+            self.accumulator = self.max_steps * self.dt
+            steps = self.max_steps
+        self.accumulator -= steps * self.dt
+        return steps
+
+    # Interpolation factor between the previous and the current tick
+    @property
+    def alpha(self) -> float:
+        return max(0.0, min(self.accumulator / self.dt, 1.0))
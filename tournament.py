@@ -0,0 +1,358 @@
+"""Round-robin tournaments between scripted bot strategies.
+
+Every ordered pair of strategies (so each plays both sides) meets --rounds
+times at every intensity in --levels. The matches are split into chunks that
+a process pool plays headless with simulation.play_match; chunks are handed
+out as workers free up and their results are aggregated as they stream back.
+Each player's random choices are seeded from the tournament seed and the
+match's identity alone, so results do not depend on the worker count or the
+order chunks finish in.
+
+    python tournament.py --strategies chase,turret,wander --rounds 50
+    python tournament.py --levels 0,1,2,3 --workers 8 --output summary.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simulation import (
+    INPUT_DOWN,
+    INPUT_FIRE,
+    INPUT_FIRE_HELD,
+    INPUT_LEFT,
+    INPUT_RIGHT,
+    INPUT_UP,
+    INTENSITIES,
+    World,
+    chase_controller,
+    play_match,
+)
+
+DEFAULT_ROUNDS = 20
+DEFAULT_LEVELS = "0,1,2"
+DEFAULT_MAX_TICKS = 36000  # Matches still running after this count as draws
+CHUNKS_PER_WORKER = 8  # Enough chunks to even out slow and fast matches
+
+
+# Scripted player that holds its ground and shoots when level
+def turret_controller(rng: random.Random):
+    """Builds a controller that tracks the opponent vertically without
+    moving sideways and fires whenever the two ships are roughly level.
+
+    Args:
+        rng (random.Random): source of the scripted choices
+
+    Returns:
+        callable: controller(world, index) returning INPUT_* flags
+    """
+
+    def controller(world: World, index: int) -> int:
+        ship = world.ships[index]
+        gap = world.ships[1 - index].y - ship.y
+        flags = 0
+        if gap > world.vel:
+            flags |= INPUT_DOWN
+        elif gap < -world.vel:
+            flags |= INPUT_UP
+        if abs(gap) < ship.height / 2 and rng.random() < 0.2:
+            flags |= INPUT_FIRE | INPUT_FIRE_HELD
+        return flags
+
+    return controller
+
+
+# Scripted player that wanders and fires at random
+def wander_controller(rng: random.Random):
+    """Builds a controller that picks a random direction every so often and
+    fires at random, as a baseline every other strategy should beat.
+
+    Args:
+        rng (random.Random): source of the scripted choices
+
+    Returns:
+        callable: controller(world, index) returning INPUT_* flags
+    """
+    moves = [INPUT_LEFT, INPUT_RIGHT, INPUT_UP, INPUT_DOWN]
+    state = {"move": 0, "until": 0}
+
+    def controller(world: World, index: int) -> int:
+        if world.tick >= state["until"]:
+            state["move"] = rng.choice(moves) | rng.choice(moves)
+            state["until"] = world.tick + rng.randint(10, 40)
+        flags = state["move"]
+        if rng.random() < 0.1:
+            flags |= INPUT_FIRE | INPUT_FIRE_HELD
+        return flags
+
+    return controller
+
+
+# Strategy name -> factory taking a random.Random and returning a controller
+STRATEGIES = {
+    "chase": chase_controller,
+    "turret": turret_controller,
+    "wander": wander_controller,
+}
+
+
+# Every match of a tournament
+def schedule(strategies: list, levels: list, rounds: int) -> list:
+    """Lists the matches of a round robin: every ordered pair of distinct
+    strategies, rounds times per intensity level.
+
+    Returns:
+        list: (level, player 1 strategy, player 2 strategy, round) per match
+    """
+    return [
+        (level, first, second, round_index)
+        for level in levels
+        for first in strategies
+        for second in strategies
+        if first != second
+        for round_index in range(rounds)
+    ]
+
+
+# Play some matches; runs in a worker process
+def play_chunk(matches: list, seed: int, max_ticks: int) -> list:
+    """Plays each match to completion and reports its outcome.
+
+    Args:
+        matches (list): entries of schedule()
+        seed (int): tournament seed
+        max_ticks (int): matches still running after this are draws
+
+    Returns:
+        list: one result dict per match
+    """
+    results = []
+    for level, first, second, round_index in matches:
+        intensity = INTENSITIES[level]
+        match = f"{seed}/{level}/{first}/{second}/{round_index}"
+        controllers = [
+            STRATEGIES[name](random.Random(f"{match}/{player}"))
+            for player, name in enumerate((first, second))
+        ]
+        world = play_match(intensity, ["blue", "red"], controllers, max_ticks)
+        winner = world.winner()
+        results.append(
+            {
+                "level": level,
+                "players": [first, second],
+                "winner": winner.index if winner else -1,
+                "ticks": world.tick,
+                # Hits each player landed on the other
+                "damage": [
+                    intensity["health"] - world.ships[1].health,
+                    intensity["health"] - world.ships[0].health,
+                ],
+            }
+        )
+    return results
+
+
+# Running totals of a tournament
+class Summary:
+    """Aggregates match results per strategy, per pairing and per level. Only
+    integer totals are kept, so the result is the same in any arrival order.
+    """
+
+    def __init__(self):
+        self.strategies = {}
+        self.pairings = {}
+        self.levels = {}
+
+    # Totals of one key, created on first use
+    @staticmethod
+    def totals(table: dict, key) -> dict:
+        if key not in table:
+            table[key] = {
+                "matches": 0,
+                "wins": 0,
+                "losses": 0,
+                "draws": 0,
+                "ticks": 0,
+                "damage_dealt": 0,
+                "damage_taken": 0,
+            }
+        return table[key]
+
+    # Count one match
+    def add(self, result: dict):
+        for player, name in enumerate(result["players"]):
+            opponent = result["players"][1 - player]
+            for totals in (
+                self.totals(self.strategies, name),
+                self.totals(self.pairings, f"{name} vs {opponent}"),
+                self.totals(self.levels, (result["level"], name)),
+            ):
+                totals["matches"] += 1
+                if result["winner"] == -1:
+                    totals["draws"] += 1
+                elif result["winner"] == player:
+                    totals["wins"] += 1
+                else:
+                    totals["losses"] += 1
+                totals["ticks"] += result["ticks"]
+                totals["damage_dealt"] += result["damage"][player]
+                totals["damage_taken"] += result["damage"][1 - player]
+
+    # Rates and averages from the totals
+    @staticmethod
+    def rates(totals: dict) -> dict:
+        matches = totals["matches"]
+        return {
+            **totals,
+            "win_rate": totals["wins"] / matches,
+            "average_ticks": totals["ticks"] / matches,
+            "average_damage_dealt": totals["damage_dealt"] / matches,
+            "average_damage_taken": totals["damage_taken"] / matches,
+        }
+
+    # Everything, ready to be written as JSON
+    def to_dict(self) -> dict:
+        return {
+            "strategies": {
+                name: self.rates(totals)
+                for name, totals in sorted(self.strategies.items())
+            },
+            "pairings": {
+                name: self.rates(totals)
+                for name, totals in sorted(self.pairings.items())
+            },
+            "levels": {
+                f"intensity_{level}/{name}": self.rates(totals)
+                for (level, name), totals in sorted(self.levels.items())
+            },
+        }
+
+
+# Play a whole tournament on a process pool
+def run_tournament(
+    matches: list, workers: int, chunk_size: int, seed: int, max_ticks: int
+) -> Summary:
+    """Splits the matches into chunks, plays them on workers processes and
+    aggregates the results as each chunk finishes.
+
+    Args:
+        matches (list): output of schedule()
+        workers (int): processes to play on
+        chunk_size (int): matches per unit of work
+        seed (int): tournament seed
+        max_ticks (int): matches still running after this are draws
+
+    Returns:
+        Summary: the aggregated results
+    """
+    summary = Summary()
+    chunks = [matches[i : i + chunk_size] for i in range(0, len(matches), chunk_size)]
+    done = 0
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(play_chunk, chunk, seed, max_ticks) for chunk in chunks
+        ]
+        for future in as_completed(futures):
+            for result in future.result():
+                summary.add(result)
+            done += 1
+            print(f"\r{done}/{len(chunks)} chunks", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    return summary
+
+
+# Print the standings
+def report(summary: dict):
+    print(
+        f"{'strategy':<12}{'matches':>9}{'win %':>8}{'draws':>7}{'ticks':>8}"
+        f"{'dealt':>8}{'taken':>8}"
+    )
+    standings = sorted(
+        summary["strategies"].items(), key=lambda item: -item[1]["win_rate"]
+    )
+    for name, r in standings:
+        print(
+            f"{name:<12}{r['matches']:>9}{100 * r['win_rate']:>8.1f}{r['draws']:>7}"
+            f"{r['average_ticks']:>8.0f}{r['average_damage_dealt']:>8.1f}"
+            f"{r['average_damage_taken']:>8.1f}"
+        )
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--strategies",
+        default=",".join(STRATEGIES),
+        help=f"comma-separated strategies, from {', '.join(STRATEGIES)}",
+    )
+    parser.add_argument(
+        "--levels",
+        default=DEFAULT_LEVELS,
+        help="comma-separated intensity levels to play at",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=DEFAULT_ROUNDS,
+        help="matches per ordered pair of strategies and level",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help="matches per unit of work. Defaults to about "
+        f"{CHUNKS_PER_WORKER} chunks per worker",
+    )
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS)
+    parser.add_argument(
+        "--output",
+        default="tournament.json",
+        help="summary file to write. Defaults to tournament.json",
+    )
+    args = parser.parse_args()
+
+    strategies = args.strategies.split(",")
+    unknown = [name for name in strategies if name not in STRATEGIES]
+    if unknown:
+        parser.error(f"unknown strategies: {', '.join(unknown)}")
+    if len(strategies) < 2:
+        parser.error("a tournament needs at least two strategies")
+    levels = [int(level) for level in args.levels.split(",")]
+    matches = schedule(strategies, levels, args.rounds)
+    chunk_size = args.chunk_size or max(
+        1, -(-len(matches) // (args.workers * CHUNKS_PER_WORKER))
+    )
+
+    start = time.perf_counter()
+    summary = run_tournament(
+        matches, args.workers, chunk_size, args.seed, args.max_ticks
+    ).to_dict()
+    elapsed = time.perf_counter() - start
+    summary["settings"] = {
+        "strategies": strategies,
+        "levels": levels,
+        "rounds": args.rounds,
+        "seed": args.seed,
+        "max_ticks": args.max_ticks,
+        "workers": args.workers,
+        "chunk_size": chunk_size,
+    }
+    summary["seconds"] = elapsed
+    summary["matches_per_s"] = len(matches) / elapsed
+
+    report(summary)
+    print(
+        f"{len(matches)} matches in {elapsed:.1f} s on {args.workers} workers "
+        f"({summary['matches_per_s']:.1f} matches/s)"
+    )
+    with open(args.output, "w") as file:
+        json.dump(summary, file, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()